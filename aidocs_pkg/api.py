@@ -0,0 +1,726 @@
+"""
+Importable aidocs API.
+
+These functions do the work behind `aidocs setup`, `init` and `check` and
+return result objects instead of printing, so tools can embed aidocs in a
+long-lived process rather than running the CLI and parsing its output. The
+CLI in main.py only renders what they return. Problems that are worked
+around, such as an invalid .aidocs.json, are raised as AidocsWarning with
+the warnings module, which the CLI prints on stderr.
+
+    from aidocs_pkg import api
+
+    for status in api.check(["~/src"]):
+        if not status.compliant:
+            print(status.path, status.missing_links)
+
+Like main.py, this module imports the machinery behind each function only
+when that function runs.
+"""
+import os
+import warnings
+
+from .constants import (
+    AIDOCS_DIR,
+    CONFIG_FILE,
+    TEMPLATE_FILE,
+    INDEX_FILE,
+    SEARCH_DB,
+    TOKENS_FILE,
+    DRIFT_FILE,
+    FRAGMENTS_DIR,
+    BUILD_FILE,
+    LOCK_DIR,
+    REAL_FILENAME,
+    DEFAULT_CONFIG,
+    DEFAULT_JOBS,
+    DEFAULT_TEMPLATE,
+)
+from . import stats
+
+
+class AidocsWarning(UserWarning):
+    """
+    Issued for problems aidocs works around, e.g. an invalid .aidocs.json
+    checked with the global settings instead.
+    """
+
+
+class RepoStatus:
+    """
+    Compliance of one repository.
+
+    Attributes:
+        path (str): Repository root
+        compliant (bool): Whether nothing is missing or invalid
+        missing_file (bool): Whether aidocs.md is missing (links are not
+            checked then)
+        missing_links (list): Configured links that do not exist
+        invalid_links (list): Configured links that exist but do not point
+            to aidocs.md
+        syscalls (int): Filesystem calls the inspection made, or None if
+            they were not counted
+        tokens (int): Estimated tokens of aidocs.md, or None if it was not
+            estimated
+        over_budget (bool): Whether tokens exceeds the "token_budget"
+            setting. Over-budget repositories can still be compliant.
+        error (str): Why the path could not be listed, e.g. because it does
+            not exist; None if it could. Nothing else is checked then.
+    """
+
+    __slots__ = ("path", "compliant", "missing_file", "missing_links", "invalid_links",
+                 "syscalls", "tokens", "over_budget", "error")
+
+    def __init__(self, path, compliant=True, missing_file=False, missing_links=(),
+                 invalid_links=(), syscalls=None, tokens=None, over_budget=False, error=None):
+        self.path = path
+        self.compliant = compliant
+        self.missing_file = missing_file
+        self.missing_links = list(missing_links)
+        self.invalid_links = list(invalid_links)
+        self.syscalls = syscalls
+        self.tokens = tokens
+        self.over_budget = over_budget
+        self.error = error
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Builds a status from a compliance.inspect_repo result record.
+        """
+        return cls(record["path"], record["compliant"], record["missing_file"],
+                   record["missing_links"], record["invalid_links"], record.get("syscalls"),
+                   record.get("tokens"), record.get("over_budget", False), record.get("error"))
+
+    def to_record(self):
+        """
+        Returns the status as a result record, the form the report
+        renderers and the JSON output use.
+        """
+        record = {
+            "path": self.path,
+            "compliant": self.compliant,
+            "missing_file": self.missing_file,
+            "missing_links": self.missing_links,
+            "invalid_links": self.invalid_links,
+        }
+        if self.syscalls is not None:
+            record["syscalls"] = self.syscalls
+        if self.tokens is not None:
+            record["tokens"] = self.tokens
+            record["over_budget"] = self.over_budget
+        if self.error is not None:
+            record["error"] = self.error
+        return record
+
+    def __eq__(self, other):
+        if not isinstance(other, RepoStatus):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"RepoStatus({self.path!r}, compliant={self.compliant!r})"
+
+
+class InitResult:
+    """
+    What init did to one project.
+
+    Attributes:
+        path (str): Project directory
+        created (bool): Whether aidocs.md was created from a template
+        template (str): The template file it was created from, or None
+        sources (list): Configured link names that were regular files, in
+            configuration order
+        deduplicated (list): (link_name, duplicate_of) pairs for the sources
+            whose content aidocs.md already held; duplicate_of is None for
+            content before the first merged file
+        links (list): (link_name, action) pairs, one per configured link,
+            where action is "replaced" (a merged file became a symlink),
+            "created", "exists" (already a correct symlink) or "conflict"
+            (something else is in the way and was left alone)
+    """
+
+    __slots__ = ("path", "created", "template", "sources", "deduplicated", "links")
+
+    def __init__(self, path, created=False, template=None, sources=(), deduplicated=(),
+                 links=()):
+        self.path = path
+        self.created = created
+        self.template = template
+        self.sources = list(sources)
+        self.deduplicated = list(deduplicated)
+        self.links = list(links)
+
+    @property
+    def merged(self):
+        """
+        list: Sources whose content was appended to aidocs.md
+        """
+        skipped = set(name for name, _ in self.deduplicated)
+        return [name for name in self.sources if name not in skipped]
+
+    @property
+    def conflicts(self):
+        """
+        list: Links left alone because something else is in the way
+        """
+        return [name for name, action in self.links if action == "conflict"]
+
+    def __repr__(self):
+        return f"InitResult({self.path!r}, created={self.created!r}, merged={self.merged!r})"
+
+
+class DriftReport:
+    """
+    How far one repository's aidocs.md has moved from its template.
+
+    Attributes:
+        path (str): Repository root
+        template (str): The template file it was compared with
+        sections (list): (template heading, status) pairs in template
+            order, where status is "stock" (unchanged from the current
+            template), "outdated" (unchanged from an earlier version of it),
+            "modified" or "missing"
+        todo (list): Headings of the sections of aidocs.md that still hold
+            a "(TODO: ...)" placeholder
+    """
+
+    __slots__ = ("path", "template", "sections", "todo")
+
+    def __init__(self, path, template, sections=(), todo=()):
+        self.path = path
+        self.template = template
+        self.sections = [tuple(section) for section in sections]
+        self.todo = list(todo)
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Builds a report from a drift.DriftCache.drift record.
+        """
+        return cls(record["path"], record["template"], record["sections"], record["todo"])
+
+    def to_record(self):
+        """
+        Returns the report as the record the drift renderers use.
+        """
+        return {"path": self.path, "template": self.template,
+                "sections": [list(section) for section in self.sections], "todo": self.todo}
+
+    def with_status(self, status):
+        """
+        Returns the template headings of the sections with a status.
+        """
+        return [heading for heading, section_status in self.sections if section_status == status]
+
+    def __repr__(self):
+        return f"DriftReport({self.path!r}, {self.sections!r})"
+
+
+class BuildResult:
+    """
+    What building one repository's aidocs.md did.
+
+    Attributes:
+        path (str): Repository root
+        status (str): "built" (includes expanded and the file rewritten),
+            "planned" (would be rewritten, in a dry run), "unchanged" (the
+            expansion matched the file) or "cached" (file and fragments
+            unchanged since the last build, so the file was not read), or
+            "failed"
+        fragments (list): Names of the fragments the file includes
+        error (str): Why the build failed, or None
+    """
+
+    __slots__ = ("path", "status", "fragments", "error")
+
+    def __init__(self, path, status, fragments=(), error=None):
+        self.path = path
+        self.status = status
+        self.fragments = list(fragments)
+        self.error = error
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Builds a result from a build.build_repo record.
+        """
+        return cls(record["path"], record["status"], record["fragments"], record.get("error"))
+
+    def to_record(self):
+        """
+        Returns the result as a JSON-serializable dict.
+        """
+        record = {"path": self.path, "status": self.status, "fragments": self.fragments}
+        if self.error is not None:
+            record["error"] = self.error
+        return record
+
+    def __repr__(self):
+        return f"BuildResult({self.path!r}, {self.status!r})"
+
+
+def load_config():
+    """
+    Reads the global configuration file.
+
+    Returns:
+        dict: The validated contents of CONFIG_FILE. It is parsed again only
+        after the file changes, and the same object is returned until then,
+        so it must not be modified.
+
+    Raises:
+        config.ConfigError: If the file is not valid
+        OSError: If the file cannot be read
+    """
+    from .config import CACHE
+
+    active = stats.ACTIVE
+    if active is None:
+        return CACHE.load_global(CONFIG_FILE)
+    with active.phase("config"):
+        return CACHE.load_global(CONFIG_FILE)
+
+
+def setup():
+    """
+    Creates the ~/.aidocs directory with the default configuration and
+    template, keeping existing files.
+
+    Returns:
+        list: The files that were created
+    """
+    import json
+
+    os.makedirs(AIDOCS_DIR, exist_ok=True)
+    created = []
+    if not os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(DEFAULT_CONFIG, f, indent=4)
+        created.append(CONFIG_FILE)
+    if not os.path.exists(TEMPLATE_FILE):
+        with open(TEMPLATE_FILE, "w") as f:
+            f.write(DEFAULT_TEMPLATE)
+        created.append(TEMPLATE_FILE)
+    return created
+
+
+def init(project_path, config=None, template=None, lock_dir=None):
+    """
+    Initializes a project with aidocs.md and symlinks.
+
+    Args:
+        project_path (str): Path to the project directory to initialize
+        config (dict): Global configuration as returned by load_config,
+            which is called when it is omitted. The project's .aidocs.json,
+            if any, is laid over it.
+        template (str): Name of the template a new aidocs.md is rendered
+            from, instead of the "template" setting. Without either, the
+            default template TEMPLATE_FILE is used.
+        lock_dir (str): Directory of the per-repository locks, LOCK_DIR by
+            default. The project is locked while it is initialized, so init
+            never races `init --recursive`, `check --fix` or `build` on it.
+
+    Returns:
+        InitResult: What was merged, skipped and linked
+
+    Raises:
+        locks.RepoLocked: If another aidocs process is changing the project
+        config.ConfigError: If the project's .aidocs.json is not valid
+        templates.TemplateError: If the template does not exist or its
+            name is not valid
+        OSError: If a file cannot be read or written. A crash or error at
+            any point leaves either the old or the new aidocs.md in place,
+            and the original files are only replaced once their content is
+            safely on disk.
+
+    Existing regular files in place of the configured links are merged into
+    aidocs.md (rendered from the template if needed), skipping content it
+    already holds, and then replaced by symlinks; missing links are created.
+    Templates are compiled once per process and file version, so bulk runs
+    only render them.
+    """
+    from .locks import lock_repo
+
+    if config is None:
+        config = load_config()
+    with lock_repo(project_path, LOCK_DIR if lock_dir is None else lock_dir):
+        return _init(project_path, config, template)
+
+
+def _init(project_path, config, template):
+    from .config import CACHE
+    from .consolidate import merge_sources, replace_with_symlink
+
+    config = CACHE.effective(config, project_path)
+    symlinks = config.get("symlinks", [])
+    real_file_path = os.path.join(project_path, REAL_FILENAME)
+
+    result = InitResult(project_path)
+    sources = []
+    for link_name in symlinks:
+        full_link_path = os.path.join(project_path, link_name)
+        if os.path.exists(full_link_path) and not os.path.islink(full_link_path):
+            sources.append((link_name, full_link_path))
+    result.sources = [name for name, _ in sources]
+
+    if os.path.exists(real_file_path):
+        if sources:
+            result.deduplicated = merge_sources(real_file_path, real_file_path, sources)
+    else:
+        from .drift import remember_template
+        from .project import template_variables
+        from .templates import CACHE as TEMPLATES, template_path
+
+        if template is None:
+            template = config.get("template")
+        result.created = True
+        result.template = TEMPLATE_FILE if template is None else template_path(template)
+        text = TEMPLATES.load(result.template).render(template_variables(project_path))
+        remember_template(result.template)
+        result.deduplicated = merge_sources(real_file_path,
+                                            text.encode("utf-8", "surrogateescape"), sources)
+
+    merged = set(result.sources)
+    for link_name in symlinks:
+        link_path = os.path.join(project_path, link_name)
+        if link_name in merged:
+            replace_with_symlink(link_path, REAL_FILENAME)
+            action = "replaced"
+        elif os.path.lexists(link_path):
+            if os.path.islink(link_path) and os.readlink(link_path) == REAL_FILENAME:
+                action = "exists"
+            else:
+                action = "conflict"
+        else:
+            os.symlink(REAL_FILENAME, link_path)
+            action = "created"
+        result.links.append((link_name, action))
+    return result
+
+
+def discover(search_paths, jobs=DEFAULT_JOBS, full=False, exclude=(), gitignore=False,
+             max_depth=None, nested=False, follow_symlinks=False, shard=None):
+    """
+    Yields git repositories below the search paths, keeping the index up to date.
+
+    Args:
+        search_paths (list): Paths to recursively search for git
+            repositories; a single path may be given as a string
+        jobs (int): Number of directories listed concurrently
+        full (bool): Ignore cached listings in the repository index
+        exclude (list): Glob patterns of directories not to descend into
+        gitignore (bool): Also skip directories ignored by each
+            repository's .gitignore files
+        max_depth (int): Do not descend more than this many levels below
+            a search path
+        nested (bool): Also look for repositories inside repositories,
+            e.g. submodules of a monorepo. By default the walk stops at each
+            repository root.
+        follow_symlinks (bool): Descend into symlinked directories
+        shard (tuple): (K, N) to walk only the K-th of N disjoint slices of
+            each search path, split by top-level directory name
+
+    The search paths are resolved to their canonical paths and walked
+    parents first, sharing one set of visited (st_dev, st_ino) pairs: no
+    directory is listed twice, however many roots, symlinks or bind mounts
+    lead to it, so overlapping roots cost as much as their union and
+    symlink loops end. Repositories are yielded once, under their canonical
+    path.
+
+    The index is only saved once the walk has completed, so an interrupted
+    run never drops entries from it; if saving fails, an AidocsWarning is
+    issued. Without search paths nothing is yielded.
+    """
+    from .discovery import VisitedSet, find_repos, restrict_to_shard, stop_at_repos
+    from .index import RepoIndex
+
+    if isinstance(search_paths, str):
+        search_paths = [search_paths]
+    roots = sorted(set(os.path.realpath(path) for path in search_paths))
+    if not roots:
+        return
+    index = RepoIndex(INDEX_FILE, roots[0], full=full, follow_symlinks=follow_symlinks,
+                      visited=VisitedSet(), shard=shard)
+    active = stats.ACTIVE
+    for root in roots:
+        index.select_root(root)
+        visit = index.visit
+        if active is not None:
+            visit = active.timed("discovery", visit, counter="dirs_visited")
+        if not nested:
+            visit = stop_at_repos(visit)
+        if shard is not None:
+            visit = restrict_to_shard(visit, root, *shard)
+        if exclude or gitignore or max_depth is not None:
+            from .prune import Pruner
+            visit = Pruner(root, visit, exclude, gitignore, max_depth).visit
+        for repo in find_repos(root, jobs, visit=visit):
+            # Without symlinks below a canonical root, paths are canonical.
+            yield os.path.realpath(repo) if follow_symlinks else repo
+    try:
+        index.save()
+    except OSError as e:
+        warnings.warn(f"could not update repository index {INDEX_FILE}: {e}", AidocsWarning)
+
+
+def link_overrides(config):
+    """
+    Returns the overrides callback of compliance.inspect_repo for a global
+    configuration: it gives the links a repository with its own
+    .aidocs.json must have. If that file is not valid, an AidocsWarning is
+    issued and the global links are used.
+    """
+    from .config import CACHE, ConfigError
+
+    def overrides(repo_path):
+        try:
+            return CACHE.effective(config, repo_path).get("symlinks", [])
+        except (OSError, ConfigError) as e:
+            warnings.warn(f"{e}; checking {repo_path} with the global settings",
+                          AidocsWarning)
+            return config.get("symlinks", [])
+
+    return overrides
+
+
+def check(paths=(), jobs=DEFAULT_JOBS, full=False, config=None, gitignore=False,
+          max_depth=None, nested=False, follow_symlinks=False, shard=None, repos=None,
+          count_syscalls=False, tokens=True):
+    """
+    Checks git repositories for aidocs.md and correct symlinks.
+
+    Args:
+        paths (list): Paths to recursively search for git repositories; a
+            single path may be given as a string
+        jobs (int): Number of directories listed and repositories inspected
+            concurrently
+        full (bool): Ignore the repository index and list every directory
+            again instead of only those whose mtime changed
+        config (dict): Global configuration as returned by load_config,
+            which is called when it is omitted. Repositories with their own
+            .aidocs.json are checked against the links it configures; if
+            that file is not valid, an AidocsWarning is issued and the
+            global links are checked.
+        gitignore (bool): Do not descend into directories ignored by a
+            repository's .gitignore files, in addition to the "gitignore"
+            setting of the configuration
+        max_depth (int): Do not descend more than this many levels below
+            a search path
+        nested (bool): Also look for repositories inside repositories
+        follow_symlinks (bool): Descend into symlinked directories; each
+            directory is still walked only once
+        shard (tuple): (K, N) to check only the K-th of N disjoint slices
+        repos (iterable): Repositories to check instead of searching paths;
+            consumed lazily, and the search options are ignored then
+        count_syscalls (bool): Count the filesystem calls each inspection
+            makes
+        tokens (bool): Estimate the tokens of each aidocs.md and compare
+            them with the "token_budget" setting. Estimates are cached in
+            ~/.aidocs/tokens.json, which is updated once every status has
+            been consumed.
+
+    Returns:
+        iterator: One RepoStatus per repository, in completion order. Each
+        repository is inspected as soon as discovery finds it, so the first
+        statuses arrive before the walk has finished.
+    """
+    from .compliance import check_repos
+
+    if config is None:
+        config = load_config()
+    overrides = link_overrides(config)
+
+    if repos is None:
+        repos = discover(paths, jobs, full, exclude=config.get("exclude", []),
+                         gitignore=gitignore or config.get("gitignore", False),
+                         max_depth=max_depth, nested=nested, follow_symlinks=follow_symlinks,
+                         shard=shard)
+    cache = None
+    if tokens:
+        from .tokens import TokenCache
+        cache = TokenCache(TOKENS_FILE)
+    results = check_repos(repos, config.get("symlinks", []), jobs,
+                          count_syscalls=count_syscalls, stats=stats.ACTIVE,
+                          overrides=overrides,
+                          tokens=cache.estimate if cache is not None else None)
+    if cache is None:
+        return map(RepoStatus.from_record, results)
+    return _budgeted(results, cache, config.get("token_budget"))
+
+
+def _budgeted(results, cache, budget):
+    for record in results:
+        status = RepoStatus.from_record(record)
+        status.over_budget = bool(budget and status.tokens is not None and status.tokens > budget)
+        yield status
+    cache.save()
+
+
+def update_search_index(paths=(), jobs=DEFAULT_JOBS, full=False, config=None, repos=None):
+    """
+    Brings the search index up to date with the repositories check finds.
+
+    Args:
+        paths (list): Paths to recursively search for git repositories; a
+            single path may be given as a string. Indexed repositories below
+            them that are no longer found are dropped from the index.
+        jobs (int): Number of directories listed and files read concurrently
+        full (bool): Ignore the repository index while searching
+        config (dict): Global configuration, for its exclude and gitignore
+            settings; load_config is called when it is omitted
+        repos (iterable): Repositories to index instead of searching paths
+
+    Returns:
+        dict: Number of aidocs.md files "added", "updated", "unchanged" and
+        "removed"
+
+    Only files whose size or mtime changed are read, and only files whose
+    content changed are indexed again.
+    """
+    from .search import SearchIndex
+
+    if isinstance(paths, str):
+        paths = [paths]
+    roots = []
+    if repos is None:
+        if config is None:
+            config = load_config()
+        roots = [os.path.realpath(path) for path in paths]
+        repos = discover(paths, jobs, full, exclude=config.get("exclude", []),
+                         gitignore=config.get("gitignore", False))
+    with SearchIndex(SEARCH_DB) as index:
+        return index.update(repos, roots, jobs)
+
+
+def search(query, limit=10):
+    """
+    Searches the indexed aidocs.md files.
+
+    Args:
+        query (str): Words to look for; each also matches longer words it
+            is a prefix of
+        limit (int): Maximum number of hits
+
+    Returns:
+        list: search.Hit objects (repo, path, heading, line, score,
+        snippet), best first. Only the index is read, so results reflect
+        the last update_search_index.
+    """
+    from .search import SearchIndex
+
+    with SearchIndex(SEARCH_DB) as index:
+        return index.search(query, limit)
+
+
+def drift(paths=(), jobs=DEFAULT_JOBS, full=False, config=None, template=None, repos=None):
+    """
+    Compares the aidocs.md files of repositories with their templates.
+
+    Args:
+        paths (list): Paths to recursively search for git repositories; a
+            single path may be given as a string
+        jobs (int): Number of directories listed and files compared
+            concurrently
+        full (bool): Ignore the repository index while searching
+        config (dict): Global configuration; load_config is called when it
+            is omitted. Each repository is compared with the template its
+            effective "template" setting names, or TEMPLATE_FILE.
+        template (str): Name of the template to compare every repository
+            with instead
+        repos (iterable): Repositories to compare instead of searching paths
+
+    Returns:
+        iterator: One DriftReport per repository with an aidocs.md, in
+        completion order. The cache in ~/.aidocs/drift.json is updated once
+        every report has been consumed.
+
+    Raises:
+        templates.TemplateError: If the template name is invalid, or while
+            iterating, if a template does not exist
+    """
+    from .config import CACHE, ConfigError
+    from .drift import DriftCache
+    from .parallel import imap_unordered
+    from .templates import template_path
+
+    if config is None:
+        config = load_config()
+    if template is not None:
+        fixed_template = template_path(template)
+    if repos is None:
+        repos = discover(paths, jobs, full, exclude=config.get("exclude", []),
+                         gitignore=config.get("gitignore", False))
+    cache = DriftCache(DRIFT_FILE)
+
+    def compare(repo_path):
+        if template is not None:
+            return cache.drift(repo_path, fixed_template)
+        try:
+            name = CACHE.effective(config, repo_path).get("template")
+        except (OSError, ConfigError) as e:
+            warnings.warn(f"{e}; comparing {repo_path} with the global template",
+                          AidocsWarning)
+            name = config.get("template")
+        return cache.drift(repo_path, TEMPLATE_FILE if name is None else template_path(name))
+
+    return _drift_reports(imap_unordered(compare, repos, jobs), cache)
+
+
+def _drift_reports(records, cache):
+    for record in records:
+        if record is not None:
+            yield DriftReport.from_record(record)
+    cache.save()
+
+
+def build(paths=(), jobs=DEFAULT_JOBS, full=False, config=None, repos=None, dry_run=False):
+    """
+    Expands the fragment include directives in the aidocs.md files of
+    repositories.
+
+    Each `<!-- aidocs:include NAME -->` line is followed by the content of
+    ~/.aidocs/fragments/NAME.md up to an `<!-- aidocs:end NAME -->` line,
+    replacing what an earlier build put there; see build.py. Files whose
+    content and fragments are unchanged since their last build are not read,
+    and files are written in place of the aidocs.md the symlinks point at.
+
+    Args:
+        paths (list): Paths to recursively search for git repositories; a
+            single path may be given as a string
+        jobs (int): Number of directories listed and files built
+            concurrently
+        full (bool): Ignore the repository index while searching
+        config (dict): Global configuration; load_config is called when it
+            is omitted
+        repos (iterable): Repositories to build instead of searching paths
+        dry_run (bool): Only report which files would be rewritten
+
+    Returns:
+        iterator: One BuildResult per repository with an aidocs.md, in
+        completion order. The cache in ~/.aidocs/build.json is updated once
+        every result has been consumed.
+    """
+    from .build import BuildCache, Fragments, build_repo
+    from .parallel import imap_unordered
+
+    if config is None:
+        config = load_config()
+    if repos is None:
+        repos = discover(paths, jobs, full, exclude=config.get("exclude", []),
+                         gitignore=config.get("gitignore", False))
+    fragments = Fragments(FRAGMENTS_DIR)
+    cache = BuildCache(BUILD_FILE)
+
+    def build_one(repo_path):
+        return build_repo(repo_path, fragments, cache, LOCK_DIR, dry_run)
+
+    return _build_results(imap_unordered(build_one, repos, jobs), cache)
+
+
+def _build_results(records, cache):
+    for record in records:
+        if record is not None:
+            yield BuildResult.from_record(record)
+    cache.save()
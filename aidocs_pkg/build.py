@@ -0,0 +1,300 @@
+"""
+Shared fragments included into aidocs.md files.
+
+A line `<!-- aidocs:include NAME -->` in aidocs.md includes the fragment
+~/.aidocs/fragments/NAME.md. `aidocs build` expands it in place: the
+fragment's text follows the directive, up to a closing
+`<!-- aidocs:end NAME -->` line that the next build replaces along with
+everything before it, so aidocs.md stays the one file the symlinks point
+at and rebuilding is idempotent. Fragments may include other fragments;
+those are expanded without markers. Directives inside fenced code blocks
+are left alone.
+
+Each fragment is compiled once per build into its expanded text and a hash
+over its own content and the hashes of the fragments it includes, so a
+fragment's hash changes whenever anything it depends on changes. The build
+cache in ~/.aidocs/build.json records, per aidocs.md, its mtime and size
+after the last build and the hashes of the fragments it included: a
+repository whose file and fragments are unchanged costs one stat, and after
+editing one fragment only the files that include it, directly or through
+other fragments, are read and rewritten.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+from .consolidate import write_consolidated, write_json_atomic
+from .constants import REAL_FILENAME
+
+CACHE_VERSION = 1
+
+_INCLUDE = re.compile(r"\s*<!--\s*aidocs:include\s+(\S+?)\s*-->\s*$")
+_END = re.compile(r"\s*<!--\s*aidocs:end\s+(\S+?)\s*-->\s*$")
+_FENCE = re.compile(r"\s*(```|~~~)")
+_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*\Z")
+
+
+class BuildError(ValueError):
+    """
+    Raised when an include names a missing or invalid fragment, or
+    fragments include each other in a cycle.
+    """
+
+
+def _directives(lines):
+    """
+    Yields (index, fragment name) for the include lines outside fenced code
+    blocks.
+    """
+    fence = None
+    for index, line in enumerate(lines):
+        match = _FENCE.match(line)
+        if match:
+            if fence is None:
+                fence = match.group(1)
+            elif fence == match.group(1):
+                fence = None
+            continue
+        if fence is None:
+            match = _INCLUDE.match(line)
+            if match:
+                yield index, match.group(1)
+
+
+def _end_marker(lines, start, name):
+    """
+    Returns the index after the end marker of an expansion starting at
+    start, or start if there is none before the next include directive.
+    Lines inside fenced code blocks, which an expanded fragment may hold,
+    are skipped like in _directives.
+    """
+    fence = None
+    for index in range(start, len(lines)):
+        line = lines[index]
+        match = _FENCE.match(line)
+        if match:
+            if fence is None:
+                fence = match.group(1)
+            elif fence == match.group(1):
+                fence = None
+            continue
+        if fence is not None:
+            continue
+        match = _END.match(line)
+        if match and match.group(1) == name:
+            return index + 1
+        if _INCLUDE.match(line):
+            break
+    return start
+
+
+def _fragment_name(name):
+    if name.endswith(".md"):
+        name = name[:-len(".md")]
+    if not _NAME.match(name):
+        raise BuildError(f"invalid fragment name {name!r}")
+    return name
+
+
+class Fragments:
+    """
+    The fragments in a directory, each compiled on first use.
+
+    Args:
+        fragments_dir (str): Directory of the <name>.md fragments
+
+    Lookups are safe from several threads.
+    """
+
+    def __init__(self, fragments_dir):
+        self.fragments_dir = fragments_dir
+        # Name: (expanded text, hash) or BuildError
+        self._compiled = {}
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        """
+        Returns a fragment's expanded text and hash.
+
+        Raises:
+            BuildError: If the fragment, or one it includes, is missing or
+                invalid, or if it includes itself
+        """
+        with self._lock:
+            return self._get(_fragment_name(name), ())
+
+    def _get(self, name, stack):
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            if name in stack:
+                raise BuildError(f"fragments include each other: {' -> '.join(stack + (name,))}")
+            try:
+                compiled = self._compile(name, stack + (name,))
+            except BuildError as e:
+                compiled = e
+            self._compiled[name] = compiled
+        if isinstance(compiled, BuildError):
+            raise compiled
+        return compiled
+
+    def _compile(self, name, stack):
+        path = os.path.join(self.fragments_dir, f"{name}.md")
+        try:
+            with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                text = f.read()
+        except OSError as e:
+            raise BuildError(f"fragment {name!r} cannot be read: {e.strerror or e}")
+        digest = hashlib.sha256(text.encode("utf-8", "surrogateescape"))
+        lines = text.splitlines()
+        for index, include in reversed(list(_directives(lines))):
+            expanded, included_hash = self._get(_fragment_name(include), stack)
+            lines[index:index + 1] = expanded.splitlines()
+            digest.update(f"\0{include}\0{included_hash}".encode("utf-8", "surrogateescape"))
+        return "\n".join(lines).strip("\n"), digest.hexdigest()
+
+
+def expand(text, fragments):
+    """
+    Expands the include directives of an aidocs.md.
+
+    Args:
+        text (str): Current content
+        fragments (Fragments): Where included fragments come from
+
+    Returns:
+        tuple: (new content, {fragment name: hash}) for the fragments
+        included directly
+
+    Raises:
+        BuildError: If an included fragment cannot be expanded
+    """
+    lines = text.splitlines(True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    out = []
+    used = {}
+    position = 0
+    for index, name in _directives(lines):
+        if index < position:
+            # Inside a block that is being replaced.
+            continue
+        out.extend(lines[position:index + 1])
+        if not lines[index].endswith(("\n", "\r")):
+            out.append(newline)
+        expanded, digest = fragments.get(name)
+        used[name] = digest
+        # Replace the previous expansion, up to its end marker.
+        position = _end_marker(lines, index + 1, name)
+        if expanded:
+            out.append(expanded.replace("\n", newline) + newline)
+        out.append(f"<!-- aidocs:end {name} -->{newline}")
+    out.extend(lines[position:])
+    return "".join(out), used
+
+
+class BuildCache:
+    """
+    What each aidocs.md included at its last build.
+
+    Args:
+        path (str): Cache file; read now, written by save
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # aidocs.md path: [mtime_ns, size, {fragment name: hash}]
+        self._files = {}
+        self._dirty = False
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self._files = data["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    def current(self, path, st, fragments):
+        """
+        Returns the names of the fragments a file includes if the file is
+        unchanged since its last build and every one of them still has the
+        same hash, or None.
+        """
+        known = self._files.get(path)
+        if known is None or known[0] != st.st_mtime_ns or known[1] != st.st_size:
+            return None
+        for name, digest in known[2].items():
+            try:
+                if fragments.get(name)[1] != digest:
+                    return None
+            except BuildError:
+                return None
+        return sorted(known[2])
+
+    def record(self, path, st, used):
+        self._files[path] = [st.st_mtime_ns, st.st_size, used]
+        self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache if anything changed. If the write fails, the next
+        build reads every file again but rewrites only those that changed.
+        """
+        if not self._dirty:
+            return
+        try:
+            write_json_atomic(self.path, {"version": CACHE_VERSION, "files": self._files})
+        except OSError:
+            pass
+        self._dirty = False
+
+
+def build_repo(repo_path, fragments, cache, lock_dir, dry_run=False):
+    """
+    Expands the includes of one repository's aidocs.md.
+
+    Args:
+        repo_path (str): Repository root
+        fragments (Fragments): Where included fragments come from
+        cache (BuildCache): Build cache, consulted and updated
+        lock_dir (str): Directory of the repository locks shared with
+            `aidocs init --recursive`
+        dry_run (bool): Only report whether the file would change
+
+    Returns:
+        dict: Record with the keys path, status ("built", "planned",
+        "unchanged", "cached" or "failed"), fragments (names included
+        directly) and error (for "failed"), or None if the repository has
+        no aidocs.md
+    """
+    from .locks import RepoLocked, lock_repo
+
+    path = os.path.join(repo_path, REAL_FILENAME)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    record = {"path": repo_path, "status": "unchanged", "fragments": []}
+    current = cache.current(path, st, fragments)
+    if current is not None:
+        record["status"] = "cached"
+        record["fragments"] = current
+        return record
+    try:
+        with lock_repo(repo_path, lock_dir):
+            with open(path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+                text = f.read()
+            expanded, used = expand(text, fragments)
+            record["fragments"] = sorted(used)
+            if expanded != text:
+                if dry_run:
+                    record["status"] = "planned"
+                    return record
+                write_consolidated(path, expanded.encode("utf-8", "surrogateescape"), [])
+                record["status"] = "built"
+            if not dry_run:
+                cache.record(path, os.stat(path), used)
+    except (OSError, BuildError, RepoLocked) as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+    return record
@@ -0,0 +1,38 @@
+"""
+Thin client for the `aidocs serve` query socket.
+
+Kept free of the discovery and inspection modules so that `aidocs query`
+starts as fast as the interpreter allows.
+"""
+import json
+import socket
+
+
+def request(socket_path, payload, timeout=2.0):
+    """
+    Sends one request to a running `aidocs serve` and returns its response.
+
+    Args:
+        socket_path (str): Path of the server socket
+        payload (dict): Request object, e.g. {"op": "status", "path": "."}
+        timeout (float): Seconds to wait for the connection and the answer
+
+    Returns:
+        dict: The decoded response
+
+    Raises:
+        OSError: If no server is listening or the connection fails
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    if not data:
+        raise OSError(f"no response from {socket_path}")
+    return json.loads(data)
@@ -0,0 +1,160 @@
+"""
+Per-repository compliance inspection for aidocs.
+
+A repository is inspected with a single os.scandir of its root. The entry
+types the directory listing already carries tell aidocs.md, regular files and
+symlinks apart, so the only additional calls are one readlink per configured
+link that really is a symlink, and a stat when aidocs.md is itself a symlink.
+A repository's own configuration file shows up in the same listing, so
+repositories without one pay nothing for per-repository settings. Token
+estimates add one stat of aidocs.md, which is all a cached estimate needs.
+"""
+import os
+
+from .constants import PROJECT_CONFIG_FILE, REAL_FILENAME
+from .parallel import imap_unordered
+from .syscalls import SyscallCounter
+
+
+def _is_nested(name):
+    return os.sep in name or (os.altsep is not None and os.altsep in name)
+
+
+def _link_state(path, entry=None):
+    """
+    Classifies a configured link as "missing", "valid" or "invalid".
+
+    Args:
+        path (str): Path of the link
+        entry (os.DirEntry): Directory entry for the link if the caller has
+            one; without it the link is examined with lstat.
+    """
+    if entry is None:
+        if not os.path.islink(path):
+            return "invalid" if os.path.lexists(path) else "missing"
+    elif not entry.is_symlink():
+        return "invalid"
+    try:
+        return "valid" if os.readlink(path) == REAL_FILENAME else "invalid"
+    except OSError:
+        return "missing"
+
+
+def inspect_repo(repo_path, symlinks, overrides=None, tokens=None):
+    """
+    Inspects one repository for aidocs.md and its symlinks.
+
+    Args:
+        repo_path (str): Path to the repository root
+        symlinks (list): Link names that must point to aidocs.md. Names
+            inside subdirectories are checked with lstat.
+        overrides (callable): Called with repo_path if the repository has
+            its own configuration file; returns the link names to check
+            there instead of symlinks
+        tokens (callable): Called with the path and os.stat_result of
+            aidocs.md; returns its estimated tokens, e.g.
+            tokens.TokenCache.estimate
+
+    Returns:
+        dict: Result record with the keys
+        - path: the repository path
+        - compliant: whether nothing is missing or invalid
+        - missing_file: whether aidocs.md is missing (links are not checked then)
+        - missing_links: configured links that do not exist
+        - invalid_links: configured links that exist but do not point to aidocs.md
+        - tokens: estimated tokens of aidocs.md, only with tokens and if
+          aidocs.md exists (None if it cannot be read)
+        - error: why repo_path cannot be listed, only if it cannot, e.g.
+          because it does not exist or is not a directory; nothing else is
+          checked then
+    """
+    result = {
+        "path": repo_path,
+        "compliant": True,
+        "missing_file": False,
+        "missing_links": [],
+        "invalid_links": [],
+    }
+    wanted = set(symlinks)
+    wanted.add(REAL_FILENAME)
+    if overrides is not None:
+        wanted.add(PROJECT_CONFIG_FILE)
+    entries = {}
+    try:
+        with os.scandir(repo_path) as it:
+            for entry in it:
+                if entry.name in wanted:
+                    entries[entry.name] = entry
+    except OSError as e:
+        result["compliant"] = False
+        result["error"] = e.strerror or str(e)
+        return result
+
+    real_file = entries.get(REAL_FILENAME)
+    st = None
+    if real_file is not None and (real_file.is_symlink() or tokens is not None):
+        # Like os.path.exists, a dangling aidocs.md symlink counts as missing.
+        try:
+            st = os.stat(real_file.path)
+        except OSError:
+            real_file = None
+    if real_file is None:
+        result["compliant"] = False
+        result["missing_file"] = True
+        return result
+    if tokens is not None:
+        result["tokens"] = tokens(real_file.path, st)
+
+    if overrides is not None and PROJECT_CONFIG_FILE in entries:
+        symlinks = overrides(repo_path)
+
+    for link_name in symlinks:
+        if _is_nested(link_name) or link_name not in wanted:
+            state = _link_state(os.path.join(repo_path, link_name))
+        elif link_name in entries:
+            state = _link_state(entries[link_name].path, entries[link_name])
+        else:
+            state = "missing"
+        if state == "missing":
+            result["missing_links"].append(link_name)
+        elif state == "invalid":
+            result["invalid_links"].append(link_name)
+    result["compliant"] = not (result["missing_links"] or result["invalid_links"])
+    return result
+
+
+def check_repos(repo_paths, symlinks, jobs=1, count_syscalls=False, stats=None,
+                overrides=None, tokens=None):
+    """
+    Inspects repositories as they arrive from a discovery generator.
+
+    Args:
+        repo_paths (iterable): Repository paths, consumed lazily
+        symlinks (list): Link names that must point to aidocs.md
+        jobs (int): Number of repositories inspected concurrently
+        count_syscalls (bool): Add a "syscalls" count of the filesystem calls
+            made while inspecting each repository to its result
+        stats (stats.Stats): Collects inspection time and the number of
+            repositories when given
+        overrides (callable): Per-repository link names, see inspect_repo
+        tokens (callable): Token estimator, see inspect_repo
+
+    Yields:
+        dict: One inspect_repo result per repository, as soon as it is ready
+    """
+    def inspect(path):
+        return inspect_repo(path, symlinks, overrides, tokens)
+
+    if stats is not None:
+        inspect = stats.timed("inspection", inspect, counter="repos_found")
+    if not count_syscalls:
+        yield from imap_unordered(inspect, repo_paths, jobs)
+        return
+
+    with SyscallCounter() as counter:
+        def inspect_counted(path):
+            result, counts = counter.measure(inspect, path)
+            result["syscalls"] = sum(counts.values())
+            return result
+
+        yield from imap_unordered(inspect_counted, repo_paths, jobs)
@@ -0,0 +1,190 @@
+"""
+Layered, cached configuration.
+
+A repository's effective configuration is the global ~/.aidocs/config.json
+with the repository's optional .aidocs.json laid over it. In either file
+"symlinks" replaces the link names of the layer below and "extra_symlinks"
+adds to them, so a repository that also needs AGENTS.md only lists that one
+name. "template" names the template new aidocs.md files start from. The
+walk settings ("exclude", "gitignore") and "token_budget" are global only.
+
+Each file is parsed and validated once and cached under its path, mtime and
+size, so bulk runs and long-running processes stat a configuration file
+instead of parsing it again; an edited file is picked up by the next lookup.
+Invalid files raise ConfigError, and stay invalid until they change.
+Unknown keys are ignored in the global file and rejected in .aidocs.json.
+"""
+import json
+import os
+
+from .constants import PROJECT_CONFIG_FILE
+
+# Setting name: (expected type, allowed in a repository's .aidocs.json)
+SETTINGS = {
+    "symlinks": (list, True),
+    "extra_symlinks": (list, True),
+    "exclude": (list, False),
+    "gitignore": (bool, False),
+    "template": (str, True),
+    "token_budget": (int, False),
+}
+
+
+class ConfigError(ValueError):
+    """
+    Raised when a configuration file cannot be parsed or is invalid.
+    """
+
+
+def validate(data, source, project=False):
+    """
+    Checks the settings of one configuration file.
+
+    Args:
+        data: Parsed JSON content
+        source (str): File the content was read from, for error messages
+        project (bool): Whether it is a repository's .aidocs.json
+
+    Raises:
+        ConfigError: If a setting is misplaced or of the wrong type, or if
+            a repository's file has an unknown setting
+    """
+    if not isinstance(data, dict):
+        raise ConfigError(f"{source}: expected a JSON object")
+    for key, value in data.items():
+        if key not in SETTINGS:
+            if project:
+                raise ConfigError(f"{source}: unknown setting {key!r}")
+            # The global file has always been allowed other keys.
+            continue
+        expected, per_project = SETTINGS[key]
+        if project and not per_project:
+            raise ConfigError(f"{source}: {key!r} can only be set in the global configuration")
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ConfigError(f"{source}: {key!r} must be a {expected.__name__}")
+        if expected is int and value <= 0:
+            raise ConfigError(f"{source}: {key!r} must be positive")
+        if expected is list and not all(isinstance(item, str) and item for item in value):
+            raise ConfigError(f"{source}: {key!r} must list non-empty strings")
+        if key.endswith("symlinks"):
+            for name in value:
+                if os.path.isabs(name) or ".." in name.replace("\\", "/").split("/"):
+                    raise ConfigError(f"{source}: link {name!r} must stay inside the repository")
+
+
+def merge(base, override=None):
+    """
+    Lays one configuration over another.
+
+    Args:
+        base (dict): Lower layer
+        override (dict): Upper layer, or None
+
+    Returns:
+        dict: A new configuration whose "symlinks" already include any
+        "extra_symlinks", listed once each in order
+    """
+    config = dict(base)
+    if override:
+        config.update(override)
+        if "extra_symlinks" in override and "symlinks" not in override:
+            # The override's extra links add to the base's full list.
+            config["extra_symlinks"] = base.get("extra_symlinks", []) + override["extra_symlinks"]
+    symlinks = config.get("symlinks", []) + config.pop("extra_symlinks", [])
+    config["symlinks"] = list(dict.fromkeys(symlinks))
+    return config
+
+
+class ConfigCache:
+    """
+    Parsed configuration files and merged configurations, reused while the
+    files are unchanged.
+
+    Lookups are safe from several threads: a race can at worst parse a file
+    twice.
+    """
+
+    def __init__(self):
+        # Path: ((mtime_ns, size), parsed data or ConfigError)
+        self._files = {}
+        # Global file or repository path: (base, override, merged)
+        self._merged = {}
+
+    def load(self, path, project=False):
+        """
+        Returns the validated content of a configuration file.
+
+        Args:
+            path (str): File to read
+            project (bool): Whether it is a repository's .aidocs.json
+
+        Returns:
+            dict: The file's settings; the same object while the file is
+            unchanged, so callers must not modify it. None if project is
+            set and the file does not exist.
+
+        Raises:
+            ConfigError: If the file is invalid
+            OSError: If the global file cannot be read
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            if project:
+                return None
+            raise
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(path)
+        if cached is None or cached[0] != key:
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                validate(data, path, project)
+            except ValueError as e:
+                data = e if isinstance(e, ConfigError) else ConfigError(f"{path}: {e}")
+            cached = self._files[path] = (key, data)
+        if isinstance(cached[1], ConfigError):
+            raise cached[1]
+        return cached[1]
+
+    def _merge(self, key, base, override):
+        cached = self._merged.get(key)
+        if cached is not None and cached[0] is base and cached[1] is override:
+            return cached[2]
+        config = merge(base, override)
+        self._merged[key] = (base, override, config)
+        return config
+
+    def load_global(self, path):
+        """
+        Returns the global configuration, merged with nothing so its
+        "symlinks" include its "extra_symlinks"; the same object while the
+        file is unchanged.
+
+        Raises:
+            ConfigError: If the file is invalid
+            OSError: If the file cannot be read
+        """
+        return self._merge(path, self.load(path), None)
+
+    def effective(self, base, repo_path):
+        """
+        Returns a repository's effective configuration.
+
+        Args:
+            base (dict): Global configuration, as returned by merge
+            repo_path (str): Repository root
+
+        Returns:
+            dict: base, or base merged with the repository's .aidocs.json
+
+        Raises:
+            ConfigError: If the repository's .aidocs.json is invalid
+        """
+        override = self.load(os.path.join(repo_path, PROJECT_CONFIG_FILE), project=True)
+        if override is None:
+            return base
+        return self._merge(repo_path, base, override)
+
+
+CACHE = ConfigCache()
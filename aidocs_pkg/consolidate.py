@@ -0,0 +1,302 @@
+"""
+Crash-safe consolidation of AI documentation files into aidocs.md.
+
+The consolidated file is streamed chunk by chunk into a temporary file next to
+aidocs.md, flushed to disk and swapped in with os.replace, so at any moment
+either the old or the complete new aidocs.md is in place, and memory use does
+not depend on the size of the files. The source files are replaced by
+symlinks only after that, each with another atomic rename, so their content
+is never lost and never missing.
+
+Content that is already in aidocs.md is not appended again. Every section
+(the text before the first "--- Content from" marker, and the text after each
+marker) is identified by the SHA-256 of its content without leading and
+trailing whitespace, and the hashes are kept in a sidecar file under
+~/.aidocs/hashes/, named after the real path of aidocs.md, together with
+the size and mtime aidocs.md had when they were computed; like the locks,
+it lives outside the repository so consolidating adds no files to it. While those still match, deciding whether a file is a duplicate
+costs one stat of aidocs.md and one pass over the file itself; otherwise
+aidocs.md is scanned again and the sidecar rewritten.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+
+from .constants import HASHES_DIR
+
+CHUNK_SIZE = 1024 * 1024
+SIDECAR_VERSION = 1
+
+_WHITESPACE = b" \t\r\n"
+_MARKER = re.compile(rb"--- Content from (.+) ---\r?\n\Z")
+
+
+def section_header(name):
+    """
+    Returns the separator written before the content merged from a file.
+    """
+    return f"\n\n--- Content from {name} ---\n\n".encode("utf-8")
+
+
+class ContentHash:
+    """
+    SHA-256 of streamed content, ignoring leading and trailing whitespace.
+
+    Only the whitespace at the current end of the content is held back, so
+    memory use does not depend on the size of the content.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._started = False
+        self._pending = b""
+
+    def update(self, data):
+        if not self._started:
+            data = data.lstrip(_WHITESPACE)
+            if not data:
+                return
+            self._started = True
+        data = self._pending + data
+        stripped = data.rstrip(_WHITESPACE)
+        self._hash.update(stripped)
+        self._pending = data[len(stripped):]
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def file_hash(path):
+    """
+    Returns the ContentHash digest of a file, read in fixed-size chunks.
+    """
+    h = ContentHash()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def section_hashes(base):
+    """
+    Hashes the sections of a consolidated file.
+
+    Args:
+        base (str or bytes): Path of aidocs.md or a template, or the
+            content of a rendered template
+
+    Returns:
+        dict: Digest of each section's content, mapped to the name in the
+        section's marker (None for the text before the first marker). The
+        first section wins when two have the same content.
+    """
+    if isinstance(base, bytes):
+        return _section_hashes(io.BytesIO(base))
+    with open(base, "rb") as f:
+        return _section_hashes(f)
+
+
+def _section_hashes(f):
+    hashes = {}
+    name, h = None, ContentHash()
+    at_line_start = True
+    # Lines are read in bounded pieces; a marker is a short, whole line.
+    for piece in iter(lambda: f.readline(CHUNK_SIZE), b""):
+        match = _MARKER.match(piece) if at_line_start else None
+        if match:
+            hashes.setdefault(h.hexdigest(), name)
+            name, h = match.group(1).decode("utf-8", "replace"), ContentHash()
+        else:
+            h.update(piece)
+        at_line_start = piece.endswith(b"\n")
+    hashes.setdefault(h.hexdigest(), name)
+    return hashes
+
+
+def sidecar_path(real_file_path):
+    """
+    Returns the file holding the section hashes of a consolidated file.
+    """
+    target = os.path.realpath(real_file_path)
+    key = hashlib.sha1(target.encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(HASHES_DIR, f"{key}.json")
+
+
+def _stat_key(st):
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_sidecar(real_file_path):
+    """
+    Returns the recorded section hashes of aidocs.md, or None if there are
+    none or aidocs.md changed since they were recorded.
+    """
+    try:
+        with open(sidecar_path(real_file_path), "r") as f:
+            data = json.load(f)
+        if data.get("version") != SIDECAR_VERSION or \
+                data.get("stat") != _stat_key(os.stat(real_file_path)):
+            return None
+        return data["hashes"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def save_sidecar(real_file_path, hashes):
+    """
+    Atomically records the section hashes of aidocs.md with its current size
+    and mtime. The sidecar is only a cache, so failures are ignored.
+    """
+    try:
+        write_json_atomic(sidecar_path(real_file_path),
+                          {"version": SIDECAR_VERSION,
+                           "stat": _stat_key(os.stat(real_file_path)), "hashes": hashes})
+    except OSError:
+        pass
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def write_json_atomic(path, data):
+    """
+    Replaces a JSON file atomically, creating its directory if needed, so
+    concurrent readers see either the old or the new content.
+
+    Raises:
+        OSError: If the file cannot be written; it is left unchanged then
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # json.dumps uses the C encoder; json.dump to a file does not.
+        text = json.dumps(data, separators=(",", ":"))
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        _remove_quietly(tmp_path)
+        raise
+
+
+def _fsync_directory(path):
+    # Makes a rename in the directory durable. Directories cannot be opened
+    # on every platform; the rename itself is atomic regardless.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_consolidated(real_file_path, base, sources):
+    """
+    Atomically replaces aidocs.md with a base file followed by other files.
+
+    Args:
+        real_file_path (str): The aidocs.md to write. If it is a symlink,
+            the file it points to is replaced.
+        base (str or bytes): What the new content starts with: the path of
+            the current aidocs.md or of a template, or the content of a
+            rendered template
+        sources (list): (name, path) pairs appended in order, each after a
+            section_header(name)
+
+    Raises:
+        OSError: If a file cannot be read or written; aidocs.md and the
+            sources are left unchanged then
+    """
+    target = os.path.realpath(real_file_path)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as out:
+            if isinstance(base, bytes):
+                out.write(base)
+            else:
+                with open(base, "rb") as f:
+                    shutil.copyfileobj(f, out, CHUNK_SIZE)
+            for name, path in sources:
+                out.write(section_header(name))
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, CHUNK_SIZE)
+            out.flush()
+            os.fsync(out.fileno())
+        if os.path.exists(target):
+            shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    _fsync_directory(os.path.dirname(target))
+
+
+def replace_with_symlink(path, target):
+    """
+    Atomically replaces a file with a symlink to target.
+
+    Args:
+        path (str): File to replace; it may also not exist yet
+        target (str): Symlink target, relative to the link's directory
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _remove_quietly(tmp_path)
+    os.symlink(target, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+
+
+def merge_sources(real_file_path, base, sources):
+    """
+    Consolidates files into aidocs.md, skipping content it already holds.
+
+    Args:
+        real_file_path (str): The aidocs.md to write
+        base (str or bytes): The path of the current aidocs.md; for a new
+            one, the path of a template or the rendered template
+        sources (list): (name, path) pairs to append in order
+
+    Returns:
+        list: (name, duplicate_of) pairs for the sources that were not
+        appended; duplicate_of is the name of the source or section with the
+        same content, or None for the content before the first section
+
+    aidocs.md is only rewritten if something is appended to it or it does
+    not exist yet. Sources with the same content as an earlier source are
+    appended once.
+    """
+    existing = not isinstance(base, bytes) and os.path.exists(real_file_path) and \
+        os.path.realpath(base) == os.path.realpath(real_file_path)
+    hashes = load_sidecar(real_file_path) if existing else None
+    stale = hashes is None
+    if stale:
+        hashes = section_hashes(base)
+
+    appended, duplicates = [], []
+    for name, path in sources:
+        digest = file_hash(path)
+        if digest in hashes:
+            duplicates.append((name, hashes[digest]))
+        else:
+            hashes[digest] = name
+            appended.append((name, path))
+
+    if appended or not existing:
+        write_consolidated(real_file_path, base, appended)
+    if appended or stale:
+        save_sidecar(real_file_path, hashes)
+    return duplicates
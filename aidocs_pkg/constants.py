@@ -0,0 +1,68 @@
+"""
+Paths and defaults shared by the aidocs modules.
+"""
+import os
+
+AIDOCS_DIR = os.path.expanduser("~/.aidocs")
+CONFIG_FILE = os.path.join(AIDOCS_DIR, "config.json")
+TEMPLATE_FILE = os.path.join(AIDOCS_DIR, "template.md")
+# Named templates: <name>.md
+TEMPLATES_DIR = os.path.join(AIDOCS_DIR, "templates")
+# Detected tech stacks, one file per repository
+STACKS_DIR = os.path.join(AIDOCS_DIR, "stacks")
+INDEX_FILE = os.path.join(AIDOCS_DIR, "index.json")
+# Section hashes of consolidated aidocs.md files, one file per aidocs.md
+HASHES_DIR = os.path.join(AIDOCS_DIR, "hashes")
+# Full-text index of aidocs.md sections for `aidocs search`
+SEARCH_DB = os.path.join(AIDOCS_DIR, "search.db")
+# Token estimates of aidocs.md files, by content hash
+TOKENS_FILE = os.path.join(AIDOCS_DIR, "tokens.json")
+# Section hashes and template comparisons for `aidocs drift`
+DRIFT_FILE = os.path.join(AIDOCS_DIR, "drift.json")
+# Shared fragments for include directives: <name>.md
+FRAGMENTS_DIR = os.path.join(AIDOCS_DIR, "fragments")
+# Fragment hashes each aidocs.md was last built with, for `aidocs build`
+BUILD_FILE = os.path.join(AIDOCS_DIR, "build.json")
+LOCK_DIR = os.path.join(AIDOCS_DIR, "locks")
+SOCKET_FILE = os.path.join(AIDOCS_DIR, "aidocs.sock")
+REAL_FILENAME = "aidocs.md"
+# Per-repository configuration, laid over CONFIG_FILE
+PROJECT_CONFIG_FILE = ".aidocs.json"
+
+# Worker threads for directory listing and repository inspection.
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+DEFAULT_CONFIG = {
+    "symlinks": ["GEMINI.md", "CLAUDE.md"],
+    "exclude": ["node_modules", ".venv", "venv", "__pycache__", ".tox", "target", "build", "dist"],
+    "gitignore": False,
+    "token_budget": 8000
+}
+
+DEFAULT_TEMPLATE = """
+# AI Assistant Instructions: {{ project_name }}
+
+This file is the single source of truth for AI assistant context.
+It is symlinked to other files like GEMINI.md and CLAUDE.md.
+
+## Project Overview
+
+- Repository: {{ repo_path }}
+- Default branch: {{ default_branch }}
+- Main language: {{ language }}
+
+(TODO: Describe the project's purpose, goals, and key features.)
+
+## Tech Stack
+
+{{ tech_stack }}
+
+## Conventions & Style
+
+(TODO: Outline coding conventions, style guides, and architectural patterns.)
+
+## Getting Started
+
+(TODO: Provide instructions on how to set up the development environment.)
+
+"""
@@ -0,0 +1,229 @@
+"""
+Repository discovery for aidocs.
+
+Walks directory trees with os.scandir, reusing the type information cached on
+each DirEntry, and spreads the directory listings over a bounded pool of
+worker threads.
+"""
+import os
+import queue
+import threading
+import zlib
+
+
+def scan_directory(path, follow_symlinks=False):
+    """
+    Lists a single directory and classifies its entries.
+
+    Args:
+        path (str): Directory to scan
+        follow_symlinks (bool): Include symlinked directories in subdirs
+
+    Returns:
+        tuple: (is_repo, subdirs) where is_repo tells whether the directory
+        contains a .git entry and subdirs lists the child directories to
+        descend into. .git is a directory in ordinary clones and a file
+        naming the real git directory in worktrees and submodules; both
+        count. Symlinked directories are only descended into with
+        follow_symlinks, matching os.walk. Unreadable directories yield
+        (False, []).
+    """
+    is_repo = False
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.name == ".git":
+                        is_repo = entry.is_dir() or entry.is_file()
+                    elif entry.is_dir() and (follow_symlinks or not entry.is_symlink()):
+                        subdirs.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return is_repo, subdirs
+
+
+class VisitedSet:
+    """
+    Thread-safe set of the directories walked so far, by (st_dev, st_ino).
+
+    Sharing one set between the walks of several roots means overlapping
+    roots, bind mounts and symlinks (including symlink loops) never cause a
+    directory to be listed twice.
+    """
+
+    def __init__(self):
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def claim(self, st):
+        """
+        Records a directory's stat result.
+
+        Returns:
+            bool: True if the directory had not been claimed before
+        """
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+
+def stop_at_repos(visit):
+    """
+    Wraps a directory visitor so the walk does not descend into repositories.
+
+    Args:
+        visit (callable): Visitor with the signature of scan_directory
+
+    Returns:
+        callable: Visitor that reports no subdirectories for a repository
+        root, so only the directories above repositories and the
+        repository roots themselves are listed. The wrapped visitor still
+        sees the full listing, so a RepoIndex below it caches complete
+        entries.
+    """
+    def visit_outside_repos(path):
+        is_repo, subdirs = visit(path)
+        return is_repo, ([] if is_repo else subdirs)
+
+    return visit_outside_repos
+
+
+def shard_of(name, shards):
+    """
+    Assigns a top-level directory name to one of `shards` shards.
+
+    Returns:
+        int: Shard number from 1 to shards. The hash depends only on the
+        name, so every host computes the same split whatever the mount point.
+    """
+    return zlib.crc32(name.encode("utf-8", "surrogateescape")) % shards + 1
+
+
+def restrict_to_shard(visit, root, shard, shards):
+    """
+    Wraps a directory visitor so the walk only covers one shard of root.
+
+    Args:
+        visit (callable): Visitor with the signature of scan_directory
+        root (str): Search root, exactly as passed to walk
+        shard (int): Shard to keep, from 1 to shards
+        shards (int): Number of shards
+
+    Returns:
+        callable: Visitor that keeps only the top-level directories of root
+        assigned to shard. A repository at root itself belongs to shard 1.
+    """
+    def visit_shard(path):
+        is_repo, subdirs = visit(path)
+        if path != root:
+            return is_repo, subdirs
+        kept = [subdir for subdir in subdirs
+                if shard_of(os.path.basename(subdir), shards) == shard]
+        return is_repo and shard == 1, kept
+
+    return visit_shard
+
+
+def walk(root, visit, jobs=1):
+    """
+    Walks a directory tree, calling visit on every directory.
+
+    Args:
+        root (str): Directory to start from
+        visit (callable): Called with a directory path, returns a
+            (result, subdirs) tuple
+        jobs (int): Number of worker threads. With 1 the walk runs in the
+            calling thread in os.walk's top-down order.
+
+    Yields:
+        tuple: (path, result) for every visited directory. With more than one
+        job the order depends on which listings finish first.
+    """
+    if jobs <= 1:
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            result, subdirs = visit(path)
+            yield path, result
+            stack.extend(reversed(subdirs))
+        return
+
+    # LIFO keeps the frontier close to depth-first, which bounds its size.
+    work = queue.LifoQueue()
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def worker():
+        while True:
+            path = work.get()
+            if path is None or stop.is_set():
+                return
+            try:
+                results.put((path, visit(path), None))
+            except BaseException as exc:
+                results.put((path, None, exc))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+
+    work.put(root)
+    outstanding = 1
+    try:
+        while outstanding:
+            path, outcome, error = results.get()
+            outstanding -= 1
+            if error is not None:
+                raise error
+            result, subdirs = outcome
+            yield path, result
+            for subdir in subdirs:
+                work.put(subdir)
+                outstanding += 1
+    finally:
+        stop.set()
+        for _ in threads:
+            work.put(None)
+
+
+def read_repo_list(stream):
+    """
+    Reads repository paths listed one per line, instead of discovering them.
+
+    Args:
+        stream (file): Text stream, e.g. an open list file or sys.stdin
+
+    Yields:
+        str: Each non-blank line without its line ending. The stream is read
+        line by line, so arbitrarily long lists and live pipes work.
+    """
+    for line in stream:
+        path = line.rstrip("\r\n")
+        if path:
+            yield path
+
+
+def find_repos(search_path, jobs=1, visit=scan_directory):
+    """
+    Finds git repositories below a search path.
+
+    Args:
+        search_path (str): Path to recursively search for git repositories
+        jobs (int): Number of directories listed concurrently
+        visit (callable): Directory lister with the signature of
+            scan_directory, e.g. RepoIndex.visit to reuse cached listings
+
+    Yields:
+        str: Path of each directory that contains a .git directory, as soon
+        as it is found. The set of repositories is the same as an os.walk
+        based search; only the order differs when jobs > 1.
+    """
+    for path, is_repo in walk(search_path, visit, jobs):
+        if is_repo:
+            yield path
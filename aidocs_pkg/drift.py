@@ -0,0 +1,321 @@
+"""
+Template drift: how far each aidocs.md has moved from its template.
+
+A template and each aidocs.md are split into sections (see sections.py),
+and every section of the template is looked up in the file by heading. It is
+"stock" if the file's section still matches the current template, "outdated"
+if it matches an earlier version of the template, "modified" if it matches
+neither and "missing" if the file has no section with that heading.
+Template variables match any text within a paragraph, so rendered values
+such as the project name do not count as changes. Sections still holding a
+"(TODO: ...)" placeholder are reported as well.
+
+Work is shared through a content-addressed cache in ~/.aidocs/drift.json:
+each file's section hashes are kept under its mtime and size, and each
+verdict under the hashes of the template and of the section, so an
+unchanged file costs one stat and a section shared by many repositories,
+like untouched boilerplate, is compared with the template once.
+
+Every version of a template that init rendered or drift compared with is
+kept as <sha256>.md in a .versions directory next to the template, so the
+sections copied from it can be recognized after the template changes.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+from .consolidate import write_json_atomic
+from .constants import REAL_FILENAME
+from .sections import body_hash, normalize, split_sections
+from .templates import TemplateError
+
+CACHE_VERSION = 1
+STATUSES = ("stock", "modified", "outdated", "missing")
+VERSIONS_DIR = ".versions"
+
+_PLACEHOLDER = re.compile(r"\{\{\s*[A-Za-z_][A-Za-z0-9_]*\s*\}\}")
+_TODO = "(TODO:"
+# What a variable matches: any text that does not start a new paragraph.
+_VALUE = r"(?:(?!\n[ \t]*\n)[\s\S])*?"
+
+
+def _heading_key(heading):
+    return " ".join(heading.lower().split())
+
+
+def _pattern(text, value):
+    return re.compile(value.join(re.escape(part) for part in _PLACEHOLDER.split(text)))
+
+
+class TemplateVersion:
+    """
+    The sections of one version of a template, compiled for matching.
+
+    Args:
+        text (str): Template source
+
+    Attributes:
+        digest (str): SHA-256 of the source
+        sections (list): (heading, heading pattern, body pattern) tuples in
+            template order; heading is the template's own text, variables
+            included
+    """
+
+    __slots__ = ("digest", "sections")
+
+    def __init__(self, text):
+        self.digest = hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+        self.sections = [(heading, _pattern(_heading_key(heading), ".+?"),
+                          _pattern(normalize(body), _VALUE))
+                         for heading, _, body in split_sections(text)]
+
+    def matches(self, heading, body):
+        """
+        Returns whether a section, with its body normalized, is one of this
+        version's sections.
+        """
+        key = _heading_key(heading)
+        return any(heading_pattern.fullmatch(key) and body_pattern.fullmatch(body)
+                   for _, heading_pattern, body_pattern in self.sections)
+
+
+def _versions_dir(template_path):
+    return os.path.join(os.path.dirname(template_path), VERSIONS_DIR)
+
+
+def _store_version(versions_dir, digest, text):
+    path = os.path.join(versions_dir, f"{digest}.md")
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(versions_dir, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Without it, sections of this version will count as modified once
+        # the template changes; nothing else depends on it.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _stored_versions(versions_dir):
+    try:
+        names = os.listdir(versions_dir)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(".md"):
+            continue
+        try:
+            with open(os.path.join(versions_dir, name), "r", encoding="utf-8",
+                      errors="surrogateescape") as f:
+                yield name[:-len(".md")], f.read()
+        except OSError:
+            continue
+
+
+# Template path: (mtime_ns, size) of the version last remembered
+_remembered = {}
+
+
+def remember_template(path):
+    """
+    Stores the current version of a template, if it is new, so that drift
+    reports can tell sections copied from it as "outdated" once the
+    template changes. Called by init whenever it renders a template; a
+    template that is unchanged since the last call costs one stat.
+
+    Args:
+        path (str): Template file
+    """
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        if _remembered.get(path) == key:
+            return
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+            text = f.read()
+    except OSError:
+        return
+    digest = hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+    _store_version(_versions_dir(path), digest, text)
+    _remembered[path] = key
+
+
+def _parse(path):
+    """
+    Reads a file's sections.
+
+    Returns:
+        tuple: (stat key, [[heading, body hash, todo], ...], {body hash:
+        normalized body}), or None if the file cannot be read
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+            st = os.fstat(f.fileno())
+            text = f.read()
+    except OSError:
+        return None
+    sections, bodies = [], {}
+    for heading, _, body in split_sections(text):
+        digest = body_hash(body)
+        sections.append([heading, digest, _TODO in body])
+        bodies[digest] = normalize(body)
+    return [st.st_mtime_ns, st.st_size], sections, bodies
+
+
+class DriftCache:
+    """
+    Compares files with templates, sharing the work through the cache.
+
+    Args:
+        path (str): Cache file; read now, written by save
+
+    drift may be called from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # File path: [mtime_ns, size, [[heading, body hash, todo], ...]]
+        self._files = {}
+        # Template digest: {"<section index>:<body hash>": status}
+        self._verdicts = {}
+        # Template path: (current TemplateVersion, earlier TemplateVersions)
+        self._compiled = {}
+        # Versions directory: {digest: TemplateVersion} of the versions in it
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self._files = data["files"]
+                self._verdicts = data["verdicts"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    def template(self, path):
+        """
+        Returns the compiled current version of a template and the earlier
+        versions stored next to it, remembering the current one if it is
+        new. Each template is read once per cache.
+
+        Raises:
+            TemplateError: If the template does not exist
+            OSError: If the template cannot be read
+        """
+        with self._lock:
+            compiled = self._compiled.get(path)
+            if compiled is not None:
+                return compiled
+            try:
+                with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                raise TemplateError(f"template not found: {path}")
+            current = TemplateVersion(text)
+            versions_dir = _versions_dir(path)
+            _store_version(versions_dir, current.digest, text)
+            versions = self._versions.get(versions_dir)
+            if versions is None:
+                versions = self._versions[versions_dir] = {
+                    digest: TemplateVersion(old) for digest, old in _stored_versions(versions_dir)}
+            earlier = [version for digest, version in versions.items()
+                       if digest != current.digest]
+            compiled = self._compiled[path] = (current, earlier)
+            return compiled
+
+    def drift(self, repo_path, template_path):
+        """
+        Compares a repository's aidocs.md with a template.
+
+        Returns:
+            dict: Record with the keys
+            - path: the repository
+            - template: the template file
+            - sections: [template heading, status] per template section
+            - todo: headings of the file's sections holding "(TODO:"
+            or None if the repository has no readable aidocs.md
+
+        Raises:
+            TemplateError: If the template does not exist
+            OSError: If the template cannot be read
+        """
+        current, earlier = self.template(template_path)
+        path = os.path.join(repo_path, REAL_FILENAME)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        known = self._files.get(path)
+        bodies = None
+        if known is None or known[0] != st.st_mtime_ns or known[1] != st.st_size:
+            parsed = self._reparse(path)
+            if parsed is None:
+                return None
+            known, bodies = parsed
+
+        verdicts = self._verdicts.setdefault(current.digest, {})
+        statuses = []
+        for index, (heading, heading_pattern, body_pattern) in enumerate(current.sections):
+            section = next((section for section in known[2]
+                            if heading_pattern.fullmatch(_heading_key(section[0]))), None)
+            if section is None:
+                statuses.append([heading, "missing"])
+                continue
+            key = f"{index}:{section[1]}"
+            status = verdicts.get(key)
+            if status is None:
+                if bodies is None or section[1] not in bodies:
+                    # Classified against an earlier template; read it again.
+                    parsed = self._reparse(path)
+                    if parsed is None:
+                        return None
+                    known, bodies = parsed
+                body = bodies.get(section[1])
+                if body is not None and body_pattern.fullmatch(body):
+                    status = "stock"
+                elif body is not None and any(version.matches(section[0], body)
+                                              for version in earlier):
+                    status = "outdated"
+                else:
+                    status = "modified"
+                if body is not None:
+                    verdicts[key] = status
+                    self._dirty = True
+            statuses.append([heading, status])
+        return {"path": repo_path, "template": template_path, "sections": statuses,
+                "todo": [section[0] for section in known[2] if section[2]]}
+
+    def _reparse(self, path):
+        parsed = _parse(path)
+        if parsed is None:
+            return None
+        stat_key, sections, bodies = parsed
+        known = self._files[path] = stat_key + [sections]
+        self._dirty = True
+        return known, bodies
+
+    def save(self):
+        """
+        Writes the cache if anything changed, keeping only the verdicts
+        against the templates used. If the write fails, the next run
+        compares the files again.
+        """
+        if not self._dirty:
+            return
+        used = set(compiled[0].digest for compiled in self._compiled.values())
+        verdicts = {digest: value for digest, value in self._verdicts.items() if digest in used}
+        try:
+            write_json_atomic(self.path, {"version": CACHE_VERSION, "files": self._files,
+                                          "verdicts": verdicts})
+        except OSError:
+            pass
+        self._dirty = False
@@ -0,0 +1,130 @@
+"""
+Bulk remediation of non-compliant repositories.
+
+Runs the init logic on many repositories in a pool of worker processes. Each
+repository is guarded by an exclusive file lock so that concurrent runs never
+consolidate or relink the same repository at the same time.
+"""
+import multiprocessing
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .compliance import inspect_repo
+from .config import CACHE, ConfigError
+from .constants import REAL_FILENAME
+from .locks import RepoLocked
+from .parallel import imap_unordered
+from .templates import TemplateError
+
+
+def plan_fix(repo_path, symlinks):
+    """
+    Describes what init would change in a repository, without changing it.
+
+    Args:
+        repo_path (str): Repository to examine
+        symlinks (list): Configured link names
+
+    Returns:
+        list: Human-readable descriptions of the planned actions
+    """
+    actions = []
+    if not os.path.exists(os.path.join(repo_path, REAL_FILENAME)):
+        actions.append(f"create {REAL_FILENAME} from the template")
+    for link_name in symlinks:
+        try:
+            mode = os.lstat(os.path.join(repo_path, link_name)).st_mode
+        except FileNotFoundError:
+            actions.append(f"create symlink {link_name} -> {REAL_FILENAME}")
+            continue
+        if stat.S_ISLNK(mode):
+            if os.readlink(os.path.join(repo_path, link_name)) != REAL_FILENAME:
+                actions.append(f"leave {link_name}: it is a symlink to another file")
+        elif stat.S_ISREG(mode):
+            actions.append(f"merge {link_name} into {REAL_FILENAME} and replace it with a symlink")
+        else:
+            actions.append(f"leave {link_name}: it is not a regular file")
+    return actions
+
+
+def fix_repo(repo_path, config, lock_dir, dry_run=False, template=None):
+    """
+    Brings one repository into compliance.
+
+    Args:
+        repo_path (str): Repository to fix
+        config (dict): Global configuration; the repository's .aidocs.json,
+            if any, is laid over it
+        lock_dir (str): Directory holding the per-repository lock files
+        dry_run (bool): Only report the planned actions
+        template (str): Name of the template for a new aidocs.md, see
+            api.init
+
+    Returns:
+        dict: Fix record with the keys path, status ("fixed", "failed",
+        "locked" or "planned"), actions (dry runs only), deduplicated (the
+        files not merged because aidocs.md already held their content) and
+        error
+    """
+    record = {"path": repo_path, "status": "planned", "actions": [], "deduplicated": [],
+              "error": None}
+    try:
+        symlinks = CACHE.effective(config, repo_path).get("symlinks", [])
+    except (OSError, ConfigError) as e:
+        record.update(status="failed", error=str(e))
+        return record
+    if dry_run:
+        record["actions"] = plan_fix(repo_path, symlinks)
+        return record
+
+    from .api import init
+
+    try:
+        outcome = init(repo_path, config, template, lock_dir=lock_dir)
+        result = inspect_repo(repo_path, symlinks)
+    except RepoLocked as e:
+        record.update(status="locked", error=str(e))
+        return record
+    except (OSError, UnicodeDecodeError, ConfigError, TemplateError) as e:
+        record.update(status="failed", error=str(e))
+        return record
+
+    record["deduplicated"] = [name for name, _ in outcome.deduplicated]
+    if result["compliant"]:
+        record["status"] = "fixed"
+    else:
+        problems = result["missing_links"] + result["invalid_links"]
+        record.update(status="failed", error=f"still not compliant: {', '.join(problems)}")
+    return record
+
+
+def fix_repos(repo_paths, config, lock_dir, jobs=None, dry_run=False, template=None):
+    """
+    Fixes many repositories in a pool of worker processes.
+
+    Args:
+        repo_paths (iterable): Repositories to fix, consumed lazily
+        config (dict): Parsed global configuration, passed to the workers
+            instead of being re-read from disk for every repository
+        lock_dir (str): Directory holding the per-repository lock files
+        jobs (int): Number of worker processes, os.cpu_count() by default
+        dry_run (bool): Only report the planned actions
+        template (str): Name of the template for new aidocs.md files
+
+    Yields:
+        dict: One fix_repo record per repository, as each one completes
+    """
+    jobs = jobs or os.cpu_count() or 1
+    worker = partial(fix_repo, config=config, lock_dir=lock_dir, dry_run=dry_run,
+                     template=template)
+    if dry_run:
+        # Dry runs only read a few inodes per repository; threads are enough.
+        executor_class = None
+    else:
+        # Discovery threads may still be running, so avoid plain fork().
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        executor_class = partial(ProcessPoolExecutor, mp_context=context)
+    return imap_unordered(worker, repo_paths, jobs, executor_class=executor_class)
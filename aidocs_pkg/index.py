@@ -0,0 +1,129 @@
+"""
+Persistent repository index for aidocs.
+
+Remembers, for every directory visited during discovery, its mtime, whether it
+is a repository and which subdirectories it has. A directory's mtime changes
+whenever entries are added, removed or renamed inside it, so a later walk only
+needs to stat an unchanged directory instead of listing it again.
+"""
+import json
+import os
+import time
+
+from .consolidate import write_json_atomic
+from .discovery import scan_directory
+
+# Version 2: a .git file (worktree, submodule) marks a repository too.
+INDEX_VERSION = 2
+
+# Directories modified this recently are not cached: a change made within the
+# same mtime tick as the scan would otherwise go unnoticed on the next run.
+RACY_WINDOW_NS = 2 * 10**9
+
+
+class RepoIndex:
+    """
+    Directory listings cached between runs of `aidocs check`.
+
+    Args:
+        index_file (str): JSON file the index is stored in
+        root (str): Search path the index entries belong to
+        full (bool): Ignore cached listings and list every directory again
+        follow_symlinks (bool): Descend into symlinked directories. Listings
+            made this way are cached separately.
+        visited (discovery.VisitedSet): Directories already walked in this
+            run; a directory whose (st_dev, st_ino) is already in the set is
+            reported as empty, so no directory is walked twice
+        shard (tuple): (shard, shards) when only one shard of each root is
+            walked; every shard keeps its own entries
+
+    The instance's visit method is a drop-in replacement for
+    discovery.scan_directory. Only directories seen during the current walk
+    are kept when the index is saved, so deleted trees drop out of it.
+    Several roots can be walked one after another with select_root; the
+    index file is still read and written once.
+    """
+
+    def __init__(self, index_file, root, full=False, follow_symlinks=False, visited=None,
+                 shard=None):
+        self.index_file = index_file
+        self.full = full
+        self.follow_symlinks = follow_symlinks
+        self.visited = visited
+        self.rescanned = 0
+        self.reused = 0
+        self._section = "followed_roots" if follow_symlinks else "roots"
+        self._key_suffix = "" if shard is None else " [shard %d/%d]" % shard
+        self._seen_by_key = {}
+        self._racy_cutoff = time.time_ns() - RACY_WINDOW_NS
+        self._data = self._load()
+        self.select_root(root)
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                data.setdefault(self._section, {})
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, self._section: {}}
+
+    def select_root(self, root):
+        """
+        Makes root the search path that following visits belong to.
+        """
+        self.root = root
+        self.key = os.path.abspath(root) + self._key_suffix
+        self._cached = {} if self.full else self._data[self._section].get(self.key, {})
+        self._seen = self._seen_by_key.setdefault(self.key, {})
+
+    def visit(self, path):
+        """
+        Lists a directory, reusing the cached listing if its mtime is unchanged.
+
+        Args:
+            path (str): Directory below (or equal to) the index root
+
+        Returns:
+            tuple: (is_repo, subdirs), as returned by scan_directory
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False, []
+        if self.visited is not None and not self.visited.claim(st):
+            return False, []
+        mtime = st.st_mtime_ns
+        rel = path[len(self.root):]
+        entry = self._cached.get(rel)
+        if entry is not None and entry[0] == mtime:
+            self.reused += 1
+            is_repo, names = entry[1], entry[2]
+            subdirs = [os.path.join(path, name) for name in names]
+        else:
+            self.rescanned += 1
+            is_repo, subdirs = scan_directory(path, self.follow_symlinks)
+            names = [os.path.basename(subdir) for subdir in subdirs]
+        if mtime < self._racy_cutoff:
+            self._seen[rel] = [mtime, is_repo, names]
+        return is_repo, subdirs
+
+    def save(self):
+        """
+        Writes the directories seen during this walk back to the index file.
+
+        The file is replaced atomically, so concurrent runs never observe a
+        partially written index. Nothing is written when the walk found the
+        index already up to date. Roots of which no directory was walked,
+        e.g. because another root of the same run already covered them,
+        keep their entries.
+        """
+        roots = self._data[self._section]
+        changed = {key: seen for key, seen in self._seen_by_key.items()
+                   if seen and roots.get(key) != seen}
+        if not changed:
+            return
+        roots.update(changed)
+        write_json_atomic(self.index_file, self._data)
@@ -0,0 +1,51 @@
+"""
+Per-repository locks shared by every command that rewrites aidocs.md.
+
+Kept apart from fix.py so that commands working on one repository can take
+a lock without importing the process pool machinery.
+"""
+import contextlib
+import hashlib
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class RepoLocked(Exception):
+    """
+    Raised when another aidocs process holds the lock for a repository.
+    """
+
+
+@contextlib.contextmanager
+def lock_repo(repo_path, lock_dir):
+    """
+    Holds an exclusive, non-blocking lock on a repository.
+
+    Args:
+        repo_path (str): Repository to lock
+        lock_dir (str): Directory holding the lock files. Locks live outside
+            the repository so that locking never adds files to it.
+
+    Raises:
+        RepoLocked: If the repository is already locked
+    """
+    os.makedirs(lock_dir, exist_ok=True)
+    key = hashlib.sha1(os.path.realpath(repo_path).encode("utf-8")).hexdigest()
+    fd = os.open(os.path.join(lock_dir, f"{key}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            raise RepoLocked(f"{repo_path} is locked by another aidocs process")
+        yield
+    finally:
+        # Closing the descriptor releases the lock.
+        os.close(fd)
@@ -1,41 +1,42 @@
 #!/usr/bin/env python3
 import os
-import json
 import sys
-import subprocess
 
-AIDOCS_DIR = os.path.expanduser("~/.aidocs")
-CONFIG_FILE = os.path.join(AIDOCS_DIR, "config.json")
-TEMPLATE_FILE = os.path.join(AIDOCS_DIR, "template.md")
-REAL_FILENAME = "aidocs.md"
+# Only what every command needs is imported here. The modules behind each
+# command (and json, subprocess, threads, sockets) are imported by the
+# functions that use them, so that `aidocs help` and small checks do not pay
+# for commands they never run; tests/test_startup.py enforces this.
+from .constants import (
+    AIDOCS_DIR,
+    CONFIG_FILE,
+    TEMPLATE_FILE,
+    LOCK_DIR,
+    SOCKET_FILE,
+    REAL_FILENAME,
+    DEFAULT_CONFIG,
+    DEFAULT_JOBS,
+    DEFAULT_TEMPLATE,
+)
+from . import stats
 
-DEFAULT_CONFIG = {
-    "symlinks": ["GEMINI.md", "CLAUDE.md"]
-}
-
-DEFAULT_TEMPLATE = """
-# AI Assistant Instructions
-
-This file is the single source of truth for AI assistant context.
-It is symlinked to other files like GEMINI.md and CLAUDE.md.
-
-## Project Overview
-
-(TODO: Describe the project's purpose, goals, and key features.)
-
-## Tech Stack
-
-(TODO: List the main technologies, frameworks, and libraries used.)
-
-## Conventions & Style
-
-(TODO: Outline coding conventions, style guides, and architectural patterns.)
-
-## Getting Started
-
-(TODO: Provide instructions on how to set up the development environment.)
+def load_config():
+    """
+    Reads the global configuration, exiting with an error message if it is
+    missing or invalid.
+    
+    Returns:
+        dict: The configuration, see api.load_config
+    """
+    from . import api
+    from .config import ConfigError
 
-"""
+    try:
+        return api.load_config()
+    except FileNotFoundError:
+        print(f"Error: {CONFIG_FILE} not found. Please run 'aidocs setup' first.")
+    except (OSError, ConfigError) as e:
+        print(f"Error: invalid configuration: {e}")
+    sys.exit(1)
 
 def setup():
     """
@@ -48,113 +49,77 @@ def setup():
     - config.json: Contains symlink configuration
     - template.md: Default template for new aidocs.md files
     """
-    print(f"Ensuring configuration directory exists at {AIDOCS_DIR}...")
-    os.makedirs(AIDOCS_DIR, exist_ok=True)
+    from . import api
 
-    if not os.path.exists(CONFIG_FILE):
-        print(f"Creating default config file at {CONFIG_FILE}...")
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(DEFAULT_CONFIG, f, indent=4)
-    else:
-        print(f"Config file already exists at {CONFIG_FILE}.")
+    print(f"Ensuring configuration directory exists at {AIDOCS_DIR}...")
+    created = api.setup()
 
-    if not os.path.exists(TEMPLATE_FILE):
-        print(f"Creating default template file at {TEMPLATE_FILE}...")
-        with open(TEMPLATE_FILE, "w") as f:
-            f.write(DEFAULT_TEMPLATE)
-    else:
-        print(f"Template file already exists at {TEMPLATE_FILE}.")
+    for path, what in ((CONFIG_FILE, "config"), (TEMPLATE_FILE, "template")):
+        if path in created:
+            print(f"Creating default {what} file at {path}...")
+        else:
+            print(f"{what.capitalize()} file already exists at {path}.")
     print("\nSetup complete. You can edit the master template at:")
     print(TEMPLATE_FILE)
 
-def init(project_path):
+def init(project_path, config=None, template=None):
     """
-    Initializes a project with aidocs.md and symlinks.
+    Initializes a project with aidocs.md and symlinks, narrating each step.
     
     Args:
         project_path (str): Path to the project directory to initialize
+        config (dict): Parsed global configuration. Read from CONFIG_FILE
+            when omitted.
+        template (str): Name of the template in ~/.aidocs/templates/ to
+            render a new aidocs.md from
         
-    Creates or updates the aidocs.md file in the specified project directory,
-    consolidates content from existing AI documentation files, and creates
-    symlinks as specified in the global configuration.
-    
-    Process:
-    1. Checks for existing AI documentation files (CLAUDE.md, GEMINI.md, etc.)
-    2. Consolidates their content into aidocs.md
-    3. Removes the original files
-    4. Creates symlinks pointing to aidocs.md
+    Returns:
+        api.InitResult: What was merged, skipped and linked
+        
+    See api.init for how existing AI documentation files are consolidated
+    into aidocs.md and replaced by symlinks.
     """
+    from . import api
+    from .config import ConfigError
+    from .locks import RepoLocked
+    from .templates import TemplateError
+
     print(f"Initializing aidocs in {project_path}...")
+    if config is None:
+        config = load_config()
+    try:
+        result = api.init(project_path, config, template)
+    except RepoLocked as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except ConfigError as e:
+        print(f"Error: invalid configuration: {e}")
+        sys.exit(1)
+    except TemplateError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-    # Create the real file
-    real_file_path = os.path.join(project_path, REAL_FILENAME)
-    
-    # Collect content from existing symlinked files
-    combined_content = ""
-    files_to_delete = []
-    
-    
-    with open(CONFIG_FILE, "r") as f:
-        config = json.load(f)
-    symlinks_to_check = config.get("symlinks", [])
-
-    for link_name in symlinks_to_check:
-        full_link_path = os.path.join(project_path, link_name)
-        if os.path.exists(full_link_path) and not os.path.islink(full_link_path):
-            print(f"Found existing file {link_name}. Incorporating its content.")
-            
-            with open(full_link_path, "r") as f_old:
-                combined_content += f"\n\n--- Content from {link_name} ---\n\n"
-                combined_content += f_old.read()
-            files_to_delete.append(full_link_path)
-
-    initial_content = ""
-    if os.path.exists(real_file_path):
-        print(f"{REAL_FILENAME} already exists. Appending content if necessary.")
-        
-        with open(real_file_path, "r") as f_real:
-            initial_content = f_real.read()
+    for link_name in result.sources:
+        print(f"Found existing file {link_name}. Incorporating its content.")
+    if result.created:
+        print(f"Creating {REAL_FILENAME} from {result.template}...")
     else:
-        print(f"Creating {REAL_FILENAME}...")
-        
-        with open(TEMPLATE_FILE, "r") as f_template:
-            initial_content = f_template.read()
-
-    final_content = initial_content
-    if combined_content:
-        final_content += combined_content
-
-    
-    with open(real_file_path, "w") as f_real:
-        f_real.write(final_content)
-
-    # Delete old files after content has been incorporated
-    for file_path in files_to_delete:
-        print(f"Deleting old file: {file_path}")
-        os.remove(file_path)
-
-    # Create the symlinks
-    with open(CONFIG_FILE, "r") as f:
-        config = json.load(f)
-    
-    symlinks_to_create = config.get("symlinks", [])
-    
-    original_cwd = os.getcwd()
-    try:
-        os.chdir(project_path)
-        for link_name in symlinks_to_create:
-            if os.path.lexists(link_name):
-                if os.path.islink(link_name) and os.readlink(link_name) == REAL_FILENAME:
-                    print(f"Symlink {link_name} already exists and is correct.")
-                else:
-                    print(f"Warning: {link_name} already exists but is not the correct symlink. Please remove it and run init again.")
-            else:
-                print(f"Creating symlink: {link_name} -> {REAL_FILENAME}")
-                os.symlink(REAL_FILENAME, link_name)
-    finally:
-        os.chdir(original_cwd)
+        print(f"{REAL_FILENAME} already exists. Appending content if necessary.")
+    for link_name, duplicate_of in result.deduplicated:
+        where = f"merged from {duplicate_of}" if duplicate_of else "before the first merged file"
+        print(f"Skipped {link_name}: its content is already in {REAL_FILENAME} ({where}).")
+    for link_name, action in result.links:
+        if action == "replaced":
+            print(f"Replacing old file {link_name} with a symlink to {REAL_FILENAME}")
+        elif action == "exists":
+            print(f"Symlink {link_name} already exists and is correct.")
+        elif action == "conflict":
+            print(f"Warning: {link_name} already exists but is not the correct symlink. Please remove it and run init again.")
+        else:
+            print(f"Creating symlink: {link_name} -> {REAL_FILENAME}")
     
     print("\nInitialization complete.")
+    return result
 
 def edit(project_path):
     """
@@ -171,6 +136,8 @@ def edit(project_path):
     Raises:
         SystemExit: If aidocs.md doesn't exist or no editor is found
     """
+    import subprocess
+
     real_file_path = os.path.join(project_path, REAL_FILENAME)
     if not os.path.exists(real_file_path):
         print(f"Error: {REAL_FILENAME} not found in {project_path}.")
@@ -210,65 +177,577 @@ def edit(project_path):
     # print("Notifying other tools...")
     # subprocess.run(["gemini-cli", "--refresh-context", project_path])
 
-def check(search_path):
+def listed_repos(repos_from):
+    """
+    Yields the repositories listed in a file, one per line.
+    
+    Args:
+        repos_from (str): Path of the list file, or "-" for stdin
+        
+    The list is read lazily, so the inspection of the first repositories
+    overlaps with reading the rest, and memory use does not depend on the
+    length of the list.
+    """
+    from .discovery import read_repo_list
+
+    if repos_from == "-":
+        yield from read_repo_list(sys.stdin)
+        return
+    with open(repos_from, "r", errors="surrogateescape") as f:
+        yield from read_repo_list(f)
+
+def check(search_paths, jobs=DEFAULT_JOBS, full=False, output_format="text",
+          fix=False, dry_run=False, count_syscalls=False, gitignore=False, max_depth=None,
+          nested=False, follow_symlinks=False, shard=None, repos_from=None):
     """
     Checks for aidocs.md and correct symlinks in git repositories.
     
     Args:
-        search_path (str): Path to recursively search for git repositories
+        search_paths (list): Paths to recursively search for git
+            repositories; a single path may be given as a string
+        jobs (int): Number of directories listed and repositories inspected
+            concurrently
+        full (bool): Ignore the repository index and list every directory
+            again instead of only those whose mtime changed
+        output_format (str): "text", "json" or "jsonl"
+        fix (bool): Run init on every non-compliant repository afterwards
+        dry_run (bool): With fix, only report what would be changed
+        count_syscalls (bool): Report the filesystem calls each repository
+            inspection makes
+        gitignore (bool): Do not descend into directories ignored by a
+            repository's .gitignore files, in addition to the "gitignore"
+            setting of the configuration
+        max_depth (int): Do not descend more than this many levels below
+            a search path
+        nested (bool): Also look for repositories inside repositories
+        follow_symlinks (bool): Descend into symlinked directories; each
+            directory is still walked only once
+        shard (tuple): (K, N) to check only the K-th of N disjoint slices,
+            e.g. one per CI runner; see `aidocs report merge`
+        repos_from (str): Instead of searching, check the repositories
+            listed one per line in this file, or on stdin for "-"; the
+            search and walk options are ignored then
         
-    Recursively searches the specified path for git repositories and reports:
+    Returns:
+        bool: True if every repository found is compliant or, with fix,
+        if every non-compliant repository was fixed; False if a path could
+        not be read
+        
+    Recursively searches the specified paths for git repositories and reports:
     - Missing aidocs.md files
     - Missing symlinks (as defined in configuration)
     - Invalid symlinks (not pointing to aidocs.md)
     
-    Provides a compliance report showing which repositories need attention.
+    Each repository is inspected and reported as soon as discovery finds it,
+    so output starts immediately and memory use stays flat however many
+    repositories there are. The report ends with a summary record.
     """
-    print(f"Searching for git repositories in {search_path}...")
+    from . import api
+    from .report import render
 
-    with open(CONFIG_FILE, "r") as f:
-        config = json.load(f)
-    symlinks_to_check = config.get("symlinks", [])
+    if isinstance(search_paths, str):
+        search_paths = [search_paths]
+    if output_format == "text":
+        if repos_from is not None:
+            source = "stdin" if repos_from == "-" else repos_from
+            print(f"Checking git repositories listed in {source}...")
+        else:
+            print(f"Searching for git repositories in {', '.join(search_paths)}...")
 
-    found_repos = []
-    for root, dirs, files in os.walk(search_path):
-        if ".git" in dirs:
-            found_repos.append(root)
-            dirs.remove(".git")
+    config = load_config()
+    repos = listed_repos(repos_from) if repos_from is not None else None
+    statuses = api.check(search_paths, jobs, full, config, gitignore=gitignore,
+                         max_depth=max_depth, nested=nested, follow_symlinks=follow_symlinks,
+                         shard=shard, repos=repos, count_syscalls=count_syscalls)
+    results = (status.to_record() for status in statuses)
+    if not fix:
+        summary = render(results, output_format)
+        return summary["non_compliant"] + summary["unreadable"] == 0
 
-    if not found_repos:
-        print("No git repositories found.")
-        return
+    to_fix = []
+
+    def collect(results):
+        for result in results:
+            # A path that cannot be listed is reported, not initialized.
+            if not result["compliant"] and "error" not in result:
+                to_fix.append(result["path"])
+            yield result
+
+    summary = render(collect(results), output_format)
+    fixed = fix_all(to_fix, config, dry_run=dry_run, output_format=output_format)
+    return fixed and summary["unreadable"] == 0
+
+def init_recursive(search_path, jobs=DEFAULT_JOBS, dry_run=False, nested=False, template=None):
+    """
+    Initializes every non-compliant git repository below a search path.
+    
+    Args:
+        search_path (str): Path to recursively search for git repositories
+        jobs (int): Number of directories listed and repositories inspected
+            concurrently
+        dry_run (bool): Only report what would be changed
+        nested (bool): Also look for repositories inside repositories
+        template (str): Name of the template for new aidocs.md files
+        
+    Returns:
+        bool: True if every repository that needed it was initialized
+        
+    Repositories are handed to the init workers as soon as discovery and
+    inspection flag them, so fixing starts before the walk has finished.
+    """
+    from . import api
+
+    print(f"Initializing aidocs in git repositories below {search_path}...")
+    config = load_config()
+
+    statuses = api.check(search_path, jobs, config=config, nested=nested, tokens=False)
+    to_fix = (status.path for status in statuses
+              if not status.compliant and status.error is None)
+    return fix_all(to_fix, config, dry_run=dry_run, template=template)
+
+def fix_all(repo_paths, config, dry_run=False, output_format="text", template=None):
+    """
+    Runs init on many repositories using one worker process per core.
+    
+    Args:
+        repo_paths (iterable): Repositories to initialize
+        config (dict): Parsed global configuration
+        dry_run (bool): Only report what would be changed
+        output_format (str): "text" or "jsonl"
+        template (str): Name of the template for new aidocs.md files
+        
+    Returns:
+        bool: True if no repository failed or was locked by another run.
+        For dry runs, True only if nothing would be changed.
+    """
+    from .fix import fix_repos
+    from .report import render_fixes
+
+    records = fix_repos(repo_paths, config, LOCK_DIR, dry_run=dry_run, template=template)
+    summary = render_fixes(records, output_format)
+    return summary["failed"] + summary["locked"] + summary["planned"] == 0
+
+def watch(search_path, jobs=DEFAULT_JOBS, output_format="text", poll_interval=None):
+    """
+    Tracks compliance of git repositories live until interrupted.
+    
+    Args:
+        search_path (str): Path to recursively search for git repositories
+        jobs (int): Number of directories listed concurrently during the
+            initial scan
+        output_format (str): "text" or "jsonl"
+        poll_interval (float): Poll directory mtimes every this many seconds
+            instead of using inotify
+        
+    Runs one full scan, reporting every non-compliant repository, then only
+    re-inspects repositories whose aidocs.md, configured symlinks,
+    .aidocs.json or .git entry change, and scans newly created directories. Violations, fixes
+    and removed repositories are reported as they happen.
+    """
+    from .api import link_overrides
+    from .report import write_event
+    from .watch import PollingBackend, Watcher, default_backend
+
+    config = load_config()
+
+    backend = default_backend(poll_interval)
+    watcher = Watcher(search_path, config.get("symlinks", []),
+                      lambda record: write_event(record, output_format),
+                      backend, jobs=jobs, overrides=link_overrides(config),
+                      exclude=config.get("exclude", []))
+    if output_format == "text":
+        mode = "polling" if isinstance(backend, PollingBackend) else "inotify"
+        print(f"Watching git repositories in {search_path} ({mode})...")
+    try:
+        watcher.scan()
+        for warning in watcher.warnings:
+            print(f"Warning: {warning}", file=sys.stderr)
+        if output_format == "text":
+            print(f"\nWatching {len(watcher.status)} git repositories. Press Ctrl-C to stop.")
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        backend.close()
+
+def serve(search_path, socket_path=SOCKET_FILE, jobs=DEFAULT_JOBS, poll_interval=None):
+    """
+    Serves compliance queries for the repositories below a search path.
+    
+    Args:
+        search_path (str): Path to recursively search for git repositories
+        socket_path (str): Unix domain socket to listen on
+        jobs (int): Number of directories listed concurrently during the
+            initial scan
+        poll_interval (float): Poll directory mtimes every this many seconds
+            instead of using inotify
+        
+    Scans once, then keeps the state current with the same event handling
+    as `aidocs watch` and answers queries from memory until interrupted.
+    """
+    from .api import link_overrides
+    from .server import ComplianceServer
+    from .watch import Watcher, default_backend
+
+    config = load_config()
+
+    backend = default_backend(poll_interval)
+    watcher = Watcher(os.path.abspath(search_path), config.get("symlinks", []),
+                      lambda record: None, backend, jobs=jobs,
+                      overrides=link_overrides(config), exclude=config.get("exclude", []))
+    print(f"Scanning git repositories in {search_path}...")
+    watcher.scan()
+    for warning in watcher.warnings:
+        print(f"Warning: {warning}", file=sys.stderr)
+    try:
+        server = ComplianceServer(socket_path, watcher)
+    except OSError as e:
+        print(f"Error: {e}")
+        backend.close()
+        sys.exit(1)
+    print(f"Serving {len(watcher.status)} git repositories on {socket_path}. Press Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        backend.close()
+
+def merge_reports(report_files, output_format="text"):
+    """
+    Combines the outputs of several sharded `aidocs check` runs.
+    
+    Args:
+        report_files (list): Files holding json or jsonl check output, "-"
+            for stdin
+        output_format (str): "text", "json" or "jsonl"
+        
+    Returns:
+        int: Exit status: 0 if every repository is compliant, 1 if not, 2
+        if an input could not be read or is incomplete
+        
+    Results are streamed from one file after the other, and a repository
+    reported by more than one input is counted once.
+    """
+    from .report import read_results, render
+
+    def unique(results, seen):
+        for result in results:
+            if result["path"] not in seen:
+                seen.add(result["path"])
+                yield result
+
+    def results():
+        seen = set()
+        for report_file in report_files:
+            if report_file == "-":
+                yield from unique(read_results(sys.stdin), seen)
+                continue
+            with open(report_file, "r") as f:
+                yield from unique(read_results(f), seen)
+
+    try:
+        summary = render(results(), output_format)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: could not merge reports: {e}", file=sys.stderr)
+        return 2
+    return 0 if summary["non_compliant"] + summary["unreadable"] == 0 else 1
+
+def query(path, socket_path=SOCKET_FILE, output_format="text"):
+    """
+    Asks a running `aidocs serve` whether a repository is compliant.
+    
+    Args:
+        path (str): The repository, or any path inside it
+        socket_path (str): Unix domain socket the server listens on
+        output_format (str): "text" or "json"
+        
+    Returns:
+        int: Exit status: 0 if compliant, 1 if not, 2 if the question
+        could not be answered
+    """
+    import json
+    from .client import request
+    from .report import write_text_result
 
-    print(f"Found {len(found_repos)} git repositories.")
-    all_compliant = True
-    for repo_path in found_repos:
-        real_file_path = os.path.join(repo_path, REAL_FILENAME)
-        if not os.path.exists(real_file_path):
-            all_compliant = False
-            print(f"\n- Repository: {repo_path}")
-            print(f"  Missing: {REAL_FILENAME}")
+    try:
+        response = request(socket_path, {"op": "status", "path": os.path.abspath(path)})
+    except (OSError, ValueError) as e:
+        print(f"Error: could not reach aidocs server at {socket_path}: {e}", file=sys.stderr)
+        return 2
+    if output_format == "json":
+        print(json.dumps(response))
+    elif not response.get("ok"):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+    elif response["repo"]["compliant"]:
+        print(f"Compliant: {response['repo']['path']}")
+    else:
+        write_text_result(response["repo"], sys.stdout)
+    if not response.get("ok"):
+        return 2
+    return 0 if response["repo"]["compliant"] else 1
+
+def drift(search_paths, jobs=DEFAULT_JOBS, full=False, output_format="text", template=None):
+    """
+    Reports how far the aidocs.md files below the search paths have moved
+    from their templates.
+    
+    Args:
+        search_paths (list): Paths to recursively search for git repositories
+        jobs (int): Number of directories listed and files compared
+            concurrently
+        full (bool): Ignore the repository index while searching
+        output_format (str): "text", "json" or "jsonl"
+        template (str): Name of the template to compare every repository
+            with, instead of each repository's own
+        
+    See api.drift for what the section statuses mean.
+    """
+    from . import api
+    from .report import render_drift
+    from .templates import TemplateError
+
+    if output_format == "text":
+        print(f"Comparing aidocs.md files in {', '.join(search_paths)} with their templates...")
+    try:
+        reports = api.drift(search_paths, jobs, full, load_config(), template=template)
+        render_drift((report.to_record() for report in reports), output_format)
+    except TemplateError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+def update_search(search_paths, jobs=DEFAULT_JOBS, full=False):
+    """
+    Updates the search index from the repositories below the search paths.
+    
+    Args:
+        search_paths (list): Paths to recursively search for git repositories
+        jobs (int): Number of directories listed and files read concurrently
+        full (bool): Ignore the repository index while searching
+    """
+    from . import api
+
+    print(f"Indexing aidocs.md files in {', '.join(search_paths)}...")
+    counts = api.update_search_index(search_paths, jobs, full, load_config())
+    print(f"{counts['added']} added, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['removed']} removed.")
+
+def search(query, limit=10, output_format="text"):
+    """
+    Prints the indexed aidocs.md sections that best match a query.
+    
+    Args:
+        query (str): Words to look for
+        limit (int): Maximum number of hits
+        output_format (str): "text" or "json"
+    
+    Returns:
+        bool: True if anything matched
+    """
+    from . import api
+    from .constants import SEARCH_DB
+
+    if not os.path.exists(SEARCH_DB):
+        print("Error: no search index yet. Run 'aidocs search --update <search_path>...' first.")
+        sys.exit(1)
+    hits = api.search(query, limit)
+    if output_format == "json":
+        import json
+        print(json.dumps([hit.to_record() for hit in hits], indent=2))
+    else:
+        for hit in hits:
+            print(f"{hit.path}:{hit.line}: {hit.heading or '(top)'}  [{hit.score:.2f}]")
+            if hit.snippet:
+                print(f"    {hit.snippet}")
+        if not hits:
+            print("No matches.")
+    return bool(hits)
+
+def build(search_paths, jobs=DEFAULT_JOBS, full=False, output_format="text", dry_run=False):
+    """
+    Expands the fragment includes of the aidocs.md files below the search
+    paths.
+    
+    Args:
+        search_paths (list): Paths to recursively search for git repositories
+        jobs (int): Number of directories listed and files built concurrently
+        full (bool): Ignore the repository index while searching
+        output_format (str): "text" or "jsonl"
+        dry_run (bool): Only show which files would be rewritten
+    
+    Returns:
+        bool: True if no repository failed to build
+    """
+    from . import api
+    from .report import render_builds
+
+    if output_format == "text":
+        print(f"Building aidocs.md files in {', '.join(search_paths)}...")
+    results = api.build(search_paths, jobs, full, load_config(), dry_run=dry_run)
+    summary = render_builds((result.to_record() for result in results), output_format)
+    return not summary["failed"]
+
+def parse_options(args, value_options=(), flag_options=()):
+    """
+    Splits command arguments into positional arguments and --options.
+    
+    Args:
+        args (list): Arguments following the command name
+        value_options (iterable): Option names that take a value, given as
+            "--name value" or "--name=value"
+        flag_options (iterable): Option names that take no value
+        
+    Returns:
+        tuple: (positionals, options) where options maps each option name
+        (without the leading dashes) to its value, or True for flags
+        
+    Raises:
+        SystemExit: On unknown options or options missing their value
+    """
+    positionals = []
+    options = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        i += 1
+        if not arg.startswith("--") or arg == "--":
+            positionals.append(arg)
             continue
+        name, has_value, value = arg[2:].partition("=")
+        if name in flag_options and not has_value:
+            options[name] = True
+        elif name in value_options:
+            if not has_value:
+                if i >= len(args):
+                    print(f"Error: option --{name} requires a value.")
+                    sys.exit(1)
+                value = args[i]
+                i += 1
+            options[name] = value
+        else:
+            print(f"Error: unknown option --{name}.")
+            sys.exit(1)
+    return positionals, options
+
+def parse_int_option(options, name, default):
+    """
+    Reads a positive integer option.
 
-        missing_links = []
-        invalid_links = []
-        for link_name in symlinks_to_check:
-            link_path = os.path.join(repo_path, link_name)
-            if not os.path.lexists(link_path):
-                missing_links.append(link_name)
-            elif not os.path.islink(link_path) or os.readlink(link_path) != REAL_FILENAME:
-                invalid_links.append(link_name)
+    Args:
+        options (dict): Options returned by parse_options
+        name (str): Option name
+        default (int): Value used when the option is absent
+
+    Raises:
+        SystemExit: If the value is not a positive integer
+    """
+    if name not in options:
+        return default
+    try:
+        value = int(options[name])
+    except ValueError:
+        value = 0
+    if value < 1:
+        print(f"Error: option --{name} must be a positive integer.")
+        sys.exit(1)
+    return value
+
+def parse_poll_option(options):
+    """
+    Reads the --poll option of the watch and serve commands.
+    
+    Args:
+        options (dict): Options returned by parse_options
+        
+    Returns:
+        float: Poll interval in seconds, or None to use inotify
         
-        if missing_links or invalid_links:
-            all_compliant = False
-            print(f"\n- Repository: {repo_path}")
-            if missing_links:
-                print(f"  Missing symlinks: {', '.join(missing_links)}")
-            if invalid_links:
-                print(f"  Invalid symlinks: {', '.join(invalid_links)}")
+    Raises:
+        SystemExit: If the value is not a positive number
+    """
+    if "poll" not in options:
+        return None
+    try:
+        poll_interval = float(options["poll"])
+    except ValueError:
+        poll_interval = 0
+    if poll_interval <= 0:
+        print("Error: option --poll must be a positive number of seconds.")
+        sys.exit(1)
+    return poll_interval
 
-    if all_compliant:
-        print("\nAll repositories are compliant.")
+def parse_shard_option(options):
+    """
+    Reads the --shard K/N option of the check command.
+    
+    Args:
+        options (dict): Options returned by parse_options
+        
+    Returns:
+        tuple: (K, N), or None when the option is absent
+        
+    Raises:
+        SystemExit: Unless 1 <= K <= N
+    """
+    if "shard" not in options:
+        return None
+    shard, _, shards = options["shard"].partition("/")
+    try:
+        shard, shards = int(shard), int(shards)
+    except ValueError:
+        shard = shards = 0
+    if not 1 <= shard <= shards:
+        print("Error: option --shard must be K/N with 1 <= K <= N, e.g. --shard 2/4.")
+        sys.exit(1)
+    return shard, shards
+
+def extract_global_options(argv):
+    """
+    Removes the global --stats and --profile options from an argument list.
+    
+    Args:
+        argv (list): Command line arguments, without the program name
+        
+    Returns:
+        tuple: (remaining_args, show_stats, profile_file)
+        
+    Raises:
+        SystemExit: If --profile is missing its file name
+    """
+    remaining = []
+    show_stats = False
+    profile_file = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+        if arg == "--stats":
+            show_stats = True
+        elif arg == "--profile":
+            if i >= len(argv):
+                print("Error: option --profile requires a value.")
+                sys.exit(1)
+            profile_file = argv[i]
+            i += 1
+        elif arg.startswith("--profile="):
+            profile_file = arg[len("--profile="):]
+        else:
+            remaining.append(arg)
+    return remaining, show_stats, profile_file
+
+def show_warning(message, category, filename, lineno, file=None, line=None):
+    """
+    Prints the warnings the api issues as "Warning: ..." lines on stderr;
+    other warnings keep Python's format.
+    """
+    import warnings
+    from .api import AidocsWarning
+
+    if issubclass(category, AidocsWarning):
+        print(f"Warning: {message}", file=sys.stderr)
+    else:
+        sys.stderr.write(warnings.formatwarning(message, category, filename, lineno, line))
 
 def main():
     """
@@ -279,17 +758,74 @@ def main():
     - init <path>: Initialize aidocs in a project
     - edit <path>: Edit project's aidocs.md file
     - check <path>: Check compliance across repositories
+    - watch <path>: Report compliance changes as they happen
+    - serve <path>: Answer compliance queries over a Unix socket
+    - query [path]: Ask a running server about a repository
+    - report merge <file>...: Combine the outputs of sharded checks
+    - drift <path>: Compare aidocs.md files with their templates
+    - search <query>: Search the indexed aidocs.md files
+    - build <path>: Expand fragment includes in aidocs.md files
+    
+    The global options --stats (phase timings and counters on stderr) and
+    --profile FILE (cProfile output of the main thread) may appear anywhere
+    on the command line.
+    
+    Raises:
+        SystemExit: On invalid commands or missing arguments
+    """
+    import warnings
+
+    warnings.showwarning = show_warning
+    args, show_stats, profile_file = extract_global_options(sys.argv[1:])
+    sys.argv[1:] = args
+    if not show_stats and profile_file is None:
+        run_command()
+        return
+
+    if show_stats:
+        stats.ACTIVE = stats.Stats()
+        stats.ACTIVE.install()
+    profiler = None
+    if profile_file is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+    try:
+        if profiler is not None:
+            profiler.runcall(run_command)
+        else:
+            run_command()
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(profile_file)
+            print(f"Profile written to {profile_file}", file=sys.stderr)
+        if show_stats:
+            stats.ACTIVE.uninstall()
+            stats.ACTIVE.report()
+            stats.ACTIVE = None
+
+def run_command():
+    """
+    Parses the command line and runs the selected command.
     
     Raises:
         SystemExit: On invalid commands or missing arguments
     """
     if len(sys.argv) < 2:
-        print("Usage: aidocs <command> [args]")
+        print("Usage: aidocs [--stats] [--profile FILE] <command> [args]")
         print("Commands:")
         print("  setup")
-        print("  init <project_path>")
+        print("  init <project_path> [--template NAME] [--recursive [--dry-run] [--nested] [--jobs N]]")
         print("  edit <project_path>")
-        print("  check <search_path>")
+        print("  check <search_path>... [--jobs N] [--full] [--format text|json|jsonl] [--fix [--dry-run]] [--count-syscalls] [--gitignore] [--max-depth N] [--nested] [--follow-symlinks] [--shard K/N]")
+        print("  check --repos-from FILE|- [--jobs N] [--format text|json|jsonl] [--fix [--dry-run]]")
+        print("  report merge <report_file>... [--format text|json|jsonl]")
+        print("  watch <search_path> [--format text|jsonl] [--poll SECONDS]")
+        print("  serve <search_path> [--socket PATH] [--poll SECONDS]")
+        print("  query [path] [--socket PATH] [--format text|json]")
+        print("  drift <search_path>... [--jobs N] [--full] [--format text|json|jsonl] [--template NAME]")
+        print("  search <query>... [--limit N] [--format text|json]")
+        print("  search --update <search_path>... [--jobs N] [--full]")
+        print("  build <search_path>... [--jobs N] [--full] [--dry-run] [--format text|jsonl]")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -297,11 +833,24 @@ def main():
     if command == "setup":
         setup()
     elif command == "init":
-        if len(sys.argv) < 3:
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "template"),
+                                      flag_options=("recursive", "dry-run", "nested"))
+        if not args:
             print("Error: init command requires a project_path argument.")
             sys.exit(1)
-        project_path = sys.argv[2]
-        init(project_path)
+        project_path = args[0]
+        if options.get("recursive"):
+            ok = init_recursive(project_path, jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+                                dry_run=options.get("dry-run", False),
+                                nested=options.get("nested", False),
+                                template=options.get("template"))
+            if not ok:
+                sys.exit(1)
+        elif options.get("dry-run") or options.get("nested"):
+            print("Error: --dry-run and --nested require --recursive.")
+            sys.exit(1)
+        else:
+            init(project_path, template=options.get("template"))
     elif command == "edit":
         if len(sys.argv) < 3:
             print("Error: edit command requires a project_path argument.")
@@ -309,18 +858,187 @@ def main():
         project_path = sys.argv[2]
         edit(project_path)
     elif command == "check":
-        if len(sys.argv) < 3:
+        args, options = parse_options(sys.argv[2:],
+                                      value_options=("jobs", "format", "max-depth", "shard",
+                                                     "repos-from"),
+                                      flag_options=("full", "fix", "dry-run", "count-syscalls",
+                                                    "gitignore", "nested", "follow-symlinks"))
+        repos_from = options.get("repos-from")
+        if repos_from is not None:
+            walk_options = [name for name in ("full", "gitignore", "max-depth", "nested",
+                                              "follow-symlinks", "shard") if name in options]
+            if args:
+                print("Error: --repos-from cannot be combined with search paths.")
+                sys.exit(1)
+            if walk_options:
+                print(f"Error: --repos-from cannot be combined with --{walk_options[0]}.")
+                sys.exit(1)
+            if repos_from != "-" and not os.path.isfile(repos_from):
+                print(f"Error: repository list not found: {repos_from}")
+                sys.exit(1)
+        elif not args:
             print("Error: check command requires a search_path argument.")
             sys.exit(1)
-        search_path = sys.argv[2]
-        check(search_path)
+        output_format = options.get("format", "text")
+        from .report import FORMATS
+        if output_format not in FORMATS:
+            print(f"Error: --format must be one of: {', '.join(FORMATS)}.")
+            sys.exit(1)
+        if options.get("fix") and output_format == "json":
+            print("Error: --fix supports only the text and jsonl formats.")
+            sys.exit(1)
+        if options.get("dry-run") and not options.get("fix"):
+            print("Error: --dry-run requires --fix.")
+            sys.exit(1)
+        compliant = check(args, jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+                          full=options.get("full", False), output_format=output_format,
+                          fix=options.get("fix", False), dry_run=options.get("dry-run", False),
+                          count_syscalls=options.get("count-syscalls", False),
+                          gitignore=options.get("gitignore", False),
+                          max_depth=parse_int_option(options, "max-depth", None),
+                          nested=options.get("nested", False),
+                          follow_symlinks=options.get("follow-symlinks", False),
+                          shard=parse_shard_option(options), repos_from=repos_from)
+        if not compliant:
+            sys.exit(1)
+    elif command == "watch":
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "format", "poll"))
+        if not args:
+            print("Error: watch command requires a search_path argument.")
+            sys.exit(1)
+        output_format = options.get("format", "text")
+        if output_format not in ("text", "jsonl"):
+            print("Error: --format must be one of: text, jsonl.")
+            sys.exit(1)
+        watch(args[0], jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+              output_format=output_format, poll_interval=parse_poll_option(options))
+    elif command == "serve":
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "socket", "poll"))
+        if not args:
+            print("Error: serve command requires a search_path argument.")
+            sys.exit(1)
+        serve(args[0], socket_path=options.get("socket", SOCKET_FILE),
+              jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+              poll_interval=parse_poll_option(options))
+    elif command == "report":
+        args, options = parse_options(sys.argv[2:], value_options=("format",))
+        if not args or args[0] != "merge" or len(args) < 2:
+            print("Error: usage: aidocs report merge <report_file>... [--format text|json|jsonl]")
+            sys.exit(1)
+        output_format = options.get("format", "text")
+        from .report import FORMATS
+        if output_format not in FORMATS:
+            print(f"Error: --format must be one of: {', '.join(FORMATS)}.")
+            sys.exit(1)
+        sys.exit(merge_reports(args[1:], output_format))
+    elif command == "query":
+        args, options = parse_options(sys.argv[2:], value_options=("socket", "format"))
+        output_format = options.get("format", "text")
+        if output_format not in ("text", "json"):
+            print("Error: --format must be one of: text, json.")
+            sys.exit(1)
+        sys.exit(query(args[0] if args else ".", socket_path=options.get("socket", SOCKET_FILE),
+                       output_format=output_format))
+    elif command == "drift":
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "format", "template"),
+                                      flag_options=("full",))
+        if not args:
+            print("Error: drift command requires a search_path argument.")
+            sys.exit(1)
+        output_format = options.get("format", "text")
+        from .report import FORMATS
+        if output_format not in FORMATS:
+            print(f"Error: --format must be one of: {', '.join(FORMATS)}.")
+            sys.exit(1)
+        drift(args, jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+              full=options.get("full", False), output_format=output_format,
+              template=options.get("template"))
+    elif command == "search":
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "limit", "format"),
+                                      flag_options=("update", "full"))
+        if options.get("update"):
+            if not args:
+                print("Error: search --update requires a search_path argument.")
+                sys.exit(1)
+            update_search(args, jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+                          full=options.get("full", False))
+            return
+        if not args:
+            print("Error: search command requires a query argument.")
+            sys.exit(1)
+        output_format = options.get("format", "text")
+        if output_format not in ("text", "json"):
+            print("Error: --format must be one of: text, json.")
+            sys.exit(1)
+        if not search(" ".join(args), limit=parse_int_option(options, "limit", 10),
+                      output_format=output_format):
+            sys.exit(1)
+    elif command == "build":
+        args, options = parse_options(sys.argv[2:], value_options=("jobs", "format"),
+                                      flag_options=("full", "dry-run"))
+        if not args:
+            print("Error: build command requires a search_path argument.")
+            sys.exit(1)
+        output_format = options.get("format", "text")
+        if output_format not in ("text", "jsonl"):
+            print("Error: --format must be one of: text, jsonl.")
+            sys.exit(1)
+        if not build(args, jobs=parse_int_option(options, "jobs", DEFAULT_JOBS),
+                     full=options.get("full", False), output_format=output_format,
+                     dry_run=options.get("dry-run", False)):
+            sys.exit(1)
     elif command == "help" or command == "--help" or command == "-h":
-        print("Usage: aidocs <command> [args]")
+        print("Usage: aidocs [--stats] [--profile FILE] <command> [args]")
         print("Commands:")
         print("  setup                  Initialize global configuration")
         print("  init <project_path>    Initialize aidocs in a project")
+        print("    --template NAME      Render a new aidocs.md from ~/.aidocs/templates/NAME.md")
+        print("    --recursive          Initialize every non-compliant repository below the path")
+        print("    --dry-run            With --recursive, only show what would change")
+        print("    --nested             With --recursive, also initialize repositories inside repositories")
         print("  edit <project_path>    Edit aidocs.md in project")
-        print("  check <search_path>    Check compliance recursively")
+        print("  check <search_path>... Check compliance recursively")
+        print("    --jobs N             Directories scanned in parallel")
+        print("    --full               Rescan every directory, ignoring the index")
+        print("    --format FORMAT      Output as text, json or jsonl")
+        print("    --fix                Initialize non-compliant repositories, one process per core")
+        print("    --dry-run            With --fix, only show what would change")
+        print("    --count-syscalls     Report filesystem calls made per repository")
+        print("    --gitignore          Skip directories ignored by each repository's .gitignore")
+        print("    --max-depth N        Descend at most N levels below the search path")
+        print("    --nested             Also search inside repositories (submodules, monorepos)")
+        print("    --follow-symlinks    Descend into symlinked directories, each directory once")
+        print("    --shard K/N          Check only the K-th of N disjoint slices of the search paths")
+        print("    --repos-from FILE    Check the repositories listed in FILE (- for stdin), without searching")
+        print("  report merge <file>... Combine json or jsonl outputs of sharded checks")
+        print("    --format FORMAT      Output as text, json or jsonl")
+        print("  watch <search_path>    Report compliance changes live")
+        print("    --format FORMAT      Output as text or jsonl")
+        print("    --poll SECONDS       Poll for changes instead of using inotify")
+        print("  serve <search_path>    Answer compliance queries over a Unix socket")
+        print("    --socket PATH        Socket to listen on (default ~/.aidocs/aidocs.sock)")
+        print("  query [path]           Ask a running server whether a repository is compliant")
+        print("    --socket PATH        Socket the server listens on")
+        print("    --format FORMAT      Output as text or json")
+        print("  drift <search_path>... Compare aidocs.md files with their templates, section by section")
+        print("    --jobs N             Directories scanned in parallel")
+        print("    --full               Rescan every directory, ignoring the index")
+        print("    --format FORMAT      Output as text, json or jsonl")
+        print("    --template NAME      Compare with ~/.aidocs/templates/NAME.md instead")
+        print("  search <query>...      Search the indexed aidocs.md files, best sections first")
+        print("    --limit N            Show at most N hits (default 10)")
+        print("    --format FORMAT      Output as text or json")
+        print("    --update PATH...     Index the aidocs.md files below the paths instead")
+        print("    --jobs N             With --update, directories scanned in parallel")
+        print("    --full               With --update, rescan every directory")
+        print("  build <search_path>... Expand ~/.aidocs/fragments includes in aidocs.md files")
+        print("    --jobs N             Directories scanned and files built in parallel")
+        print("    --full               Rescan every directory, ignoring the index")
+        print("    --dry-run            Only show which files would be rewritten")
+        print("    --format FORMAT      Output as text or jsonl")
+        print("Global options:")
+        print("  --stats                Report phase timings and counters on stderr")
+        print("  --profile FILE         Write a cProfile profile of the command to FILE")
     else:
         print(f"Unknown command: {command}")
         print("Run 'aidocs help' for usage information.")
@@ -0,0 +1,114 @@
+"""
+Bounded parallel mapping over streams of work items.
+
+Worker threads are plain threading.Threads fed through a queue, like the
+discovery walker: concurrent.futures takes longer to import than a small
+check takes to run, so it is only loaded for an explicit executor_class.
+"""
+import queue
+import threading
+
+
+def imap_unordered(func, items, jobs=1, executor_class=None):
+    """
+    Applies func to every item, yielding results as soon as they are ready.
+
+    Args:
+        func (callable): Function applied to each item
+        items (iterable): Work items; consumed lazily, so it may be a
+            generator that is still producing items
+        jobs (int): Number of workers. With 1, func runs in the calling
+            thread and results keep the input order.
+        executor_class (type): concurrent.futures executor to run workers
+            in, e.g. a ProcessPoolExecutor. By default workers are threads.
+
+    Yields:
+        Results of func, in completion order when jobs > 1.
+
+    At most 2 * jobs items are in flight at any time, so memory use does not
+    grow with the number of items. Finished results are yielded whenever an
+    item is taken from items, so a slow producer does not delay them.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+    if executor_class is not None:
+        yield from _executor_imap(func, items, jobs, executor_class)
+        return
+
+    limit = 2 * jobs
+    work = queue.Queue()
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is _DONE or stop.is_set():
+                return
+            try:
+                results.put((func(item), None))
+            except BaseException as exc:
+                results.put((None, exc))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+
+    outstanding = 0
+    try:
+        for item in items:
+            work.put(item)
+            outstanding += 1
+            # Yield what is already finished, so results are not held back
+            # while a slow producer fills the window; block only when full.
+            while outstanding:
+                try:
+                    result, error = results.get(block=outstanding >= limit)
+                except queue.Empty:
+                    break
+                outstanding -= 1
+                if error is not None:
+                    raise error
+                yield result
+        while outstanding:
+            result, error = results.get()
+            outstanding -= 1
+            if error is not None:
+                raise error
+            yield result
+    finally:
+        # Queued items are dropped; items already running finish first.
+        stop.set()
+        for _ in threads:
+            work.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+
+_DONE = object()
+
+
+def _executor_imap(func, items, jobs, executor_class):
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    limit = 2 * jobs
+    with executor_class(max_workers=jobs) as executor:
+        pending = set()
+        try:
+            for item in items:
+                pending.add(executor.submit(func, item))
+                if len(pending) >= limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                else:
+                    done, pending = wait(pending, timeout=0)
+                for future in done:
+                    yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,79 @@
+"""
+Facts about a project directory, used to fill in templates.
+
+Each fact is computed from a handful of small files in the project root or
+its .git directory, and only when a template asks for it. The language and
+tech stack come from stack.detect_stack.
+"""
+import os
+
+from .stack import detect_stack, format_stack, main_language
+
+UNKNOWN = "unknown"
+NO_STACK = "(TODO: List the main technologies, frameworks, and libraries used.)"
+
+
+def _read_line(path):
+    try:
+        with open(path, "r", errors="replace") as f:
+            return f.readline().strip()
+    except OSError:
+        return ""
+
+
+def git_dirs(repo_path):
+    """
+    Returns a repository's git directory and the directory shared between
+    its worktrees, which holds the refs.
+
+    A .git file (worktrees, submodules) points to the git directory, and a
+    worktree's git directory points to the shared one in its commondir file.
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    if os.path.isfile(git_dir):
+        line = _read_line(git_dir)
+        if line.startswith("gitdir:"):
+            git_dir = os.path.join(repo_path, line[len("gitdir:"):].strip())
+    common = _read_line(os.path.join(git_dir, "commondir"))
+    common_dir = os.path.normpath(os.path.join(git_dir, common)) if common else git_dir
+    return git_dir, common_dir
+
+
+def default_branch(repo_path):
+    """
+    Returns the branch origin's HEAD points to, or else the checked-out
+    branch, or "unknown".
+    """
+    git_dir, common_dir = git_dirs(repo_path)
+    for path, prefix in ((os.path.join(common_dir, "refs", "remotes", "origin", "HEAD"),
+                          "ref: refs/remotes/origin/"),
+                         (os.path.join(git_dir, "HEAD"), "ref: refs/heads/")):
+        line = _read_line(path)
+        if line.startswith(prefix):
+            return line[len(prefix):]
+    return UNKNOWN
+
+
+def template_variables(project_path):
+    """
+    Returns the variables a template can use for a project.
+
+    Returns:
+        dict: Variable name mapped to a function of no arguments computing
+        its value, so that only the variables a template uses are computed
+    """
+    project_path = os.path.abspath(project_path)
+    detected = []
+
+    def stack():
+        if not detected:
+            detected.append(detect_stack(project_path))
+        return detected[0]
+
+    return {
+        "project_name": lambda: os.path.basename(os.path.realpath(project_path)),
+        "repo_path": lambda: project_path,
+        "default_branch": lambda: default_branch(project_path),
+        "language": lambda: main_language(stack()) or UNKNOWN,
+        "tech_stack": lambda: format_stack(stack()) or NO_STACK,
+    }
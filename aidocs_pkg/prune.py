@@ -0,0 +1,229 @@
+"""
+Pruning of the discovery walk: exclusion globs, .gitignore files and depth.
+
+Patterns use gitignore syntax. A pattern without a slash matches a directory
+name at any depth; a pattern with a slash matches the path relative to the
+directory the pattern belongs to (the search root for the configured
+exclusions, the directory holding the file for a .gitignore). `*` and `?`
+do not match `/`, `**` matches across directories and a leading `!`
+re-includes a directory an earlier pattern excluded.
+
+Consecutive patterns of the same polarity are compiled into a single regular
+expression, so a pattern list costs one or two regex matches per directory
+however long it is.
+"""
+import os
+import re
+
+GITIGNORE = ".gitignore"
+
+
+def translate(pattern):
+    """
+    Translates a gitignore-style glob into a regular expression.
+
+    Args:
+        pattern (str): Glob without leading "!" or trailing "/"
+
+    Returns:
+        str: Regular expression source matching the whole path
+    """
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            if pattern.startswith("*/", i):
+                # "**/" matches zero or more leading directories.
+                parts.append("(?:.*/)?")
+                i += 2
+            elif pattern.startswith("*", i):
+                parts.append(".*")
+                i += 1
+            else:
+                parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j < 0:
+                parts.append(re.escape(c))
+                continue
+            body = pattern[i:j].replace("\\", "\\\\")
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = j + 1
+        elif c == "\\" and i < n:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+        else:
+            parts.append(re.escape(c))
+    return "".join(parts)
+
+
+def _compile(sources):
+    if not sources:
+        return None
+    return re.compile("(?:" + "|".join(sources) + r")\Z", re.DOTALL)
+
+
+class PathMatcher:
+    """
+    Ordered gitignore-style patterns, compiled once.
+
+    Args:
+        patterns (iterable): Pattern lines; blank lines and lines starting
+            with "#" are ignored
+    """
+
+    def __init__(self, patterns):
+        # Runs of same-polarity patterns: (negate, name_sources, path_sources)
+        runs = []
+        for line in patterns:
+            line = line.rstrip("\n\r")
+            if not line.lstrip() or line.startswith("#"):
+                continue
+            line = line.rstrip(" ")
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if not runs or runs[-1][0] != negate:
+                runs.append((negate, [], []))
+            if "/" in line:
+                runs[-1][2].append(translate(line.lstrip("/")))
+            else:
+                runs[-1][1].append(translate(line))
+        self._runs = [(negate, _compile(names), _compile(paths)) for negate, names, paths in runs]
+
+    def __bool__(self):
+        return bool(self._runs)
+
+    def match(self, rel_path, name):
+        """
+        Tells whether a directory is excluded.
+
+        Args:
+            rel_path (str): Path relative to the patterns' base, "/"-separated
+            name (str): The directory's own name
+
+        Returns:
+            True if the last matching pattern excludes the directory, False if
+            it re-includes it, None if no pattern matches
+        """
+        for negate, names, paths in reversed(self._runs):
+            if (names is not None and names.match(name)) or \
+                    (paths is not None and paths.match(rel_path)):
+                return not negate
+        return None
+
+
+def _is_repo_root(path):
+    # Costs one lstat, and only for directories an exclusion matches.
+    return os.path.lexists(os.path.join(path, ".git"))
+
+
+def _prefix_len(path):
+    return len(os.path.join(path, ""))
+
+
+def _relative(path, prefix_len):
+    rel = path[prefix_len:]
+    if os.sep != "/":
+        rel = rel.replace(os.sep, "/")
+    return rel
+
+
+class Pruner:
+    """
+    Wraps a directory visitor so the walk skips excluded directories.
+
+    Args:
+        root (str): Search root the walk starts from
+        visit (callable): Visitor with the signature of
+            discovery.scan_directory
+        exclude (iterable): Exclusion patterns, relative to root. They
+            never exclude a repository root, so a repository named like a
+            build directory ("build", "dist", ...) is still found.
+        gitignore (bool): Also skip directories ignored by the .gitignore
+            files of the repositories being walked
+        max_depth (int): Do not list directories more than this many levels
+            below root (root itself is level 0)
+
+    The pruner's visit method is a drop-in replacement for the wrapped
+    visitor. Listings themselves are not changed, so a RepoIndex below the
+    pruner keeps caching complete directory listings.
+    """
+
+    def __init__(self, root, visit, exclude=(), gitignore=False, max_depth=None):
+        self._visit = visit
+        self._exclude = PathMatcher(exclude)
+        self._root_len = _prefix_len(root)
+        self._gitignore = gitignore
+        self._max_depth = max_depth
+        # Per pending directory: (depth, inside_repo, gitignore chain). Set by
+        # the parent's visit before the directory can be queued, popped when
+        # it is visited, so only the walk's frontier is held.
+        self._pending = {}
+        self._root_context = (0, False, ())
+        self._compiled = {}
+
+    def _read_gitignore(self, path):
+        try:
+            with open(os.path.join(path, GITIGNORE), "r", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return None
+        matcher = self._compiled.get(text)
+        if matcher is None:
+            matcher = self._compiled[text] = PathMatcher(text.splitlines())
+        return matcher if matcher else None
+
+    def _ignored(self, path, name, chain):
+        for prefix_len, matcher in reversed(chain):
+            ignored = matcher.match(_relative(path, prefix_len), name)
+            if ignored is not None:
+                return ignored
+        return False
+
+    def excluded(self, path):
+        """
+        Tells whether the exclusion patterns skip a directory below root.
+        """
+        return bool(self._exclude and
+                    self._exclude.match(_relative(path, self._root_len), os.path.basename(path))
+                    and not _is_repo_root(path))
+
+    def visit(self, path):
+        result, subdirs = self._visit(path)
+        depth, inside_repo, chain = self._pending.pop(path, self._root_context)
+        if self._max_depth is not None and depth >= self._max_depth:
+            return result, []
+
+        if self._gitignore:
+            if result:
+                # A repository starts afresh; its parent's rules stop here.
+                inside_repo, chain = True, ()
+            if inside_repo:
+                matcher = self._read_gitignore(path)
+                if matcher is not None:
+                    chain = chain + ((_prefix_len(path), matcher),)
+
+        kept = []
+        context = (depth + 1, inside_repo, chain)
+        for subdir in subdirs:
+            if self.excluded(subdir) or \
+                    (chain and self._ignored(subdir, os.path.basename(subdir), chain)):
+                continue
+            self._pending[subdir] = context
+            kept.append(subdir)
+        return result, kept
@@ -0,0 +1,362 @@
+"""
+Streaming renderers for `aidocs check` results.
+
+Every renderer writes each result as soon as it arrives and keeps only running
+totals, so memory use does not depend on the number of repositories.
+"""
+import json
+import sys
+
+from .constants import REAL_FILENAME
+
+FORMATS = ("text", "json", "jsonl")
+# Largest aidocs.md files listed in a summary
+LARGEST = 10
+
+
+def new_summary():
+    """
+    Returns an empty summary record.
+    """
+    return {"type": "summary", "repos": 0, "compliant": 0, "non_compliant": 0, "unreadable": 0}
+
+
+def _size_order(entry):
+    return -entry["tokens"], entry["path"]
+
+
+def add_to_summary(summary, result):
+    """
+    Counts one inspection result into a summary record. Paths that could
+    not be listed count as unreadable, not as non-compliant repositories.
+    """
+    summary["repos"] += 1
+    if "syscalls" in result:
+        summary["syscalls"] = summary.get("syscalls", 0) + result["syscalls"]
+    if result["compliant"]:
+        summary["compliant"] += 1
+    elif result.get("error") is not None:
+        summary["unreadable"] += 1
+    else:
+        summary["non_compliant"] += 1
+    if result.get("tokens") is not None:
+        summary["tokens"] = summary.get("tokens", 0) + result["tokens"]
+        summary["over_budget"] = summary.get("over_budget", 0) + bool(result.get("over_budget"))
+        # Ties are broken by path, so the list does not depend on the order
+        # results arrive in.
+        largest = summary.setdefault("largest", [])
+        entry = {"path": result["path"], "tokens": result["tokens"]}
+        if len(largest) < LARGEST or _size_order(entry) < _size_order(largest[-1]):
+            largest.append(entry)
+            largest.sort(key=_size_order)
+            del largest[LARGEST:]
+
+
+def write_text_result(result, out):
+    """
+    Writes a non-compliant or over-budget result in the human-readable
+    format.
+    """
+    if result["compliant"] and not result.get("over_budget"):
+        return
+    out.write(f"\n- Repository: {result['path']}\n")
+    if result.get("error") is not None:
+        out.write(f"  Cannot read: {result['error']}\n")
+    if result["missing_file"]:
+        out.write(f"  Missing: {REAL_FILENAME}\n")
+    if result["missing_links"]:
+        out.write(f"  Missing symlinks: {', '.join(result['missing_links'])}\n")
+    if result["invalid_links"]:
+        out.write(f"  Invalid symlinks: {', '.join(result['invalid_links'])}\n")
+    if result.get("over_budget"):
+        out.write(f"  Over token budget: {REAL_FILENAME} is about {result['tokens']:,} tokens\n")
+    out.flush()
+
+
+def write_text_summary(summary, out):
+    """
+    Writes the closing lines of the human-readable format.
+    """
+    if "syscalls" in summary and summary["repos"]:
+        out.write(f"\nFilesystem calls during inspection: {summary['syscalls']} "
+                  f"({summary['syscalls'] / summary['repos']:.1f} per repository)\n")
+    if summary.get("largest"):
+        out.write(f"\nLargest {REAL_FILENAME} files (estimated tokens):\n")
+        for entry in summary["largest"]:
+            out.write(f"  {entry['tokens']:>9,}  {entry['path']}\n")
+        out.write(f"Total: {summary['tokens']:,} tokens; "
+                  f"{summary['over_budget']} over the token budget.\n")
+    if not summary["repos"]:
+        out.write("No git repositories found.\n")
+    elif summary["non_compliant"] or summary["unreadable"]:
+        problems = [f"{summary['non_compliant']} not compliant"]
+        if summary["unreadable"]:
+            problems.append(f"{summary['unreadable']} could not be read")
+        out.write(f"\nChecked {summary['repos']} git repositories: {', '.join(problems)}.\n")
+    else:
+        out.write(f"Checked {summary['repos']} git repositories.\n")
+        out.write("\nAll repositories are compliant.\n")
+
+
+def render(results, fmt="text", out=None):
+    """
+    Writes check results in the requested format as they are produced.
+
+    Args:
+        results (iterable): Result records from compliance.check_repos
+        fmt (str): One of "text", "json" or "jsonl"
+        out (file): Stream to write to, stdout by default
+
+    Returns:
+        dict: The summary record, also written at the end of the output
+
+    Formats:
+    - text: non-compliant and over-budget repositories, the largest
+      aidocs.md files if tokens were estimated, and a closing summary line
+    - jsonl: one {"type": "repo", ...} object per line, then the summary
+    - json: a single {"repos": [...], "summary": {...}} document, written
+      incrementally
+    """
+    if out is None:
+        out = sys.stdout
+    summary = new_summary()
+
+    if fmt == "text":
+        for result in results:
+            add_to_summary(summary, result)
+            write_text_result(result, out)
+        write_text_summary(summary, out)
+    elif fmt == "jsonl":
+        for result in results:
+            add_to_summary(summary, result)
+            out.write(json.dumps(dict(type="repo", **result)) + "\n")
+            out.flush()
+        out.write(json.dumps(summary) + "\n")
+    elif fmt == "json":
+        out.write('{"repos": [')
+        separator = "\n  "
+        for result in results:
+            add_to_summary(summary, result)
+            out.write(separator + json.dumps(result))
+            out.flush()
+            separator = ",\n  "
+        out.write(f'\n], "summary": {json.dumps(summary)}}}\n')
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+    out.flush()
+    return summary
+
+
+def read_results(stream):
+    """
+    Reads back the results of a check written in the json or jsonl format.
+
+    Args:
+        stream (file): Text stream with the output of `aidocs check`
+
+    Yields:
+        dict: Result records, without the jsonl "type" key. jsonl input is
+        read line by line; a json document is parsed as a whole.
+
+    Raises:
+        ValueError: If the input is not check output, or if jsonl output
+            ends without its summary record, i.e. the run did not finish
+    """
+    first = stream.readline()
+    try:
+        record = json.loads(first)
+    except ValueError:
+        record = None
+    if not isinstance(record, dict) or "type" not in record:
+        document = json.loads(first + stream.read())
+        if not isinstance(document, dict) or "repos" not in document or "summary" not in document:
+            raise ValueError("not the output of aidocs check")
+        yield from document["repos"]
+        return
+
+    line = first
+    while line:
+        if line.strip():
+            record = json.loads(line)
+            kind = record.pop("type", None)
+            if kind == "repo":
+                yield record
+            elif kind == "summary":
+                return
+        line = stream.readline()
+    raise ValueError("output ends before its summary record; the check did not finish")
+
+
+def render_fixes(records, fmt="text", out=None):
+    """
+    Writes bulk fix records as they complete.
+
+    Args:
+        records (iterable): Records from fix.fix_repos
+        fmt (str): "text" or "jsonl"
+        out (file): Stream to write to, stdout by default
+
+    Returns:
+        dict: Summary record counting the records per status
+    """
+    if out is None:
+        out = sys.stdout
+    summary = {"type": "fix_summary", "fixed": 0, "failed": 0, "locked": 0, "planned": 0}
+    if fmt == "text":
+        out.write("\n")
+    for record in records:
+        summary[record["status"]] += 1
+        if fmt == "jsonl":
+            out.write(json.dumps(dict(type="fix", **record)) + "\n")
+        elif record["status"] == "planned":
+            out.write(f"Would fix: {record['path']}\n")
+            for action in record["actions"]:
+                out.write(f"  - {action}\n")
+        elif record["status"] == "fixed":
+            out.write(f"Fixed: {record['path']}\n")
+            if record.get("deduplicated"):
+                out.write(f"  - skipped duplicate content: {', '.join(record['deduplicated'])}\n")
+        else:
+            out.write(f"Could not fix {record['path']}: {record['error']}\n")
+        out.flush()
+
+    if fmt == "jsonl":
+        out.write(json.dumps(summary) + "\n")
+    elif summary["planned"]:
+        out.write(f"\nDry run: {summary['planned']} repositories would be changed.\n")
+    else:
+        out.write(f"\nFixed {summary['fixed']} repositories, "
+                  f"{summary['failed'] + summary['locked']} failed.\n")
+    out.flush()
+    return summary
+
+
+def render_builds(records, fmt="text", out=None):
+    """
+    Writes fragment build records as they complete.
+
+    Args:
+        records (iterable): Records from api.BuildResult.to_record
+        fmt (str): "text" or "jsonl"
+        out (file): Stream to write to, stdout by default
+
+    Returns:
+        dict: Summary record counting the records per status
+    """
+    if out is None:
+        out = sys.stdout
+    summary = {"type": "build_summary", "built": 0, "planned": 0, "unchanged": 0,
+               "cached": 0, "failed": 0}
+    for record in records:
+        summary[record["status"]] += 1
+        if fmt == "jsonl":
+            out.write(json.dumps(dict(type="build", **record)) + "\n")
+        elif record["status"] == "built":
+            out.write(f"Built: {record['path']} ({', '.join(record['fragments'])})\n")
+        elif record["status"] == "planned":
+            out.write(f"Would build: {record['path']} ({', '.join(record['fragments'])})\n")
+        elif record["status"] == "failed":
+            out.write(f"Could not build {record['path']}: {record['error']}\n")
+        else:
+            continue
+        out.flush()
+
+    if fmt == "jsonl":
+        out.write(json.dumps(summary) + "\n")
+    else:
+        built = (f"{summary['planned']} would be rebuilt" if summary["planned"]
+                 else f"Built {summary['built']}")
+        out.write(f"\n{built}, {summary['unchanged'] + summary['cached']} up to date, "
+                  f"{summary['failed']} failed.\n")
+    out.flush()
+    return summary
+
+
+def render_drift(records, fmt="text", out=None):
+    """
+    Writes template drift records as they arrive, then the fleet-wide
+    counts per template section.
+
+    Args:
+        records (iterable): Records from api.DriftReport.to_record
+        fmt (str): One of "text", "json" or "jsonl"
+        out (file): Stream to write to, stdout by default
+
+    Returns:
+        dict: The summary record: the number of repositories and, per
+        template heading, the number of repositories per section status
+
+    The text format lists the repositories with outdated sections or TODO
+    placeholders, followed by a table of the counts.
+    """
+    from .drift import STATUSES
+
+    if out is None:
+        out = sys.stdout
+    summary = {"type": "drift_summary", "repos": 0, "sections": {}}
+    separator = "\n  "
+    if fmt == "json":
+        out.write('{"repos": [')
+    elif fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    for record in records:
+        summary["repos"] += 1
+        for heading, status in record["sections"]:
+            counts = summary["sections"].setdefault(heading, dict.fromkeys(STATUSES, 0))
+            counts[status] += 1
+        if fmt == "jsonl":
+            out.write(json.dumps(dict(type="drift", **record)) + "\n")
+        elif fmt == "json":
+            out.write(separator + json.dumps(record))
+            separator = ",\n  "
+        else:
+            outdated = [heading or "(top)" for heading, status in record["sections"]
+                        if status == "outdated"]
+            if outdated or record["todo"]:
+                out.write(f"\n- Repository: {record['path']}\n")
+                if outdated:
+                    out.write(f"  Outdated: {', '.join(outdated)}\n")
+                if record["todo"]:
+                    todo = [heading or "(top)" for heading in record["todo"]]
+                    out.write(f"  TODO placeholders: {', '.join(todo)}\n")
+        out.flush()
+
+    if fmt == "jsonl":
+        out.write(json.dumps(summary) + "\n")
+    elif fmt == "json":
+        out.write(f'\n], "summary": {json.dumps(summary)}}}\n')
+    elif not summary["repos"]:
+        out.write("No aidocs.md files found.\n")
+    else:
+        headings = {heading: heading or "(top)" for heading in summary["sections"]}
+        width = max(len("Template section"), *(len(label) for label in headings.values()))
+        out.write(f"\nTemplate sections across {summary['repos']} repositories:\n")
+        out.write(f"  {'Template section':<{width}}" +
+                  "".join(f"  {status:>8}" for status in STATUSES) + "\n")
+        for heading, counts in summary["sections"].items():
+            out.write(f"  {headings[heading]:<{width}}" +
+                      "".join(f"  {counts[status]:>8}" for status in STATUSES) + "\n")
+    out.flush()
+    return summary
+
+
+def write_event(record, fmt="text", out=None):
+    """
+    Writes one `aidocs watch` event record.
+
+    Args:
+        record (dict): Event record from watch.Watcher
+        fmt (str): "text" or "jsonl"
+        out (file): Stream to write to, stdout by default
+    """
+    if out is None:
+        out = sys.stdout
+    if fmt == "jsonl":
+        out.write(json.dumps(record) + "\n")
+    elif record["event"] == "violation":
+        write_text_result(record, out)
+    elif record["event"] == "resolved":
+        out.write(f"\n+ Repository: {record['path']}\n  Compliant again\n")
+    else:
+        out.write(f"\n- Repository removed: {record['path']}\n")
+    out.flush()
@@ -0,0 +1,291 @@
+"""
+Full-text search over the fleet's aidocs.md files.
+
+Every aidocs.md is split into sections (see sections.py), and an inverted
+index from terms to sections is kept in an SQLite database under ~/.aidocs/.
+Updating the index stats each file: files whose size and mtime are unchanged
+are skipped, and files whose content hash is unchanged are not re-indexed,
+so a refresh of an unchanged fleet reads no file contents. Searching only
+reads the database, never the filesystem.
+
+Hits are ranked with BM25 over sections. A query term also matches the
+indexed terms it is a prefix of, so "convention" finds "conventions".
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+
+from .constants import REAL_FILENAME
+from .parallel import imap_unordered
+from .sections import split_sections
+
+SCHEMA_VERSION = 1
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+SNIPPET_LENGTH = 160
+
+_TERM = re.compile(r"\w\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    repo TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_file ON sections (file_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    section_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, section_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_section ON postings (section_id);
+"""
+
+
+def tokenize(text):
+    """
+    Returns the lower-cased words of at least two characters in a text.
+    """
+    return _TERM.findall(text.lower())
+
+
+class Hit:
+    """
+    One ranked search result.
+
+    Attributes:
+        repo (str): Repository root
+        path (str): The aidocs.md file
+        heading (str): Heading of the matching section ("" before the first)
+        line (int): Line of the heading
+        score (float): BM25 score; higher is better
+        snippet (str): The first line of the section that contains a
+            query term
+    """
+
+    __slots__ = ("repo", "path", "heading", "line", "score", "snippet")
+
+    def __init__(self, repo, heading, line, score, snippet):
+        self.repo = repo
+        self.path = os.path.join(repo, REAL_FILENAME)
+        self.heading = heading
+        self.line = line
+        self.score = score
+        self.snippet = snippet
+
+    def to_record(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Hit({self.path!r}, {self.heading!r}, score={self.score:.2f})"
+
+
+def _read(repo, known):
+    """
+    Reads one repository's aidocs.md if it changed since it was indexed.
+
+    Returns:
+        tuple: (repo, state, stat key, sha256, sections) where state is
+        "missing", "unchanged", "touched" (same content, new mtime) or
+        "changed"
+    """
+    path = os.path.join(repo, REAL_FILENAME)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return repo, "missing", None, None, None
+    key = (st.st_mtime_ns, st.st_size)
+    if known is not None and known[2:4] == key:
+        return repo, "unchanged", key, None, None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return repo, "missing", None, None, None
+    digest = hashlib.sha256(data).hexdigest()
+    if known is not None and known[4] == digest:
+        return repo, "touched", key, digest, None
+    return repo, "changed", key, digest, split_sections(data.decode("utf-8", "replace"))
+
+
+class SearchIndex:
+    """
+    The search database.
+
+    Args:
+        db_path (str): SQLite file; created with its directory if needed
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path)
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._db.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS files; "
+                                   "DROP TABLE IF EXISTS sections; DROP TABLE IF EXISTS postings;")
+        self._db.executescript(SCHEMA)
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _remove(self, file_id):
+        db = self._db
+        db.execute("DELETE FROM postings WHERE section_id IN "
+                   "(SELECT id FROM sections WHERE file_id = ?)", (file_id,))
+        db.execute("DELETE FROM sections WHERE file_id = ?", (file_id,))
+        db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add(self, repo, key, digest, sections):
+        db = self._db
+        file_id = db.execute("INSERT INTO files (repo, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                             (repo,) + key + (digest,)).lastrowid
+        for heading, line, body in sections:
+            terms = tokenize(heading) + tokenize(body)
+            section_id = db.execute(
+                "INSERT INTO sections (file_id, heading, line, length, body) VALUES (?, ?, ?, ?, ?)",
+                (file_id, heading, line, len(terms), body)).lastrowid
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            db.executemany("INSERT INTO postings (term, section_id, tf) VALUES (?, ?, ?)",
+                           ((term, section_id, tf) for term, tf in counts.items()))
+
+    def update(self, repos, roots=(), jobs=1):
+        """
+        Brings the index up to date with a set of repositories.
+
+        Args:
+            repos (iterable): Repository roots, consumed lazily
+            roots (list): Search roots the repositories were found under.
+                Indexed repositories below them that were not found are
+                dropped.
+            jobs (int): Number of files stat'ed, read and split concurrently
+
+        Returns:
+            dict: Number of files "added", "updated", "unchanged" and
+            "removed"
+        """
+        db = self._db
+        known = {row[1]: row for row in
+                 db.execute("SELECT id, repo, mtime_ns, size, sha256 FROM files")}
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        with db:
+            for repo, state, key, digest, sections in imap_unordered(
+                    lambda repo: _read(repo, known.get(repo)), repos, jobs):
+                seen.add(repo)
+                row = known.get(repo)
+                if state == "missing":
+                    if row is not None:
+                        self._remove(row[0])
+                        counts["removed"] += 1
+                elif state == "unchanged":
+                    counts["unchanged"] += 1
+                elif state == "touched":
+                    db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", key + (row[0],))
+                    counts["unchanged"] += 1
+                else:
+                    if row is not None:
+                        self._remove(row[0])
+                    self._add(repo, key, digest, sections)
+                    counts["updated" if row is not None else "added"] += 1
+
+            prefixes = tuple(os.path.join(root, "") for root in roots)
+            for repo, row in known.items():
+                if repo not in seen and (repo in roots or repo.startswith(prefixes)):
+                    self._remove(row[0])
+                    counts["removed"] += 1
+
+            sections, total = db.execute("SELECT count(*), sum(length) FROM sections").fetchone()
+            db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                           (("sections", sections), ("total_length", total or 0)))
+        return counts
+
+    def search(self, query, limit=10):
+        """
+        Finds the sections matching a query.
+
+        Args:
+            query (str): Words to look for; each also matches the indexed
+                words it is a prefix of
+            limit (int): Maximum number of hits
+
+        Returns:
+            list: Hit objects, best first
+        """
+        db = self._db
+        meta = dict(db.execute("SELECT key, value FROM meta"))
+        n = meta.get("sections") or 0
+        if not n:
+            return []
+        avg_length = (meta.get("total_length") or 0) / n or 1
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores = {}
+        for term in terms:
+            # The range selects every indexed term starting with this one.
+            matches = db.execute("SELECT section_id, sum(tf) FROM postings "
+                                 "WHERE term >= ? AND term < ? GROUP BY section_id",
+                                 (term, term + "\U0010ffff")).fetchall()
+            if not matches:
+                continue
+            idf = math.log(1 + (n - len(matches) + 0.5) / (len(matches) + 0.5))
+            for section_id, tf in matches:
+                scores.setdefault(section_id, []).append((idf, tf))
+        if not scores:
+            return []
+
+        lengths = {}
+        ids = list(scores)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            lengths.update(db.execute(
+                f"SELECT id, length FROM sections WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk))
+        ranked = []
+        for section_id, parts in scores.items():
+            norm = K1 * (1 - B + B * lengths[section_id] / avg_length)
+            ranked.append((sum(idf * tf * (K1 + 1) / (tf + norm) for idf, tf in parts),
+                           section_id))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        hits = []
+        for score, section_id in ranked[:limit]:
+            repo, heading, line, body = db.execute(
+                "SELECT files.repo, heading, line, body FROM sections "
+                "JOIN files ON files.id = sections.file_id WHERE sections.id = ?",
+                (section_id,)).fetchone()
+            hits.append(Hit(repo, heading, line, round(score, 4), _snippet(body, terms)))
+        return hits
+
+
+def _snippet(body, terms):
+    for line in body.splitlines():
+        words = tokenize(line)
+        if any(word.startswith(term) for word in words for term in terms):
+            line = line.strip()
+            return line if len(line) <= SNIPPET_LENGTH else line[:SNIPPET_LENGTH - 3] + "..."
+    return ""
@@ -0,0 +1,64 @@
+"""
+Markdown sections of aidocs.md files and templates.
+
+A section starts at a Markdown heading, or at a "--- Content from X ---"
+marker left by consolidation, and runs to the next one. Headings inside
+fenced code blocks do not count.
+"""
+import hashlib
+import re
+
+_HEADING = re.compile(r"(#{1,6})[ \t]+(.*?)[ \t#]*$")
+_MARKER = re.compile(r"--- (Content from .+) ---$")
+_FENCE = re.compile(r"(```|~~~)")
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.M)
+
+
+def split_sections(text):
+    """
+    Splits Markdown into sections at its headings.
+
+    Text before the first heading is a section with an empty heading.
+
+    Returns:
+        list: (heading, line, body) tuples; line is the 1-based line of the
+        heading
+    """
+    sections = []
+    heading, line, body = "", 1, []
+    fence = None
+    for number, raw in enumerate(text.splitlines(), 1):
+        stripped = raw.strip()
+        match = _FENCE.match(stripped)
+        if match:
+            if fence is None:
+                fence = match.group(1)
+            elif fence == match.group(1):
+                fence = None
+        elif fence is None:
+            match = _HEADING.match(stripped) or _MARKER.match(stripped)
+            if match:
+                if heading or any(part.strip() for part in body):
+                    sections.append((heading, line, "\n".join(body).strip()))
+                heading, line, body = match.group(match.lastindex), number, []
+                continue
+        body.append(raw)
+    if heading or any(part.strip() for part in body):
+        sections.append((heading, line, "\n".join(body).strip()))
+    return sections
+
+
+def normalize(body):
+    """
+    Returns a section body without trailing whitespace on its lines and
+    without leading or trailing blank lines, so that whitespace-only edits
+    do not change it.
+    """
+    return _TRAILING_SPACE.sub("", body.replace("\r\n", "\n")).strip("\n")
+
+
+def body_hash(body):
+    """
+    Returns the SHA-256 of a normalized section body.
+    """
+    return hashlib.sha256(normalize(body).encode("utf-8", "surrogateescape")).hexdigest()
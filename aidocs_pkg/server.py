@@ -0,0 +1,151 @@
+"""
+Compliance query server for `aidocs serve`.
+
+Keeps the compliance state of every repository below a search path in memory,
+kept current by a watch.Watcher, and answers queries over a Unix domain
+socket. The protocol is one JSON object per line in each direction:
+
+    {"op": "ping"}                        -> {"ok": true}
+    {"op": "status", "path": "/src/x/y"}  -> {"ok": true, "repo": {...}, "known": true}
+    {"op": "list", "non_compliant": true} -> {"ok": true, "repos": [...]}
+    {"op": "summary"}                     -> {"ok": true, "summary": {...}}
+
+Errors are reported as {"ok": false, "error": "..."}. A status query may name
+any path inside a repository; it is answered for the enclosing repository.
+Repositories outside the watched tree are inspected on demand.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from .compliance import inspect_repo
+from .report import add_to_summary, new_summary
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                response = self.server.state.answer(request)
+            except ValueError as e:
+                response = {"ok": False, "error": f"bad request: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ComplianceState:
+    """
+    Answers protocol requests from a Watcher's in-memory state.
+
+    Args:
+        watcher (watch.Watcher): Watcher whose status dict is queried
+    """
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def _find_repo(self, path):
+        path = os.path.abspath(path)
+        status = self.watcher.status
+        candidate = path
+        while True:
+            if candidate in status:
+                return status[candidate], True
+            parent = os.path.dirname(candidate)
+            if parent == candidate:
+                break
+            candidate = parent
+        # Not watched: find the enclosing repository on disk.
+        candidate = path
+        while True:
+            if os.path.exists(os.path.join(candidate, ".git")):
+                return inspect_repo(candidate, self.watcher.symlinks,
+                                    self.watcher.overrides), False
+            parent = os.path.dirname(candidate)
+            if parent == candidate:
+                return None, False
+            candidate = parent
+
+    def answer(self, request):
+        """
+        Returns the response object for one request.
+        """
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "status":
+            if not isinstance(request.get("path"), str):
+                return {"ok": False, "error": "status requires a path"}
+            repo, known = self._find_repo(request["path"])
+            if repo is None:
+                return {"ok": False, "error": f"not inside a git repository: {request['path']}"}
+            return {"ok": True, "repo": repo, "known": known}
+        if op == "list":
+            repos = list(self.watcher.status.values())
+            if request.get("non_compliant"):
+                repos = [repo for repo in repos if not repo["compliant"]]
+            return {"ok": True, "repos": repos}
+        if op == "summary":
+            summary = new_summary()
+            for repo in list(self.watcher.status.values()):
+                add_to_summary(summary, repo)
+            return {"ok": True, "summary": summary}
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+
+class ComplianceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server answering compliance queries.
+
+    Args:
+        socket_path (str): Path of the socket to listen on
+        watcher (watch.Watcher): Watcher holding the compliance state; it must
+            have completed its initial scan
+
+    Raises:
+        OSError: If another server is already listening on socket_path
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, watcher):
+        _remove_stale_socket(socket_path)
+        self.state = ComplianceState(watcher)
+        self.watcher = watcher
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def serve_forever(self, poll_interval=0.5):
+        """
+        Follows filesystem events in the background and serves requests.
+        """
+        thread = threading.Thread(target=self.watcher.run, daemon=True)
+        thread.start()
+        super().serve_forever(poll_interval)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise OSError(f"an aidocs server is already listening on {socket_path}")
+    finally:
+        probe.close()
@@ -0,0 +1,319 @@
+"""
+Tech-stack detection from the manifest files in a project root.
+
+Each known manifest (pyproject.toml, package.json, Cargo.toml, go.mod,
+requirements.txt, ...) yields its language, a version requirement when it
+states one, and the names of the direct dependencies it declares. Files are
+only read, never executed.
+
+Results are cached per repository in ~/.aidocs/stacks/, under the names,
+mtimes and sizes of the manifests that were present. A repository whose
+manifests are unchanged costs one directory listing, a stat per manifest
+and one small read, and one file per repository lets the worker processes
+of a bulk init detect stacks in parallel without sharing a cache file.
+"""
+import hashlib
+import json
+import os
+import re
+
+from .consolidate import write_json_atomic
+from .constants import STACKS_DIR
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+CACHE_VERSION = 1
+# Dependencies listed per manifest; the rest are counted.
+MAX_LISTED = 10
+
+_NAME = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_TOML_TABLE = re.compile(r"\s*\[([^\[\]]+)\]\s*(?:#.*)?$")
+_TOML_KEY = re.compile(r"""\s*["']?([A-Za-z0-9_.-]+)["']?\s*=\s*(.*)$""")
+_TOML_STRING = re.compile(r""""((?:[^"\\]|\\.)*)"|'([^']*)'""")
+
+
+def _dependency_names(specs):
+    names = []
+    for spec in specs:
+        match = _NAME.match(spec)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def _parse_toml(text):
+    """
+    Parses TOML with tomllib, or else reads just the tables and keys the
+    manifests below need: string values and arrays of strings, by table.
+    """
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except ValueError:
+            return {}
+    data = {}
+    table = data
+    lines = iter(text.splitlines())
+    for line in lines:
+        if line.lstrip().startswith("[["):
+            # Arrays of tables ([[bin]], ...) hold nothing needed here.
+            table = {}
+            continue
+        match = _TOML_TABLE.match(line)
+        if match:
+            table = data
+            for part in match.group(1).strip().split("."):
+                table = table.setdefault(part.strip().strip("\"'"), {})
+            continue
+        match = _TOML_KEY.match(line)
+        if not match:
+            continue
+        key, value = match.groups()
+        if value.startswith("["):
+            # Arrays of strings may span lines until the closing bracket.
+            while "]" not in re.sub(_TOML_STRING, "", value):
+                value += next(lines, "]")
+            table[key] = [a or b for a, b in _TOML_STRING.findall(value)]
+        else:
+            strings = _TOML_STRING.findall(value)
+            table[key] = (strings[0][0] or strings[0][1]) if strings else value.strip()
+    return data
+
+
+def _pyproject(text):
+    data = _parse_toml(text)
+    project = data.get("project", {})
+    poetry = data.get("tool", {}).get("poetry", {}).get("dependencies", {})
+    dependencies = _dependency_names(project.get("dependencies", []))
+    dependencies += [name for name in poetry if name.lower() != "python"]
+    version = project.get("requires-python") or poetry.get("python")
+    return {"language": "Python", "version": version if isinstance(version, str) else None,
+            "dependencies": dependencies}
+
+
+def _requirements(text):
+    specs = [line for line in (raw.split("#", 1)[0].strip() for raw in text.splitlines())
+             if line and not line.startswith("-")]
+    return {"language": "Python", "dependencies": _dependency_names(specs)}
+
+
+def _package_json(text):
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        return None
+    dependencies = list(data.get("dependencies") or {})
+    dev = data.get("devDependencies") or {}
+    typescript = "typescript" in dependencies or "typescript" in dev
+    engines = data.get("engines") or {}
+    version = engines.get("node") if isinstance(engines, dict) else None
+    return {"language": "TypeScript" if typescript else "JavaScript",
+            "version": f"node {version}" if isinstance(version, str) else None,
+            "dependencies": dependencies}
+
+
+def _cargo(text):
+    data = _parse_toml(text)
+    package = data.get("package", {})
+    version = package.get("rust-version") or package.get("edition")
+    return {"language": "Rust", "version": version if isinstance(version, str) else None,
+            "dependencies": list(data.get("dependencies", {}))}
+
+
+def _go_mod(text):
+    version, dependencies, in_block = None, [], False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("go "):
+            version = line[3:].strip()
+        elif line.startswith("require ("):
+            in_block = True
+        elif in_block and line.startswith(")"):
+            in_block = False
+        elif (in_block or line.startswith("require ")) and "// indirect" not in line:
+            fields = line.split()
+            if line.startswith("require "):
+                fields = fields[1:]
+            if len(fields) >= 2:
+                dependencies.append(fields[0])
+    return {"language": "Go", "version": version, "dependencies": dependencies}
+
+
+def _gemfile(text):
+    return {"language": "Ruby",
+            "dependencies": re.findall(r"""^\s*gem\s+["']([^"']+)["']""", text, re.M)}
+
+
+def _composer(text):
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        return None
+    require = data.get("require") or {}
+    version = require.get("php") if isinstance(require, dict) else None
+    return {"language": "PHP", "version": version if isinstance(version, str) else None,
+            "dependencies": [name for name in require if "/" in name]}
+
+
+def _pom(text):
+    blocks = re.findall(r"<dependency>(.*?)</dependency>", text, re.S)
+    names = [re.search(r"<artifactId>\s*([^<\s]+)", block) for block in blocks]
+    return {"language": "Java", "dependencies": [m.group(1) for m in names if m]}
+
+
+_GRADLE_DEPENDENCY = re.compile(
+    r"""\b(?:implementation|api|compileOnly|runtimeOnly)\s*\(?\s*["'][^:"']+:([^:"']+)""")
+
+
+def _gradle(language):
+    def parse(text):
+        return {"language": language, "dependencies": _GRADLE_DEPENDENCY.findall(text)}
+    return parse
+
+
+def _marker(language):
+    return lambda text: {"language": language}
+
+
+# Manifest file: parser of its text. The first language found is the
+# project's main language.
+MANIFESTS = (
+    ("Cargo.toml", _cargo),
+    ("go.mod", _go_mod),
+    ("tsconfig.json", _marker("TypeScript")),
+    ("package.json", _package_json),
+    ("pyproject.toml", _pyproject),
+    ("setup.py", _marker("Python")),
+    ("requirements.txt", _requirements),
+    ("pom.xml", _pom),
+    ("build.gradle", _gradle("Java")),
+    ("build.gradle.kts", _gradle("Kotlin")),
+    ("Gemfile", _gemfile),
+    ("composer.json", _composer),
+    ("mix.exs", _marker("Elixir")),
+    ("Package.swift", _marker("Swift")),
+    ("CMakeLists.txt", _marker("C++")),
+)
+_PARSERS = dict(MANIFESTS)
+_ORDER = {name: i for i, (name, _) in enumerate(MANIFESTS)}
+
+
+def _manifests(repo_path):
+    """
+    Returns [name, mtime_ns, size] for each manifest present, in MANIFESTS
+    order.
+    """
+    found = []
+    try:
+        with os.scandir(repo_path) as it:
+            for entry in it:
+                if entry.name in _PARSERS:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    found.append([entry.name, st.st_mtime_ns, st.st_size])
+    except OSError:
+        pass
+    found.sort(key=lambda manifest: _ORDER[manifest[0]])
+    return found
+
+
+def parse_manifests(repo_path, names):
+    """
+    Parses manifest files.
+
+    Args:
+        repo_path (str): Project root
+        names (list): Manifest file names present in it
+
+    Returns:
+        list: One entry per readable manifest, a dict with the keys
+        manifest, language, version (or None) and dependencies
+    """
+    stack = []
+    for name in names:
+        try:
+            with open(os.path.join(repo_path, name), "r", encoding="utf-8", errors="replace") as f:
+                entry = _PARSERS[name](f.read())
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Unreadable, or not shaped like the manifest it is named after.
+            continue
+        if entry is None:
+            continue
+        entry.setdefault("version", None)
+        entry.setdefault("dependencies", [])
+        entry["manifest"] = name
+        stack.append(entry)
+    return stack
+
+
+def _cache_path(repo_path, cache_dir):
+    key = hashlib.sha1(os.path.realpath(repo_path).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def detect_stack(repo_path, cache_dir=None):
+    """
+    Detects a project's tech stack, reusing the cached result while its
+    manifests are unchanged.
+
+    Args:
+        repo_path (str): Project root
+        cache_dir (str): Directory of the per-repository cache files,
+            STACKS_DIR by default
+
+    Returns:
+        list: parse_manifests entries, main language first
+    """
+    if cache_dir is None:
+        cache_dir = STACKS_DIR
+    manifests = _manifests(repo_path)
+    path = _cache_path(repo_path, cache_dir)
+    try:
+        with open(path, "r") as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION and cached.get("manifests") == manifests:
+            return cached["stack"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    stack = parse_manifests(repo_path, [name for name, _, _ in manifests])
+    try:
+        write_json_atomic(path, {"version": CACHE_VERSION, "manifests": manifests,
+                                 "stack": stack})
+    except OSError:
+        # Detection itself succeeded.
+        pass
+    return stack
+
+
+def main_language(stack):
+    """
+    Returns the language of the first manifest, or None.
+    """
+    return stack[0]["language"] if stack else None
+
+
+def format_stack(stack):
+    """
+    Renders a stack as a Markdown bullet list, one line per manifest, e.g.
+    "- Python >=3.9 (pyproject.toml): fastapi, pydantic".
+
+    Returns:
+        str: The list, or "" for an empty stack
+    """
+    lines = []
+    for entry in stack:
+        line = f"- {entry['language']}"
+        if entry["version"]:
+            line += f" {entry['version']}"
+        line += f" ({entry['manifest']})"
+        dependencies = list(dict.fromkeys(entry["dependencies"]))
+        if dependencies:
+            line += ": " + ", ".join(dependencies[:MAX_LISTED])
+            if len(dependencies) > MAX_LISTED:
+                line += f" and {len(dependencies) - MAX_LISTED} more"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""
+Phase timing and counters for the global `--stats` flag.
+
+Nothing here runs unless --stats is given: instead of checking a flag on every
+directory or repository, the CLI wraps the functions at the pipeline's seams
+(directory listing, inspection, output stream, file opening) only when a
+Stats object is active. This module is imported by every command, so it
+imports nothing beyond what the interpreter has already loaded at startup.
+"""
+import builtins
+import sys
+import time
+
+PHASES = ("config", "discovery", "inspection", "output")
+COUNTERS = ("dirs_visited", "repos_found", "files_read", "bytes_written")
+
+# The Stats instance of the running command, or None when --stats is off.
+ACTIVE = None
+
+
+class _CountingWriter:
+    """
+    Text stream proxy that times writes and counts the bytes written.
+    """
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    def write(self, text):
+        start = time.perf_counter()
+        written = self._stream.write(text)
+        self._stats.add_time("output", time.perf_counter() - start)
+        encoding = getattr(self._stream, "encoding", None) or "utf-8"
+        self._stats.count("bytes_written", len(text.encode(encoding, "replace")))
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _Phase:
+    """
+    Context manager adding the time spent in its block to a phase.
+    """
+
+    def __init__(self, stats, name):
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._stats.add_time(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Stats:
+    """
+    Collects per-phase times and counters for one command.
+
+    Phase times are summed over all threads, so with parallel discovery and
+    inspection they can add up to more than the wall-clock total.
+    """
+
+    def __init__(self):
+        import threading
+
+        self.started = time.perf_counter()
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+        self._saved = None
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.times[phase] += seconds
+
+    def count(self, counter, n=1):
+        with self._lock:
+            self.counters[counter] += n
+
+    def phase(self, name):
+        """
+        Times the enclosed block as part of a phase.
+        """
+        return _Phase(self, name)
+
+    def timed(self, phase, func, counter=None):
+        """
+        Wraps func so that its calls are timed and optionally counted.
+
+        Args:
+            phase (str): Phase the calls belong to
+            func (callable): Function to wrap
+            counter (str): Counter incremented once per call
+        """
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(phase, time.perf_counter() - start)
+                if counter is not None:
+                    self.count(counter)
+
+        return wrapper
+
+    def install(self):
+        """
+        Starts counting files read and bytes written to stdout.
+        """
+        real_open = builtins.open
+
+        def counting_open(file, mode="r", *args, **kwargs):
+            if "r" in mode and "+" not in mode:
+                self.count("files_read")
+            return real_open(file, mode, *args, **kwargs)
+
+        self._saved = (real_open, sys.stdout)
+        builtins.open = counting_open
+        sys.stdout = _CountingWriter(sys.stdout, self)
+
+    def uninstall(self):
+        if self._saved is not None:
+            builtins.open, sys.stdout = self._saved
+            self._saved = None
+
+    def report(self, out=None):
+        """
+        Writes the collected times and counters, to stderr by default.
+        """
+        if out is None:
+            out = sys.stderr
+        total = time.perf_counter() - self.started
+        out.write("\naidocs stats (phase times are summed over worker threads):\n")
+        for phase in PHASES:
+            out.write(f"  {phase:<16}{self.times[phase]:>12.4f} s\n")
+        out.write(f"  {'total (wall)':<16}{total:>12.4f} s\n")
+        for counter in COUNTERS:
+            out.write(f"  {counter.replace('_', ' '):<16}{self.counters[counter]:>12}\n")
+        out.flush()
@@ -0,0 +1,66 @@
+"""
+Counting of filesystem calls made through the os module.
+
+Used by `aidocs check --count-syscalls` to show how many filesystem calls each
+repository inspection costs. os.path helpers such as exists, lexists and
+islink are built on os.stat and os.lstat, so they are counted too. Stats that
+DirEntry performs internally, which only happen when the filesystem does not
+report entry types, are not visible at this level.
+"""
+import os
+import threading
+
+COUNTED_FUNCTIONS = ("stat", "lstat", "scandir", "listdir", "readlink", "open", "access")
+
+
+class SyscallCounter:
+    """
+    Counts os-level filesystem calls per thread while installed.
+
+    Use as a context manager to install the counting wrappers, then call
+    measure() from any thread to count the calls made by one function call.
+    Threads that are not inside measure() are not counted.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._originals = {}
+
+    def __enter__(self):
+        for name in COUNTED_FUNCTIONS:
+            original = getattr(os, name)
+            self._originals[name] = original
+            setattr(os, name, self._wrap(original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+        self._originals.clear()
+
+    def _wrap(self, original):
+        local = self._local
+
+        def counted(*args, **kwargs):
+            counts = getattr(local, "counts", None)
+            if counts is not None:
+                counts[original.__name__] = counts.get(original.__name__, 0) + 1
+            return original(*args, **kwargs)
+
+        counted.__name__ = original.__name__
+        counted.__doc__ = original.__doc__
+        return counted
+
+    def measure(self, func, *args, **kwargs):
+        """
+        Calls func and counts the filesystem calls it makes in this thread.
+
+        Returns:
+            tuple: (result, counts) where counts maps each os function name
+            to the number of times it was called
+        """
+        self._local.counts = counts = {}
+        try:
+            return func(*args, **kwargs), counts
+        finally:
+            self._local.counts = None
@@ -0,0 +1,121 @@
+"""
+Compiled templates for new aidocs.md files.
+
+A template is Markdown with `{{ variable }}` placeholders, for example
+`# {{ project_name }}`. Compiling splits it once into literal text and
+variable names, so rendering is a join, and compiled templates are cached
+under the template file's path, mtime and size: a bulk init reads and
+parses each template once, however many repositories it renders.
+
+The default template is ~/.aidocs/template.md; named templates live in
+~/.aidocs/templates/<name>.md and are selected with a "template" setting or
+`aidocs init --template NAME`.
+"""
+import os
+import re
+
+from .constants import TEMPLATES_DIR
+
+VARIABLES = ("project_name", "repo_path", "default_branch", "language", "tech_stack")
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*\Z")
+
+
+class TemplateError(ValueError):
+    """
+    Raised when a template does not exist or its name is invalid.
+    """
+
+
+class Template:
+    """
+    A parsed template.
+
+    Args:
+        text (str): Template source
+
+    Placeholders naming anything but VARIABLES are not variables: they are
+    kept as literal text, like the rest of the template.
+    """
+
+    __slots__ = ("parts", "names")
+
+    def __init__(self, text):
+        # Literal text at even indices, variable names at odd ones.
+        parts = [""]
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            if match.group(1) in VARIABLES:
+                parts[-1] += text[position:match.start()]
+                parts.extend((match.group(1), ""))
+                position = match.end()
+        parts[-1] += text[position:]
+        self.parts = parts
+        self.names = frozenset(parts[1::2])
+
+    def render(self, variables):
+        """
+        Fills in the placeholders.
+
+        Args:
+            variables (dict): Variable name mapped to its value, or to a
+                function of no arguments returning it. Each variable the
+                template uses is computed once.
+
+        Returns:
+            str: The rendered text
+        """
+        values = {}
+        for name in self.names:
+            value = variables[name]
+            values[name] = str(value() if callable(value) else value)
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+
+def template_path(name):
+    """
+    Returns the file of a named template.
+
+    Raises:
+        TemplateError: If the name is not a plain file name
+    """
+    if not _NAME.match(name):
+        raise TemplateError(f"invalid template name {name!r}")
+    return os.path.join(TEMPLATES_DIR, f"{name}.md")
+
+
+class TemplateCache:
+    """
+    Compiled templates, reused while their files are unchanged.
+    """
+
+    def __init__(self):
+        # Path: ((mtime_ns, size), Template)
+        self._templates = {}
+
+    def load(self, path):
+        """
+        Returns the compiled template in a file.
+
+        Raises:
+            TemplateError: If the file does not exist
+            OSError: If the file cannot be read
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise TemplateError(f"template not found: {path}")
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._templates.get(path)
+        if cached is None or cached[0] != key:
+            with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                text = f.read()
+            cached = self._templates[path] = (key, Template(text))
+        return cached[1]
+
+
+CACHE = TemplateCache()
@@ -0,0 +1,125 @@
+"""
+Token estimates for aidocs.md files.
+
+Everything in aidocs.md is sent with every assistant request, so its size in
+tokens is latency and cost. There is no tokenizer in the standard library;
+estimate_tokens approximates the byte-pair encodings assistants use closely
+enough to compare files and enforce a budget.
+
+Estimates are cached in ~/.aidocs/tokens.json by SHA-256 of the content,
+and each file's hash under its path, mtime and size. An unchanged file costs
+the stat its inspection makes anyway; a file that was only touched, or that
+has the same content as another repository's, is hashed but not estimated
+again.
+"""
+import hashlib
+import json
+import os
+import re
+
+from .consolidate import write_json_atomic
+
+CACHE_VERSION = 1
+
+# Words, groups of up to three digits, runs of other visible characters and
+# line breaks, roughly the pieces byte-pair encoders split text into first.
+_PIECE = re.compile(r"[A-Za-z]+|[0-9]{1,3}|[^\sA-Za-z0-9]+|\n+")
+
+
+def estimate_tokens(text):
+    """
+    Estimates how many tokens a text is.
+
+    Common words are one token and longer ones one per eight letters,
+    punctuation runs one per two characters, and characters outside ASCII
+    one each.
+
+    Returns:
+        int: The estimate
+    """
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        first = piece[0]
+        if first == "\n" or first.isdigit():
+            tokens += 1
+        elif first.isascii() and first.isalpha():
+            tokens += (len(piece) + 7) // 8
+        else:
+            other = sum(1 for c in piece if not c.isascii())
+            tokens += other + (len(piece) - other + 1) // 2
+    return tokens
+
+
+class TokenCache:
+    """
+    Token estimates of files, reused while a file or its content is
+    unchanged.
+
+    Args:
+        path (str): Cache file; read now, written by save
+
+    Estimates may be requested from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # File path: [mtime_ns, size, sha256]
+        self._files = {}
+        # sha256: estimated tokens
+        self._estimates = {}
+        self._dirty = False
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self._files = data["files"]
+                self._estimates = data["estimates"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    def estimate(self, path, st):
+        """
+        Returns a file's estimated tokens.
+
+        Args:
+            path (str): The file
+            st (os.stat_result): Its current stat
+
+        Returns:
+            int: The estimate, or None if the file cannot be read
+        """
+        known = self._files.get(path)
+        if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            tokens = self._estimates.get(known[2])
+            if tokens is not None:
+                return tokens
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        tokens = self._estimates.get(digest)
+        if tokens is None:
+            tokens = estimate_tokens(data.decode("utf-8", "replace"))
+            self._estimates[digest] = tokens
+        self._files[path] = [st.st_mtime_ns, st.st_size, digest]
+        self._dirty = True
+        return tokens
+
+    def save(self):
+        """
+        Writes the cache if anything was added, dropping estimates no file
+        refers to any more. A failed write only costs re-estimating later.
+        """
+        if not self._dirty:
+            return
+        used = set(entry[2] for entry in self._files.values())
+        estimates = {digest: tokens for digest, tokens in self._estimates.items()
+                     if digest in used}
+        try:
+            write_json_atomic(self.path, {"version": CACHE_VERSION, "files": self._files,
+                                          "estimates": estimates})
+        except OSError:
+            pass
+        self._dirty = False
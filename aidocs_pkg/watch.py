@@ -0,0 +1,336 @@
+"""
+Live compliance tracking for `aidocs watch`.
+
+After one initial scan, the watcher subscribes to directory change events and
+only re-inspects a repository when aidocs.md, one of its configured links,
+its .aidocs.json or its .git entry changes, or when a new directory appears.
+Events come from inotify on Linux and from periodic mtime polling elsewhere;
+polling sees files being created, removed or renamed, but not rewritten in
+place.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from .compliance import inspect_repo
+from .constants import DEFAULT_JOBS, PROJECT_CONFIG_FILE, REAL_FILENAME
+from .discovery import VisitedSet, scan_directory, stop_at_repos, walk
+from .prune import Pruner
+
+# Event kinds reported by the backends.
+CHANGED = "changed"
+CREATED_DIR = "created_dir"
+GONE = "gone"
+OVERFLOW = "overflow"
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _entry_names(symlinks):
+    """
+    Returns the entries of a repository's root that hold the given links.
+    """
+    return {link_name.replace(os.sep, "/").split("/")[0] for link_name in symlinks}
+
+
+class InotifyBackend:
+    """
+    Directory watches backed by Linux inotify, called through ctypes.
+
+    Raises:
+        OSError: If inotify is unavailable on this system
+    """
+
+    MASK = (IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._lock = threading.Lock()
+        self._paths = {}
+
+    def add(self, path):
+        """
+        Starts watching a directory.
+
+        Raises:
+            OSError: If the watch cannot be added, e.g. when the
+                fs.inotify.max_user_watches limit is reached
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        with self._lock:
+            self._paths[wd] = path
+
+    def read_events(self, timeout=None):
+        """
+        Waits for events and returns them as (path, name, kind) tuples.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self._fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0")) or None
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, None, OVERFLOW))
+                continue
+            with self._lock:
+                path = self._paths.get(wd)
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+            if path is None or mask & IN_IGNORED:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                events.append((path, None, GONE))
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                events.append((path, name, CREATED_DIR))
+            else:
+                events.append((path, name, CHANGED))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """
+    Directory watches emulated by comparing directory mtimes periodically.
+
+    Args:
+        interval (float): Seconds between two polls
+
+    Each poll costs one stat per watched directory. A changed directory is
+    reported without an entry name, so the watcher re-reads its listing.
+    """
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._mtimes = {}
+
+    def add(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            self._mtimes[path] = mtime
+
+    def read_events(self, timeout=None):
+        delay = self.interval if timeout is None else min(timeout, self.interval)
+        time.sleep(delay)
+        events = []
+        with self._lock:
+            watched = list(self._mtimes.items())
+        for path, mtime in watched:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                with self._lock:
+                    self._mtimes.pop(path, None)
+                events.append((path, None, GONE))
+                continue
+            if current != mtime:
+                with self._lock:
+                    self._mtimes[path] = current
+                events.append((path, None, CHANGED))
+        return events
+
+    def close(self):
+        pass
+
+
+def default_backend(poll_interval=None):
+    """
+    Returns an inotify backend when possible, a polling backend otherwise.
+
+    Args:
+        poll_interval (float): Force polling with this interval in seconds
+    """
+    if poll_interval is None:
+        try:
+            return InotifyBackend()
+        except OSError:
+            poll_interval = 2.0
+    return PollingBackend(poll_interval)
+
+
+class Watcher:
+    """
+    Keeps the compliance state of every repository below a search path.
+
+    Args:
+        search_path (str): Path to watch for git repositories
+        symlinks (list): Link names that must point to aidocs.md
+        emit (callable): Called with an event record whenever a repository
+            becomes non-compliant, compliant again, or disappears
+        backend: InotifyBackend or PollingBackend instance
+        jobs (int): Number of directories listed concurrently during scans
+        overrides (callable): Per-repository link names, see
+            compliance.inspect_repo and api.link_overrides
+        exclude (iterable): Exclusion patterns relative to search_path, as
+            in the "exclude" setting
+
+    Directories are walked like `aidocs check` walks them: excluded
+    directories and the inside of repositories are skipped, so only the
+    repository roots and the directories above them are watched.
+
+    Event records are inspect_repo results with two extra keys: "type" is
+    "repo" and "event" is "violation", "resolved" or "removed".
+    """
+
+    def __init__(self, search_path, symlinks, emit, backend, jobs=DEFAULT_JOBS, overrides=None,
+                 exclude=()):
+        self.search_path = search_path
+        self.symlinks = symlinks
+        self.emit = emit
+        self.backend = backend
+        self.jobs = jobs
+        self.overrides = overrides
+        self.status = {}
+        self.watched = set()
+        self.warnings = []
+        self._visited = VisitedSet()
+        self._pruner = Pruner(search_path, stop_at_repos(self._visit), exclude)
+        # Entry names whose changes can affect a repository's compliance.
+        self._relevant = {".git", REAL_FILENAME, PROJECT_CONFIG_FILE}
+        self._relevant.update(_entry_names(symlinks))
+        # Repository path: entry names of links its .aidocs.json adds.
+        self._own_links = {}
+
+    def _visit(self, path):
+        try:
+            if not self._visited.claim(os.stat(path)):
+                return False, []
+        except OSError:
+            return False, []
+        # Watch before listing so entries created in between are not missed.
+        if path not in self.watched:
+            try:
+                self.backend.add(path)
+                self.watched.add(path)
+            except OSError as e:
+                self.warnings.append(f"Could not watch {path}: {e}")
+        return scan_directory(path)
+
+    def _scan(self, path, jobs):
+        # Each scan starts afresh, so a rescan lists directories again.
+        self._visited = VisitedSet()
+        for dir_path, is_repo in walk(path, self._pruner.visit, jobs):
+            if is_repo:
+                self._update(dir_path)
+
+    def _links(self, repo_path):
+        symlinks = self.overrides(repo_path)
+        self._own_links[repo_path] = _entry_names(symlinks) - self._relevant
+        return symlinks
+
+    def _update(self, repo_path):
+        self._own_links.pop(repo_path, None)
+        overrides = self._links if self.overrides is not None else None
+        result = inspect_repo(repo_path, self.symlinks, overrides)
+        previous = self.status.get(repo_path)
+        self.status[repo_path] = result
+        if result["compliant"]:
+            if previous is not None and not previous["compliant"]:
+                self.emit(dict(type="repo", event="resolved", **result))
+        elif previous is None or previous != result:
+            self.emit(dict(type="repo", event="violation", **result))
+
+    def _remove(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for repo_path in [p for p in self.status if p == path or p.startswith(prefix)]:
+            result = self.status.pop(repo_path)
+            self._own_links.pop(repo_path, None)
+            self.emit(dict(type="repo", event="removed", **result))
+        self.watched.difference_update([p for p in self.watched if p == path or p.startswith(prefix)])
+
+    def scan(self):
+        """
+        Runs the initial scan, emitting every non-compliant repository.
+        """
+        self._scan(self.search_path, self.jobs)
+
+    def handle(self, path, name, kind):
+        """
+        Applies one backend event to the compliance state.
+        """
+        if kind == OVERFLOW:
+            # Events were dropped; only a rescan restores a consistent state.
+            self._scan(self.search_path, self.jobs)
+            return
+        if kind == GONE:
+            self._remove(path)
+            return
+        if kind == CREATED_DIR and name != ".git":
+            new_dir = os.path.join(path, name)
+            # Nothing inside a repository or an excluded directory is walked.
+            if path not in self.status and not self._pruner.excluded(new_dir):
+                self._scan(new_dir, 1)
+            return
+        if name is not None and name not in self._relevant and \
+                name not in self._own_links.get(path, ()):
+            return
+
+        if name is None or name == ".git":
+            is_repo, subdirs = scan_directory(path)
+            if not is_repo:
+                # Polling does not say what changed, and a former repository
+                # was never walked: pick up the directories not watched yet.
+                for subdir in subdirs:
+                    if subdir not in self.watched and not self._pruner.excluded(subdir):
+                        self._scan(subdir, 1)
+                if path in self.status:
+                    self._own_links.pop(path, None)
+                    self.emit(dict(type="repo", event="removed", **self.status.pop(path)))
+                return
+        elif path not in self.status:
+            return
+        self._update(path)
+
+    def process(self, timeout=None):
+        """
+        Waits for one batch of events and handles it.
+
+        Returns:
+            int: Number of events handled
+        """
+        events = self.backend.read_events(timeout)
+        for path, name, kind in events:
+            self.handle(path, name, kind)
+        return len(events)
+
+    def run(self):
+        """
+        Handles events until interrupted.
+        """
+        while True:
+            self.process()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compares os.walk based repository discovery with aidocs_pkg.discovery.
+
+Builds a synthetic tree of repositories in a temporary directory, times the
+legacy walk and the scandir engine at several job counts, and checks that
+every run finds the same set of repositories.
+
+Usage:
+    python benchmarks/bench_discovery.py [--repos N] [--depth D] [--fanout F]
+                                         [--latency MS]
+
+--latency adds a fixed delay to every directory listing to approximate a
+network filesystem, where each listing is a round trip to the server.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aidocs_pkg.discovery import find_repos  # noqa: E402
+from benchmarks.fleet import generate_fleet  # noqa: E402
+
+
+def legacy_find_repos(search_path):
+    found = []
+    for root, dirs, files in os.walk(search_path):
+        if ".git" in dirs:
+            found.append(root)
+            dirs.remove(".git")
+    return found
+
+
+def add_listing_latency(seconds):
+    real_scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(seconds)
+        return real_scandir(path)
+
+    os.scandir = slow_scandir
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repos", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Milliseconds added to each directory listing")
+    parser.add_argument("--dir", help="Reuse or create the tree here instead of a temp dir")
+    args = parser.parse_args()
+
+    base = args.dir or tempfile.mkdtemp(prefix="aidocs-bench-")
+    try:
+        if not os.listdir(base):
+            print(f"Building {args.repos} repositories under {base}...")
+            generate_fleet(base, repos=args.repos, depth=args.depth, fanout=args.fanout)
+
+        if args.latency:
+            add_listing_latency(args.latency / 1000.0)
+
+        baseline, expected = timed(lambda: legacy_find_repos(base))
+        expected = set(expected)
+        print(f"{'engine':<24}{'seconds':>10}{'speedup':>10}")
+        print(f"{'os.walk':<24}{baseline:>10.3f}{1.0:>10.2f}")
+        for jobs in args.jobs:
+            elapsed, found = timed(lambda: set(find_repos(base, jobs)))
+            if found != expected:
+                print(f"Mismatch with --jobs {jobs}: {len(found)} != {len(expected)} repos")
+                sys.exit(1)
+            print(f"{f'scandir --jobs {jobs}':<24}{elapsed:>10.3f}{baseline / elapsed:>10.2f}")
+    finally:
+        if not args.dir:
+            shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main()
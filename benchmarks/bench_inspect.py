@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compares the filesystem calls made by per-repository inspection.
+
+Builds repositories in every state check reports (compliant, missing
+aidocs.md, missing links, regular files instead of links, wrong link targets)
+and counts the os-level calls of the original os.path based inspection and of
+aidocs_pkg.compliance.inspect_repo.
+
+Usage:
+    python benchmarks/bench_inspect.py [--repos N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aidocs_pkg.compliance import inspect_repo  # noqa: E402
+from aidocs_pkg.constants import DEFAULT_CONFIG, REAL_FILENAME  # noqa: E402
+from aidocs_pkg.syscalls import SyscallCounter  # noqa: E402
+
+SYMLINKS = DEFAULT_CONFIG["symlinks"]
+
+
+def legacy_inspect_repo(repo_path, symlinks):
+    real_file_path = os.path.join(repo_path, REAL_FILENAME)
+    if not os.path.exists(real_file_path):
+        return False
+    missing_links = []
+    invalid_links = []
+    for link_name in symlinks:
+        link_path = os.path.join(repo_path, link_name)
+        if not os.path.lexists(link_path):
+            missing_links.append(link_name)
+        elif not os.path.islink(link_path) or os.readlink(link_path) != REAL_FILENAME:
+            invalid_links.append(link_name)
+    return not (missing_links or invalid_links)
+
+
+def build_repos(base, count):
+    kinds = ["compliant", "missing_file", "missing_links", "regular_files", "wrong_target"]
+    repos = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        repo = os.path.join(base, f"{kind}{i}")
+        os.makedirs(os.path.join(repo, ".git"))
+        for n in range(20):
+            open(os.path.join(repo, f"file{n}.txt"), "w").close()
+        if kind != "missing_file":
+            open(os.path.join(repo, REAL_FILENAME), "w").close()
+        for link_name in SYMLINKS:
+            path = os.path.join(repo, link_name)
+            if kind == "compliant":
+                os.symlink(REAL_FILENAME, path)
+            elif kind == "regular_files":
+                open(path, "w").close()
+            elif kind == "wrong_target":
+                os.symlink("other.md", path)
+        repos.append(repo)
+    return repos
+
+
+def measure(func, repos):
+    calls = 0
+    with SyscallCounter() as counter:
+        start = time.perf_counter()
+        for repo in repos:
+            _, counts = counter.measure(func, repo, SYMLINKS)
+            calls += sum(counts.values())
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repos", type=int, default=1000)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="aidocs-bench-")
+    try:
+        repos = build_repos(base, args.repos)
+        print(f"{'inspection':<14}{'calls/repo':>12}{'seconds':>10}")
+        for name, func in [("os.path", legacy_inspect_repo), ("scandir", inspect_repo)]:
+            calls, elapsed = measure(func, repos)
+            print(f"{name:<14}{calls / len(repos):>12.2f}{elapsed:>10.3f}")
+    finally:
+        shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Synthetic repository fleet generator for the aidocs benchmarks.
+
+Builds a directory tree of git repositories in every compliance state, with
+large non-repository directories (node_modules style) mixed in, so that
+benchmarks exercise the same paths as a real workspace.
+"""
+import os
+
+REAL_FILENAME = "aidocs.md"
+SYMLINKS = ("GEMINI.md", "CLAUDE.md")
+
+# Repository states, assigned round-robin according to their weights.
+STATES = (
+    ("compliant", 5),
+    ("missing_file", 1),
+    ("missing_links", 1),
+    ("broken_links", 1),
+    ("wrong_target", 1),
+    ("regular_files", 1),
+)
+
+
+def _state_cycle():
+    cycle = []
+    for state, weight in STATES:
+        cycle.extend([state] * weight)
+    return cycle
+
+
+def _touch(path, content=""):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _make_noise(base, width, depth, files):
+    """
+    Creates a width**depth directory tree, like an installed node_modules.
+    """
+    level = [base]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(width):
+                path = os.path.join(parent, f"pkg{i}")
+                os.makedirs(path)
+                for n in range(files):
+                    _touch(os.path.join(path, f"index{n}.js"))
+                next_level.append(path)
+        level = next_level
+
+
+def _make_repo(repo, state, src_dirs, files):
+    os.makedirs(os.path.join(repo, ".git", "objects"))
+    _touch(os.path.join(repo, ".git", "HEAD"), "ref: refs/heads/main\n")
+    _touch(os.path.join(repo, "README.md"), "# Project\n")
+    for d in range(src_dirs):
+        src = os.path.join(repo, f"src{d}")
+        os.makedirs(src)
+        for n in range(files):
+            _touch(os.path.join(src, f"module{n}.py"))
+
+    if state != "missing_file":
+        _touch(os.path.join(repo, REAL_FILENAME), "# AI Assistant Instructions\n")
+    if state in ("missing_file", "missing_links"):
+        return
+    for link_name in SYMLINKS:
+        path = os.path.join(repo, link_name)
+        if state == "compliant":
+            os.symlink(REAL_FILENAME, path)
+        elif state == "broken_links":
+            os.symlink("deleted.md", path)
+        elif state == "wrong_target":
+            os.symlink("README.md", path)
+        elif state == "regular_files":
+            _touch(path, f"Notes for {link_name}\n")
+
+
+def generate_fleet(base, repos=1000, depth=2, fanout=8, src_dirs=3, files=5,
+                   node_modules_every=10, node_modules_width=4, node_modules_depth=2,
+                   noise_dirs=0):
+    """
+    Creates a synthetic fleet of repositories below base.
+
+    Args:
+        base (str): Existing, empty directory to build the fleet in
+        repos (int): Number of repositories
+        depth (int): Number of grouping directories above each repository
+        fanout (int): Number of grouping directories per level
+        src_dirs (int): Source directories inside each repository
+        files (int): Files per source or package directory
+        node_modules_every (int): Give every Nth repository a node_modules
+            tree (0 disables them)
+        node_modules_width (int): Packages per node_modules level
+        node_modules_depth (int): Nesting levels of node_modules packages
+        noise_dirs (int): Additional non-repository directory trees at the top
+            level, shaped like node_modules
+
+    Returns:
+        dict: Counts describing the fleet: repos, dirs (all directories below
+        base) and one key per repository state
+    """
+    summary = {"repos": 0, "dirs": 0}
+    summary.update((state, 0) for state, _ in STATES)
+    cycle = _state_cycle()
+
+    for index in range(repos):
+        parts = []
+        n = index
+        for _ in range(depth):
+            parts.append(f"group{n % fanout}")
+            n //= fanout
+        state = cycle[index % len(cycle)]
+        repo = os.path.join(base, *parts, f"repo{index}")
+        _make_repo(repo, state, src_dirs, files)
+        summary["repos"] += 1
+        summary[state] += 1
+        if node_modules_every and index % node_modules_every == 0:
+            modules = os.path.join(repo, "node_modules")
+            os.makedirs(modules)
+            _make_noise(modules, node_modules_width, node_modules_depth, files)
+
+    for i in range(noise_dirs):
+        noise = os.path.join(base, f"vendor{i}")
+        os.makedirs(noise)
+        _make_noise(noise, node_modules_width, node_modules_depth, files)
+
+    summary["dirs"] = sum(len(dirnames) for _, dirnames, _ in os.walk(base))
+    return summary
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for aidocs.
+
+Generates a synthetic fleet, then times process startup, `aidocs check` (full
+walk, incremental rescan and single-threaded) and `aidocs init --recursive`
+through the installed CLI, each in a private HOME so that the user's
+~/.aidocs is never touched. Results can be saved as JSON and compared with a
+saved baseline; any benchmark slower than the baseline by more than the
+threshold is reported as a regression and makes the run exit with status 1.
+
+Usage:
+    python benchmarks/run.py [--repos N] [--repeat R] [--save results.json]
+                             [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fleet import generate_fleet  # noqa: E402
+
+
+def aidocs_command(*args):
+    return [sys.executable, "-m", "aidocs_pkg.main"] + list(args)
+
+
+def time_command(command, env, repeat, prepare=None):
+    """
+    Runs a command `repeat` times and returns its timings in seconds.
+
+    Args:
+        command (list): Command line to run
+        env (dict): Environment for the command
+        repeat (int): Number of timed runs
+        prepare (callable): Called before each run, outside the timing
+    """
+    runs = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        subprocess.run(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        runs.append(time.perf_counter() - start)
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def compare(baseline, current, threshold):
+    """
+    Finds benchmarks that got slower than the baseline.
+
+    Args:
+        baseline (dict): Saved results document
+        current (dict): Results document of this run
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: (name, baseline_seconds, current_seconds, ratio) tuples for
+        every benchmark whose median exceeds the baseline by more than the
+        threshold. Benchmarks missing from either document are skipped.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or before["median"] <= 0:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > 1 + threshold:
+            regressions.append((name, before["median"], result["median"], ratio))
+    return regressions
+
+
+def run_suite(work, args):
+    fleet_dir = os.path.join(work, "fleet")
+    home = os.path.join(work, "home")
+    os.makedirs(fleet_dir)
+    os.makedirs(home)
+    env = dict(os.environ, HOME=home, PYTHONPATH=ROOT)
+
+    print(f"Generating {args.repos} repositories...", file=sys.stderr)
+    fleet = generate_fleet(fleet_dir, repos=args.repos, depth=args.depth, fanout=args.fanout,
+                           noise_dirs=args.noise_dirs)
+    subprocess.run(aidocs_command("setup"), env=env, stdout=subprocess.DEVNULL, check=True)
+
+    results = {}
+    results["startup_interpreter"] = time_command([sys.executable, "-c", "pass"], env, args.repeat)
+    results["startup_help"] = time_command(aidocs_command("help"), env, args.repeat)
+    results["check_full"] = time_command(
+        aidocs_command("check", fleet_dir, "--full", "--format", "jsonl"), env, args.repeat)
+    results["check_incremental"] = time_command(
+        aidocs_command("check", fleet_dir, "--format", "jsonl"), env, args.repeat)
+    results["check_full_jobs1"] = time_command(
+        aidocs_command("check", fleet_dir, "--full", "--jobs", "1", "--format", "jsonl"),
+        env, args.repeat)
+
+    init_dir = os.path.join(work, "init")
+
+    def fresh_copy():
+        shutil.rmtree(init_dir, ignore_errors=True)
+        shutil.copytree(fleet_dir, init_dir, symlinks=True)
+
+    results["init_recursive"] = time_command(
+        aidocs_command("init", init_dir, "--recursive"), env, args.repeat, prepare=fresh_copy)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fleet": fleet,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repos", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--noise-dirs", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write the results document to this file")
+    parser.add_argument("--compare", help="Baseline results document to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="aidocs-bench-")
+    try:
+        document = run_suite(work, args)
+    finally:
+        shutil.rmtree(work)
+
+    print(f"{'benchmark':<24}{'median s':>10}{'min s':>10}")
+    for name, result in document["results"].items():
+        print(f"{name:<24}{result['median']:>10.3f}{result['min']:>10.3f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, document, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.3f}s -> {after:.3f}s ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/arielserranoni/aidocs",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "tests"]),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
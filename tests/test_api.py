@@ -0,0 +1,123 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import api
+from aidocs_pkg.constants import PROJECT_CONFIG_FILE, REAL_FILENAME
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        self.base = os.path.realpath(tempfile.mkdtemp())
+        self.src = os.path.join(self.base, "src")
+        for repo in ("a", "b"):
+            os.makedirs(os.path.join(self.src, repo, ".git"))
+        self.template = os.path.join(self.base, "template.md")
+        with open(self.template, "w") as f:
+            f.write("# Template\n")
+        self.config = {"symlinks": ["CLAUDE.md"], "exclude": []}
+        self.tokens_file = os.path.join(self.base, "tokens.json")
+        for name, value in (("INDEX_FILE", os.path.join(self.base, "index.json")),
+                            ("TEMPLATE_FILE", self.template),
+                            ("TOKENS_FILE", self.tokens_file),
+                            ("LOCK_DIR", os.path.join(self.base, "locks"))):
+            patcher = patch(f"aidocs_pkg.api.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("aidocs_pkg.consolidate.HASHES_DIR", os.path.join(self.base, "hashes"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_init_returns_result_without_printing(self):
+        repo = os.path.join(self.src, "a")
+        for name in ("CLAUDE.md", "GEMINI.md"):
+            with open(os.path.join(repo, name), "w") as f:
+                f.write("notes\n")
+        os.symlink("other.md", os.path.join(repo, "AGENTS.md"))
+        config = {"symlinks": ["CLAUDE.md", "GEMINI.md", "AGENTS.md", "NEW.md"]}
+
+        with patch("sys.stdout", new_callable=io.StringIO) as out:
+            result = api.init(repo, config)
+        self.assertEqual(out.getvalue(), "")
+        self.assertTrue(result.created)
+        self.assertEqual(result.merged, ["CLAUDE.md"])
+        self.assertEqual(result.deduplicated, [("GEMINI.md", "CLAUDE.md")])
+        self.assertEqual(result.links, [("CLAUDE.md", "replaced"), ("GEMINI.md", "replaced"),
+                                        ("AGENTS.md", "conflict"), ("NEW.md", "created")])
+        self.assertEqual(result.conflicts, ["AGENTS.md"])
+
+        result = api.init(repo, config)
+        self.assertFalse(result.created)
+        self.assertEqual(result.sources, [])
+        self.assertEqual(result.links[0], ("CLAUDE.md", "exists"))
+
+    def test_init_locks_the_project(self):
+        from aidocs_pkg.locks import RepoLocked, lock_repo
+
+        repo = os.path.join(self.src, "a")
+        lock_dir = os.path.join(self.base, "other-locks")
+        with lock_repo(repo, lock_dir):
+            with self.assertRaises(RepoLocked):
+                api.init(repo, self.config, lock_dir=lock_dir)
+        self.assertEqual(os.listdir(repo), [".git"])
+        self.assertTrue(api.init(repo, self.config, lock_dir=lock_dir).created)
+
+    def test_check_yields_repo_statuses(self):
+        api.init(os.path.join(self.src, "a"), self.config)
+        statuses = sorted(api.check([self.src], jobs=2, config=self.config),
+                          key=lambda status: status.path)
+        self.assertEqual(statuses, [
+            api.RepoStatus(os.path.join(self.src, "a"), tokens=3),
+            api.RepoStatus(os.path.join(self.src, "b"), compliant=False, missing_file=True),
+        ])
+        self.assertFalse(hasattr(statuses[0], "__dict__"))
+        self.assertEqual(statuses[1].to_record(), {
+            "path": os.path.join(self.src, "b"), "compliant": False, "missing_file": True,
+            "missing_links": [], "invalid_links": []})
+
+    def test_check_flags_files_over_token_budget(self):
+        api.init(os.path.join(self.src, "a"), self.config)
+        config = dict(self.config, token_budget=2)
+        status, = api.check(repos=iter([os.path.join(self.src, "a")]), config=config)
+        self.assertTrue(status.compliant)
+        self.assertEqual(status.tokens, 3)
+        self.assertTrue(status.over_budget)
+        self.assertTrue(os.path.exists(self.tokens_file))
+
+        status, = api.check(repos=iter([os.path.join(self.src, "a")]), config=config,
+                            tokens=False)
+        self.assertIsNone(status.tokens)
+        self.assertNotIn("tokens", status.to_record())
+
+    def test_invalid_repository_settings_warn(self):
+        repo = os.path.join(self.src, "a")
+        open(os.path.join(repo, REAL_FILENAME), "w").close()
+        with open(os.path.join(repo, PROJECT_CONFIG_FILE), "w") as f:
+            f.write('{"symlinks": "AGENTS.md"}')
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr, \
+                self.assertWarnsRegex(api.AidocsWarning, "checking .* with the global settings"):
+            statuses = list(api.check(repos=[repo], config=self.config, tokens=False))
+        self.assertEqual(statuses[0].missing_links, ["CLAUDE.md"])
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_check_listed_repos(self):
+        repo = os.path.join(self.src, "b")
+        statuses = list(api.check(repos=iter([repo]), config=self.config))
+        self.assertEqual([status.path for status in statuses], [repo])
+        self.assertFalse(os.path.exists(os.path.join(self.base, "index.json")))
+
+    def test_no_search_paths(self):
+        self.assertEqual(list(api.discover([])), [])
+        self.assertEqual(list(api.check(config=self.config)), [])
+        self.assertFalse(os.path.exists(os.path.join(self.base, "index.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
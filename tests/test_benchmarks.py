@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from aidocs_pkg.compliance import check_repos
+from aidocs_pkg.discovery import find_repos
+from benchmarks.fleet import SYMLINKS, generate_fleet
+from benchmarks.run import compare
+
+
+class TestFleetGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_generated_states_match_check(self):
+        fleet = generate_fleet(self.base, repos=20, depth=2, fanout=3, node_modules_every=5,
+                               noise_dirs=1)
+        self.assertEqual(fleet["repos"], 20)
+        self.assertTrue(os.path.isdir(os.path.join(self.base, "vendor0", "pkg0", "pkg0")))
+        self.assertTrue(os.path.isdir(os.path.join(self.base, "group0", "group0", "repo0", "node_modules")))
+
+        results = list(check_repos(find_repos(self.base), list(SYMLINKS)))
+        self.assertEqual(len(results), fleet["repos"])
+        self.assertEqual(sum(r["compliant"] for r in results), fleet["compliant"])
+        self.assertEqual(sum(r["missing_file"] for r in results), fleet["missing_file"])
+        self.assertEqual(sum(bool(r["invalid_links"]) for r in results),
+                         fleet["broken_links"] + fleet["wrong_target"] + fleet["regular_files"])
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_regressions_past_threshold(self):
+        baseline = {"results": {"check_full": {"median": 1.0}, "startup_help": {"median": 0.05},
+                                "removed": {"median": 1.0}}}
+        current = {"results": {"check_full": {"median": 1.3}, "startup_help": {"median": 0.055},
+                               "added": {"median": 9.0}}}
+        regressions = compare(baseline, current, threshold=0.2)
+        self.assertEqual([r[0] for r in regressions], ["check_full"])
+        self.assertAlmostEqual(regressions[0][3], 1.3)
+        self.assertEqual(compare(baseline, current, threshold=0.5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import build as build_module
+from aidocs_pkg.build import BuildCache, BuildError, Fragments, build_repo, expand
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+DOC = """# Project
+
+<!-- aidocs:include style -->
+
+## Notes
+
+```
+<!-- aidocs:include style -->
+```
+"""
+
+
+class TestExpand(unittest.TestCase):
+
+    def setUp(self):
+        self.fragments_dir = tempfile.mkdtemp()
+        self.write("style", "Use black.\n\n<!-- aidocs:include license -->\n")
+        self.write("license", "MIT licensed.\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.fragments_dir)
+
+    def write(self, name, text):
+        with open(os.path.join(self.fragments_dir, f"{name}.md"), "w") as f:
+            f.write(text)
+
+    def test_includes_are_expanded_between_markers(self):
+        text, used = expand(DOC, Fragments(self.fragments_dir))
+        self.assertIn("<!-- aidocs:include style -->\nUse black.\n\nMIT licensed.\n"
+                      "<!-- aidocs:end style -->\n\n## Notes", text)
+        # Directives in code blocks are left alone.
+        self.assertIn("```\n<!-- aidocs:include style -->\n```", text)
+        self.assertEqual(list(used), ["style"])
+
+    def test_rebuilding_replaces_the_earlier_expansion(self):
+        text, _ = expand(DOC, Fragments(self.fragments_dir))
+        self.assertEqual(expand(text, Fragments(self.fragments_dir))[0], text)
+        self.write("license", "Apache licensed.\n")
+        rebuilt, _ = expand(text, Fragments(self.fragments_dir))
+        self.assertEqual(rebuilt, text.replace("MIT", "Apache"))
+
+    def test_fenced_directives_in_fragments_are_replaced(self):
+        self.write("usage", "Include fragments like this:\n\n```\n"
+                            "<!-- aidocs:include style -->\n```\n")
+        text, _ = expand("# Project\n\n<!-- aidocs:include usage -->\n",
+                         Fragments(self.fragments_dir))
+        self.assertEqual(expand(text, Fragments(self.fragments_dir))[0], text)
+        self.assertEqual(text.count("Include fragments like this"), 1)
+
+    def test_hash_covers_included_fragments(self):
+        before = Fragments(self.fragments_dir).get("style")[1]
+        self.write("license", "Apache licensed.\n")
+        self.assertNotEqual(Fragments(self.fragments_dir).get("style")[1], before)
+
+    def test_errors(self):
+        fragments = Fragments(self.fragments_dir)
+        with self.assertRaises(BuildError):
+            expand("<!-- aidocs:include missing -->\n", fragments)
+        with self.assertRaises(BuildError):
+            expand("<!-- aidocs:include ../secrets -->\n", fragments)
+        self.write("license", "<!-- aidocs:include style -->\n")
+        with self.assertRaisesRegex(BuildError, "style -> license -> style"):
+            Fragments(self.fragments_dir).get("style")
+
+
+class TestBuildRepo(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.fragments_dir = os.path.join(self.base, "fragments")
+        self.lock_dir = os.path.join(self.base, "locks")
+        self.cache_file = os.path.join(self.base, "build.json")
+        os.makedirs(self.fragments_dir)
+        self.write_fragment("style", "Use black.\n")
+        self.write_fragment("deploy", "Deploy with helm.\n")
+        self.repos = {}
+        for name, include in (("a", "style"), ("b", "style"), ("c", "deploy")):
+            repo = self.repos[name] = os.path.join(self.base, name)
+            os.makedirs(repo)
+            with open(os.path.join(repo, "aidocs.md"), "w") as f:
+                f.write(f"# {name}\n\n<!-- aidocs:include {include} -->\n")
+            os.symlink("aidocs.md", os.path.join(repo, "CLAUDE.md"))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write_fragment(self, name, text):
+        with open(os.path.join(self.fragments_dir, f"{name}.md"), "w") as f:
+            f.write(text)
+
+    def build(self, dry_run=False):
+        fragments = Fragments(self.fragments_dir)
+        cache = BuildCache(self.cache_file)
+        records = {name: build_repo(repo, fragments, cache, self.lock_dir, dry_run)
+                   for name, repo in self.repos.items()}
+        cache.save()
+        return {name: record["status"] for name, record in records.items()}
+
+    def test_only_affected_files_are_rebuilt(self):
+        self.assertEqual(self.build(dry_run=True), {"a": "planned", "b": "planned", "c": "planned"})
+        self.assertEqual(self.build(), {"a": "built", "b": "built", "c": "built"})
+        with open(os.path.join(self.repos["a"], "CLAUDE.md")) as f:
+            self.assertIn("Use black.\n<!-- aidocs:end style -->", f.read())
+        self.assertTrue(os.path.islink(os.path.join(self.repos["a"], "CLAUDE.md")))
+
+        with patch.object(build_module, "expand") as mock_expand:
+            self.assertEqual(self.build(), {"a": "cached", "b": "cached", "c": "cached"})
+        mock_expand.assert_not_called()
+
+        self.write_fragment("deploy", "Deploy with argo.\n")
+        self.assertEqual(self.build(), {"a": "cached", "b": "cached", "c": "built"})
+
+    def test_edited_files_are_reread(self):
+        self.build()
+        path = os.path.join(self.repos["a"], "aidocs.md")
+        with open(path, "a") as f:
+            f.write("\nMore notes.\n")
+        self.assertEqual(self.build()["a"], "unchanged")
+
+    def test_missing_fragment_fails(self):
+        self.build()
+        os.remove(os.path.join(self.fragments_dir, "style.md"))
+        fragments = Fragments(self.fragments_dir)
+        record = build_repo(self.repos["a"], fragments, BuildCache(self.cache_file),
+                            self.lock_dir)
+        self.assertEqual(record["status"], "failed")
+        self.assertIn("'style'", record["error"])
+        os.remove(os.path.join(self.repos["b"], "aidocs.md"))
+        self.assertIsNone(build_repo(self.repos["b"], fragments, BuildCache(self.cache_file),
+                                     self.lock_dir))
+
+
+class TestBuildCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.root = os.path.join(self.home, "src")
+        self.repo = os.path.join(self.root, "a")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        with open(os.path.join(self.repo, "aidocs.md"), "w") as f:
+            f.write("# A\n\n<!-- aidocs:include style -->\n")
+        self.run_aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def run_aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args),
+                              env=self.env, capture_output=True, text=True)
+
+    def test_build(self):
+        result = self.run_aidocs("build", self.root)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(f"Could not build {self.repo}: fragment 'style' cannot be read",
+                      result.stdout)
+
+        os.makedirs(os.path.join(self.home, ".aidocs", "fragments"))
+        with open(os.path.join(self.home, ".aidocs", "fragments", "style.md"), "w") as f:
+            f.write("Use black.\n")
+        result = self.run_aidocs("build", self.root)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(f"Built: {self.repo} (style)", result.stdout)
+        self.assertIn("Built 1, 0 up to date, 0 failed.", result.stdout)
+
+        result = self.run_aidocs("build", self.root, "--format", "jsonl")
+        lines = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(lines[0], {"type": "build", "path": self.repo, "status": "cached",
+                                    "fragments": ["style"]})
+        self.assertEqual(lines[1]["cached"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
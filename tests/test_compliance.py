@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from aidocs_pkg.compliance import check_repos, inspect_repo
+from aidocs_pkg.constants import REAL_FILENAME
+
+SYMLINKS = ["GEMINI.md", "CLAUDE.md"]
+
+
+class TestCompliance(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def make_repo(self, name, real_file=True, links=()):
+        repo = os.path.join(self.base, name)
+        os.makedirs(os.path.join(repo, ".git"))
+        if real_file:
+            open(os.path.join(repo, REAL_FILENAME), "w").close()
+        for link_name, target in links:
+            os.symlink(target, os.path.join(repo, link_name))
+        return repo
+
+    def test_inspect_repo(self):
+        good = self.make_repo("good", links=[("GEMINI.md", REAL_FILENAME), ("CLAUDE.md", REAL_FILENAME)])
+        self.assertTrue(inspect_repo(good, SYMLINKS)["compliant"])
+
+        missing = self.make_repo("missing", real_file=False)
+        result = inspect_repo(missing, SYMLINKS)
+        self.assertFalse(result["compliant"])
+        self.assertTrue(result["missing_file"])
+
+        partial = self.make_repo("partial", links=[("GEMINI.md", "other.md")])
+        result = inspect_repo(partial, SYMLINKS)
+        self.assertFalse(result["compliant"])
+        self.assertEqual(result["missing_links"], ["CLAUDE.md"])
+        self.assertEqual(result["invalid_links"], ["GEMINI.md"])
+
+    def test_inspect_repo_edge_cases(self):
+        dangling = self.make_repo("dangling", real_file=False)
+        os.symlink("gone.md", os.path.join(dangling, REAL_FILENAME))
+        self.assertTrue(inspect_repo(dangling, SYMLINKS)["missing_file"])
+
+        nested = self.make_repo("nested")
+        os.makedirs(os.path.join(nested, ".github"))
+        os.symlink(os.path.join("..", REAL_FILENAME), os.path.join(nested, ".github", "copilot.md"))
+        result = inspect_repo(nested, [".github/copilot.md", ".github/missing.md"])
+        self.assertEqual(result["invalid_links"], [".github/copilot.md"])
+        self.assertEqual(result["missing_links"], [".github/missing.md"])
+
+    def test_count_syscalls(self):
+        good = self.make_repo("good", links=[("GEMINI.md", REAL_FILENAME), ("CLAUDE.md", REAL_FILENAME)])
+        missing = self.make_repo("missing", real_file=False)
+        results = {r["path"]: r for r in check_repos([good, missing], SYMLINKS, count_syscalls=True)}
+        # One scandir, plus one readlink per symlink.
+        self.assertEqual(results[good]["syscalls"], 3)
+        self.assertEqual(results[missing]["syscalls"], 1)
+        # The counting wrappers are removed once the results are consumed.
+        self.assertEqual(os.stat.__module__, os.name)
+
+    def test_check_repos_consumes_lazily(self):
+        repos = [self.make_repo(f"repo{i}") for i in range(20)]
+        consumed = []
+
+        def produce():
+            for repo in repos:
+                consumed.append(repo)
+                yield repo
+
+        results = check_repos(produce(), SYMLINKS, jobs=2)
+        first = next(results)
+        self.assertIn(first["path"], repos)
+        self.assertLess(len(consumed), len(repos))
+        rest = list(results)
+        self.assertEqual(sorted(r["path"] for r in [first] + rest), sorted(repos))
+
+
+if __name__ == "__main__":
+    unittest.main()
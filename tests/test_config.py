@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg.compliance import inspect_repo
+from aidocs_pkg.config import ConfigCache, ConfigError, merge, validate
+from aidocs_pkg.constants import PROJECT_CONFIG_FILE, REAL_FILENAME
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+
+class TestConfigLayers(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base, "repo")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        self.global_file = os.path.join(self.base, "config.json")
+        self.write(self.global_file, {"symlinks": ["GEMINI.md", "CLAUDE.md"], "exclude": []})
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, path, data):
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def test_merge(self):
+        base = merge({"symlinks": ["A.md"], "extra_symlinks": ["B.md"], "gitignore": True})
+        self.assertEqual(base, {"symlinks": ["A.md", "B.md"], "gitignore": True})
+        self.assertEqual(merge(base, {"extra_symlinks": ["C.md", "A.md"]})["symlinks"],
+                         ["A.md", "B.md", "C.md"])
+        self.assertEqual(merge(base, {"symlinks": ["D.md"]})["symlinks"], ["D.md"])
+
+    def test_validate(self):
+        validate({"symlinks": [".github/copilot.md"]}, "x", project=True)
+        validate({"token_budget": 4000}, "x")
+        # Unknown keys are only rejected in .aidocs.json.
+        validate({"editor": "vim"}, "x")
+        for data, project in (([], False), ({"symlink": []}, True), ({"gitignore": 1}, False),
+                              ({"symlinks": [""]}, False), ({"exclude": []}, True),
+                              ({"symlinks": ["../other/CLAUDE.md"]}, True),
+                              ({"token_budget": 0}, False), ({"token_budget": True}, False),
+                              ({"token_budget": 4000}, True)):
+            with self.assertRaises(ConfigError):
+                validate(data, "x", project)
+
+    def test_files_are_parsed_once_until_they_change(self):
+        cache = ConfigCache()
+        with patch("json.load", wraps=json.load) as load:
+            first = cache.load_global(self.global_file)
+            self.assertIs(cache.load_global(self.global_file), first)
+            self.assertEqual(load.call_count, 1)
+            self.write(self.global_file, {"symlinks": ["AGENTS.md"]})
+            os.utime(self.global_file, ns=(0, 0))
+            self.assertEqual(cache.load_global(self.global_file)["symlinks"], ["AGENTS.md"])
+            self.assertEqual(load.call_count, 2)
+
+    def test_project_override(self):
+        cache = ConfigCache()
+        base = cache.load_global(self.global_file)
+        self.assertIs(cache.effective(base, self.repo), base)
+        self.write(os.path.join(self.repo, PROJECT_CONFIG_FILE), {"extra_symlinks": ["AGENTS.md"]})
+        effective = cache.effective(base, self.repo)
+        self.assertEqual(effective["symlinks"], ["GEMINI.md", "CLAUDE.md", "AGENTS.md"])
+        self.assertIs(cache.effective(base, self.repo), effective)
+
+        self.write(os.path.join(self.repo, PROJECT_CONFIG_FILE), {"gitignore": True})
+        with self.assertRaises(ConfigError):
+            cache.effective(base, self.repo)
+
+    def test_inspect_repo_reads_override_only_when_present(self):
+        open(os.path.join(self.repo, REAL_FILENAME), "w").close()
+        os.symlink(REAL_FILENAME, os.path.join(self.repo, "CLAUDE.md"))
+        calls = []
+
+        def overrides(path):
+            calls.append(path)
+            return ["CLAUDE.md", "AGENTS.md"]
+
+        self.assertTrue(inspect_repo(self.repo, ["CLAUDE.md"], overrides)["compliant"])
+        self.assertEqual(calls, [])
+        self.write(os.path.join(self.repo, PROJECT_CONFIG_FILE), {})
+        result = inspect_repo(self.repo, ["CLAUDE.md"], overrides)
+        self.assertEqual(result["missing_links"], ["AGENTS.md"])
+        os.symlink(REAL_FILENAME, os.path.join(self.repo, "AGENTS.md"))
+        self.assertTrue(inspect_repo(self.repo, ["CLAUDE.md"], overrides)["compliant"])
+
+
+class TestConfigCommands(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.repo = os.path.join(self.home, "src", "repo")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        with open(os.path.join(self.repo, PROJECT_CONFIG_FILE), "w") as f:
+            json.dump({"extra_symlinks": ["AGENTS.md"]}, f)
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args), env=self.env,
+                              cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def test_init_and_check_apply_the_override(self):
+        self.aidocs("init", self.repo)
+        self.assertEqual(os.readlink(os.path.join(self.repo, "AGENTS.md")), REAL_FILENAME)
+        os.remove(os.path.join(self.repo, "AGENTS.md"))
+        result = self.aidocs("check", self.home, "--format", "jsonl")
+        self.assertEqual(json.loads(result.stdout.splitlines()[0])["missing_links"], ["AGENTS.md"])
+
+    def test_invalid_override_is_a_warning(self):
+        with open(os.path.join(self.repo, PROJECT_CONFIG_FILE), "w") as f:
+            f.write('{"symlinks": "AGENTS.md"}')
+        open(os.path.join(self.repo, REAL_FILENAME), "w").close()
+        result = self.aidocs("check", self.home, "--format", "jsonl")
+        self.assertRegex(result.stderr, r"^Warning: .*'symlinks' must be a list; checking "
+                                        r".*repo with the global settings\n$")
+        self.assertEqual(json.loads(result.stdout.splitlines()[0])["missing_links"],
+                         ["GEMINI.md", "CLAUDE.md"])
+
+    def test_invalid_global_config(self):
+        with open(os.path.join(self.home, ".aidocs", "config.json"), "w") as f:
+            f.write('{"symlinks": "CLAUDE.md"}')
+        result = self.aidocs("check", self.home)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("'symlinks' must be a list", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg.consolidate import (ContentHash, file_hash, load_sidecar, merge_sources,
+                                    section_hashes, sidecar_path)
+from aidocs_pkg.main import init, REAL_FILENAME
+
+
+def digest(*chunks):
+    h = ContentHash()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_surrounding_whitespace_is_ignored(self):
+        self.assertEqual(digest(b"\n\n  # Rules\n\nbe brief\n\n"), digest(b"# Rules\n\nbe brief"))
+        self.assertEqual(digest(b"\n", b"# Ru", b"les  ", b"\n\n", b"be brief", b"\n"),
+                         digest(b"# Rules  \n\nbe brief"))
+        self.assertNotEqual(digest(b"# Rules\nbe brief"), digest(b"# Rules\n\nbe brief"))
+
+
+class TestMergeSources(unittest.TestCase):
+
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        patcher = patch("aidocs_pkg.consolidate.HASHES_DIR", os.path.join(self.project, "hashes"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.real = os.path.join(self.project, REAL_FILENAME)
+        self.template = os.path.join(self.project, "template.md")
+        with open(self.template, "w") as f:
+            f.write("# Template\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+
+    def write(self, name, content):
+        path = os.path.join(self.project, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def read(self):
+        with open(self.real) as f:
+            return f.read()
+
+    def test_identical_sources_are_merged_once(self):
+        sources = [("CLAUDE.md", self.write("CLAUDE.md", "be brief\n")),
+                   ("GEMINI.md", self.write("GEMINI.md", "be brief\n\n")),
+                   ("AGENTS.md", self.write("AGENTS.md", "# Template"))]
+        duplicates = merge_sources(self.real, self.template, sources)
+        self.assertEqual(duplicates, [("GEMINI.md", "CLAUDE.md"), ("AGENTS.md", None)])
+        self.assertEqual(self.read(), "# Template\n\n\n--- Content from CLAUDE.md ---\n\nbe brief\n")
+
+    def test_rerun_is_a_no_op(self):
+        source = ("CLAUDE.md", self.write("CLAUDE.md", "be brief\n"))
+        merge_sources(self.real, self.template, [source])
+        content, mtime = self.read(), os.stat(self.real).st_mtime_ns
+        # The sidecar answers without scanning aidocs.md again.
+        with patch("aidocs_pkg.consolidate.section_hashes") as scan:
+            self.assertEqual(merge_sources(self.real, self.real, [source]), [("CLAUDE.md", "CLAUDE.md")])
+        scan.assert_not_called()
+        self.assertEqual(self.read(), content)
+        self.assertEqual(os.stat(self.real).st_mtime_ns, mtime)
+
+    def test_edited_file_is_scanned_again(self):
+        merge_sources(self.real, self.template, [("CLAUDE.md", self.write("CLAUDE.md", "old\n"))])
+        with open(self.real, "a") as f:
+            f.write("\n\n--- Content from GEMINI.md ---\n\nadded by hand\n")
+        self.assertIsNone(load_sidecar(self.real))
+        source = ("GEMINI.md", self.write("GEMINI.md", "added by hand"))
+        self.assertEqual(merge_sources(self.real, self.real, [source]), [("GEMINI.md", "GEMINI.md")])
+        self.assertEqual(set(load_sidecar(self.real).values()), {None, "CLAUDE.md", "GEMINI.md"})
+
+    def test_section_hashes(self):
+        self.write(REAL_FILENAME, "# Top\n\n\n--- Content from A.md ---\n\none\n"
+                                  "--- Content from B.md --- not a marker\n"
+                                  "\n\n--- Content from C.md ---\n\n# Top\n")
+        hashes = section_hashes(self.real)
+        self.assertEqual(hashes, {digest(b"# Top"): None,
+                                  digest(b"one\n--- Content from B.md --- not a marker"): "A.md"})
+        self.assertEqual(file_hash(self.template), digest(b"# Template"))
+
+
+class TestInitDeduplication(unittest.TestCase):
+
+    def test_rerun_after_interrupted_init(self):
+        project = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, project)
+        for target, name in (("aidocs_pkg.api.LOCK_DIR", "locks"),
+                             ("aidocs_pkg.consolidate.HASHES_DIR", "hashes")):
+            patcher = patch(target, os.path.join(project, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        claude = os.path.join(project, "CLAUDE.md")
+        with open(os.path.join(project, REAL_FILENAME), "w") as f:
+            f.write("# Existing\n")
+        with open(claude, "w") as f:
+            f.write("be brief\n")
+        config = {"symlinks": ["CLAUDE.md"]}
+
+        # The merge succeeds but replacing CLAUDE.md with a symlink fails.
+        with patch("aidocs_pkg.consolidate.replace_with_symlink", side_effect=OSError), \
+                patch("sys.stdout", new_callable=io.StringIO):
+            with self.assertRaises(OSError):
+                init(project, config)
+        os.remove(sidecar_path(os.path.join(project, REAL_FILENAME)))
+
+        with patch("sys.stdout", new_callable=io.StringIO) as out:
+            self.assertEqual(init(project, config).deduplicated, [("CLAUDE.md", "CLAUDE.md")])
+        self.assertIn("Skipped CLAUDE.md", out.getvalue())
+        with open(os.path.join(project, REAL_FILENAME)) as f:
+            self.assertEqual(f.read(), "# Existing\n\n\n--- Content from CLAUDE.md ---\n\nbe brief\n")
+        self.assertEqual(os.readlink(claude), REAL_FILENAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from aidocs_pkg.discovery import find_repos, scan_directory, stop_at_repos
+
+
+def walk_repos(search_path):
+    found = []
+    for root, dirs, files in os.walk(search_path):
+        if ".git" in dirs:
+            found.append(root)
+            dirs.remove(".git")
+    return found
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        for repo in ["a", "b/c", "b/d/e", "b/d/e/nested", "f/g/h"]:
+            os.makedirs(os.path.join(self.base, repo, ".git"))
+        os.makedirs(os.path.join(self.base, "plain", "src"))
+        open(os.path.join(self.base, "plain", "README"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_matches_os_walk(self):
+        expected = walk_repos(self.base)
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(list(find_repos(self.base, jobs=1)), expected)
+        for jobs in (2, 8):
+            self.assertEqual(sorted(find_repos(self.base, jobs=jobs)), sorted(expected))
+
+    def test_symlinked_directories_are_not_followed(self):
+        os.symlink(os.path.join(self.base, "b"), os.path.join(self.base, "link"))
+        self.assertEqual(sorted(find_repos(self.base, jobs=4)), sorted(walk_repos(self.base)))
+
+    def test_scan_directory(self):
+        is_repo, subdirs = scan_directory(os.path.join(self.base, "b", "d", "e"))
+        self.assertTrue(is_repo)
+        self.assertEqual(subdirs, [os.path.join(self.base, "b", "d", "e", "nested")])
+        self.assertEqual(scan_directory(os.path.join(self.base, "missing")), (False, []))
+
+    def test_git_file_marks_worktrees_and_submodules(self):
+        worktree = os.path.join(self.base, "plain", "worktree")
+        os.makedirs(worktree)
+        with open(os.path.join(worktree, ".git"), "w") as f:
+            f.write("gitdir: /elsewhere/.git/worktrees/worktree\n")
+        self.assertEqual(scan_directory(worktree), (True, []))
+        self.assertIn(worktree, list(find_repos(self.base, jobs=4)))
+
+    def test_stop_at_repos(self):
+        visited = []
+
+        def visit(path):
+            visited.append(path)
+            return scan_directory(path)
+
+        repos = sorted(find_repos(self.base, jobs=4, visit=stop_at_repos(visit)))
+        rel = [os.path.relpath(repo, self.base) for repo in repos]
+        self.assertEqual(rel, ["a", "b/c", "b/d/e", "f/g/h"])
+        # Only directories above repositories and the repository roots.
+        self.assertNotIn(os.path.join(self.base, "b", "d", "e", "nested"), visited)
+        self.assertEqual(len(visited), 11)
+
+    def test_early_close_stops_workers(self):
+        repos = find_repos(self.base, jobs=4)
+        next(repos)
+        repos.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
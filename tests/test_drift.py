@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import drift as drift_module
+from aidocs_pkg.drift import DriftCache
+from aidocs_pkg.report import render_drift
+from aidocs_pkg.templates import Template, TemplateError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+TEMPLATE = """# Instructions: {{ project_name }}
+
+## Overview
+
+- Language: {{ language }}
+- (TODO: Describe the project.)
+
+## Style
+
+Use black.
+
+## Tech Stack
+
+{{ tech_stack }}
+"""
+
+
+def render(text, name):
+    return Template(text).render({"project_name": name, "language": "Python",
+                                  "tech_stack": "- Python (pyproject.toml): requests\n- Go (go.mod)",
+                                  "repo_path": "", "default_branch": ""})
+
+
+class TestDriftCache(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.base, "aidocs", "drift.json")
+        self.template = os.path.join(self.base, "template.md")
+        self.write(self.template, TEMPLATE)
+        self.repos = {}
+        for name in ("a", "b", "c"):
+            self.repos[name] = os.path.join(self.base, name)
+            os.makedirs(self.repos[name])
+            self.write_doc(name, render(TEMPLATE, name))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def write_doc(self, name, text):
+        self.write(os.path.join(self.repos[name], "aidocs.md"), text)
+
+    def run_drift(self):
+        cache = DriftCache(self.cache_file)
+        records = {name: cache.drift(repo, self.template) for name, repo in self.repos.items()}
+        cache.save()
+        return {name: dict(record["sections"]) if record else None
+                for name, record in records.items()}, records
+
+    def test_statuses(self):
+        text = render(TEMPLATE, "b").replace("Use black.", "Use black and isort.")
+        self.write_doc("b", text.split("## Tech Stack")[0])
+        os.remove(os.path.join(self.repos["c"], "aidocs.md"))
+
+        statuses, records = self.run_drift()
+        self.assertEqual(statuses["a"], {"Instructions: {{ project_name }}": "stock",
+                                         "Overview": "stock", "Style": "stock",
+                                         "Tech Stack": "stock"})
+        self.assertEqual(statuses["b"]["Style"], "modified")
+        self.assertEqual(statuses["b"]["Tech Stack"], "missing")
+        self.assertIsNone(statuses["c"])
+        self.assertEqual(records["a"]["todo"], ["Overview"])
+
+    def test_earlier_template_versions_are_outdated(self):
+        self.write_doc("b", render(TEMPLATE, "b").replace("Use black.", "Use tabs."))
+        self.run_drift()
+        self.write(self.template, TEMPLATE.replace("Use black.", "Use ruff."))
+        self.write_doc("c", render(TEMPLATE, "c").replace("Use black.", "Use ruff."))
+
+        statuses, _ = self.run_drift()
+        self.assertEqual(statuses["a"]["Style"], "outdated")
+        self.assertEqual(statuses["b"]["Style"], "modified")
+        self.assertEqual(statuses["c"]["Style"], "stock")
+        self.assertEqual(statuses["a"]["Overview"], "stock")
+
+    def test_unchanged_files_are_not_read(self):
+        self.run_drift()
+        with patch.object(drift_module, "_parse") as mock_parse:
+            statuses, _ = self.run_drift()
+        mock_parse.assert_not_called()
+        self.assertEqual(statuses["a"]["Style"], "stock")
+
+    def test_shared_sections_are_compared_once(self):
+        self.run_drift()
+        with open(self.cache_file) as f:
+            verdicts = json.load(f)["verdicts"]
+        # Three stock files: one verdict per template section.
+        self.assertEqual(len(verdicts), 1)
+        self.assertEqual(len(next(iter(verdicts.values()))), 4)
+
+    def test_remembered_versions_are_outdated(self):
+        drift_module.remember_template(self.template)
+        self.write(self.template, TEMPLATE.replace("Use black.", "Use ruff."))
+        statuses, _ = self.run_drift()
+        self.assertEqual(statuses["a"]["Style"], "outdated")
+
+    def test_missing_template(self):
+        cache = DriftCache(self.cache_file)
+        with self.assertRaises(TemplateError):
+            cache.drift(self.repos["a"], os.path.join(self.base, "nope.md"))
+
+
+class TestDriftReport(unittest.TestCase):
+
+    def test_render_text(self):
+        records = [
+            {"path": "/src/a", "template": "t", "sections": [["Style", "outdated"], ["Tech", "stock"]],
+             "todo": ["Overview"]},
+            {"path": "/src/b", "template": "t", "sections": [["Style", "modified"], ["Tech", "missing"]],
+             "todo": []},
+        ]
+        out = io.StringIO()
+        summary = render_drift(iter(records), "text", out)
+        self.assertEqual(summary["sections"]["Style"],
+                         {"stock": 0, "modified": 1, "outdated": 1, "missing": 0})
+        text = out.getvalue()
+        self.assertIn("- Repository: /src/a\n  Outdated: Style\n  TODO placeholders: Overview", text)
+        self.assertNotIn("/src/b", text)
+        self.assertIn("Template sections across 2 repositories:", text)
+
+        out = io.StringIO()
+        render_drift(iter(records), "jsonl", out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["drift", "drift", "drift_summary"])
+
+
+class TestDriftCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.root = os.path.join(self.home, "src")
+        for name in ("a", "b"):
+            os.makedirs(os.path.join(self.root, name, ".git"))
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def run_aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args),
+                              env=self.env, capture_output=True, text=True)
+
+    def test_drift_after_template_change(self):
+        self.run_aidocs("setup")
+        for name in ("a", "b"):
+            self.run_aidocs("init", os.path.join(self.root, name))
+        template = os.path.join(self.home, ".aidocs", "template.md")
+        with open(template) as f:
+            text = f.read()
+        with open(template, "w") as f:
+            f.write(text.replace("(TODO: Outline coding conventions, style guides, and "
+                                 "architectural patterns.)", "Follow PEP 8."))
+
+        # init remembered the template it rendered, so the old section is
+        # recognized without an earlier drift run.
+        result = self.run_aidocs("drift", self.root)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("  Outdated: Conventions & Style\n  TODO placeholders: Project Overview",
+                      result.stdout)
+        result = self.run_aidocs("drift", self.root, "--format", "json")
+        document = json.loads(result.stdout)
+        self.assertEqual(document["summary"]["repos"], 2)
+        self.assertEqual(document["summary"]["sections"]["Conventions & Style"]["outdated"], 2)
+        self.assertEqual(document["summary"]["sections"]["Project Overview"]["stock"], 2)
+
+        result = self.run_aidocs("drift", self.root, "--template", "missing")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("template not found", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
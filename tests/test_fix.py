@@ -0,0 +1,111 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg.constants import DEFAULT_CONFIG, REAL_FILENAME
+from aidocs_pkg.fix import fix_repos, plan_fix
+from aidocs_pkg.locks import RepoLocked, lock_repo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+
+class TestFix(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.lock_dir = os.path.join(self.base, "locks")
+        # Inherited by the forked workers of fix_repos.
+        patcher = patch("aidocs_pkg.consolidate.HASHES_DIR", os.path.join(self.base, "hashes"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.template = os.path.join(self.base, "template.md")
+        with open(self.template, "w") as f:
+            f.write("# Template\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def make_repo(self, name):
+        repo = os.path.join(self.base, name)
+        os.makedirs(os.path.join(repo, ".git"))
+        return repo
+
+    def test_lock_repo_is_exclusive(self):
+        repo = self.make_repo("a")
+        with lock_repo(repo, self.lock_dir):
+            with self.assertRaises(RepoLocked):
+                with lock_repo(repo, self.lock_dir):
+                    pass
+        with lock_repo(repo, self.lock_dir):
+            pass
+
+    def test_plan_fix(self):
+        repo = self.make_repo("a")
+        with open(os.path.join(repo, "CLAUDE.md"), "w") as f:
+            f.write("notes")
+        os.symlink("other.md", os.path.join(repo, "GEMINI.md"))
+        actions = plan_fix(repo, DEFAULT_CONFIG["symlinks"])
+        self.assertEqual(actions, [
+            f"create {REAL_FILENAME} from the template",
+            "leave GEMINI.md: it is a symlink to another file",
+            f"merge CLAUDE.md into {REAL_FILENAME} and replace it with a symlink",
+        ])
+        self.assertEqual(sorted(os.listdir(repo)), [".git", "CLAUDE.md", "GEMINI.md"])
+
+    def test_fix_repos(self):
+        with patch("aidocs_pkg.api.TEMPLATE_FILE", self.template):
+            good = self.make_repo("good")
+            with open(os.path.join(good, "CLAUDE.md"), "w") as f:
+                f.write("notes")
+            bad = self.make_repo("bad")
+            os.symlink("other.md", os.path.join(bad, "GEMINI.md"))
+            locked = self.make_repo("locked")
+
+            with lock_repo(locked, self.lock_dir):
+                records = list(fix_repos([good, bad, locked], DEFAULT_CONFIG, self.lock_dir, jobs=1))
+
+        statuses = {record["path"]: record["status"] for record in records}
+        self.assertEqual(statuses, {good: "fixed", bad: "failed", locked: "locked"})
+        self.assertEqual(os.readlink(os.path.join(good, "CLAUDE.md")), REAL_FILENAME)
+        with open(os.path.join(good, REAL_FILENAME)) as f:
+            self.assertEqual(f.read(), "# Template\n\n\n--- Content from CLAUDE.md ---\n\nnotes")
+        self.assertEqual(os.listdir(locked), [".git"])
+
+
+class TestInitRecursiveCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.home, "src", "a", ".git"))
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args), env=self.env,
+                              cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def test_dry_run(self):
+        result = self.aidocs("init", os.path.join(self.home, "src"), "--recursive", "--dry-run")
+        self.assertEqual(result.returncode, 1, result.stderr)
+        self.assertIn("Dry run: 1 repositories would be changed.", result.stdout)
+        self.assertEqual(os.listdir(os.path.join(self.home, "src", "a")), [".git"])
+
+    def test_does_not_estimate_tokens(self):
+        with open(os.path.join(self.home, "src", "a", "aidocs.md"), "w") as f:
+            f.write("# A\n")
+        result = self.aidocs("init", os.path.join(self.home, "src"), "--recursive")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertFalse(os.path.exists(os.path.join(self.home, ".aidocs", "tokens.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
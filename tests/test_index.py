@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import index as index_module
+from aidocs_pkg.discovery import find_repos
+from aidocs_pkg.index import RepoIndex
+from aidocs_pkg.api import discover
+
+
+class TestRepoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.root = os.path.join(self.base, "src")
+        self.index_file = os.path.join(self.base, "aidocs", "index.json")
+        for repo in ["a", "b/c", "b/d"]:
+            os.makedirs(os.path.join(self.root, repo, ".git"))
+        self.age_tree()
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def age_tree(self):
+        # Recent mtimes are deliberately not cached, so push them into the past.
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            os.utime(dirpath, (1000000000, 1000000000))
+
+    def run_index(self, full=False, jobs=1):
+        index = RepoIndex(self.index_file, self.root, full=full)
+        repos = sorted(find_repos(self.root, jobs, visit=index.visit))
+        index.save()
+        return index, repos
+
+    def test_unchanged_tree_is_not_listed_again(self):
+        first, repos = self.run_index()
+        self.assertEqual(first.reused, 0)
+        self.assertEqual(len(repos), 3)
+
+        with patch.object(index_module, "scan_directory") as mock_scan:
+            second, cached_repos = self.run_index(jobs=4)
+        mock_scan.assert_not_called()
+        self.assertEqual(cached_repos, repos)
+        self.assertEqual(second.reused, first.rescanned)
+
+    def test_only_changed_directories_are_rescanned(self):
+        self.run_index()
+        os.makedirs(os.path.join(self.root, "b", "e", ".git"))
+        index, repos = self.run_index()
+        self.assertIn(os.path.join(self.root, "b", "e"), repos)
+        # b changed and its new child e was never seen before.
+        self.assertEqual(index.rescanned, 2)
+
+        shutil.rmtree(os.path.join(self.root, "a"))
+        index, repos = self.run_index()
+        self.assertNotIn(os.path.join(self.root, "a"), repos)
+
+    def test_full_rescans_everything(self):
+        first, repos = self.run_index()
+        index, full_repos = self.run_index(full=True)
+        self.assertEqual(index.reused, 0)
+        self.assertEqual(index.rescanned, first.rescanned)
+        self.assertEqual(full_repos, repos)
+
+    def test_up_to_date_index_is_not_rewritten(self):
+        self.run_index()
+        mtime = os.stat(self.index_file).st_mtime_ns
+        os.utime(self.index_file, ns=(mtime - 10**9, mtime - 10**9))
+        self.run_index()
+        self.assertEqual(os.stat(self.index_file).st_mtime_ns, mtime - 10**9)
+
+    def test_corrupt_index_is_ignored(self):
+        os.makedirs(os.path.dirname(self.index_file))
+        with open(self.index_file, "w") as f:
+            f.write("{not json")
+        index, repos = self.run_index()
+        self.assertEqual(len(repos), 3)
+        self.assertEqual(index.reused, 0)
+
+
+class TestMultiRootDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.base = os.path.realpath(tempfile.mkdtemp())
+        self.src = os.path.join(self.base, "src")
+        for repo in ["a", "team/b", "team/c"]:
+            os.makedirs(os.path.join(self.src, repo, ".git"))
+        os.makedirs(os.path.join(self.base, "other", "d", ".git"))
+        patcher = patch("aidocs_pkg.api.INDEX_FILE", os.path.join(self.base, "index.json"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def discover(self, roots, **kwargs):
+        visited = []
+        real_scan = index_module.scan_directory
+
+        def scan(path, follow_symlinks=False):
+            visited.append(path)
+            return real_scan(path, follow_symlinks)
+
+        with patch.object(index_module, "scan_directory", scan):
+            repos = list(discover(roots, jobs=4, full=True, **kwargs))
+        return repos, visited
+
+    def test_overlapping_roots_cost_their_union(self):
+        union, union_visited = self.discover([self.src, os.path.join(self.base, "other")])
+        repos, visited = self.discover([os.path.join(self.src, "team"), self.src,
+                                        os.path.join(self.src, "team", ""),
+                                        os.path.join(self.base, "other")])
+        self.assertEqual(sorted(repos), sorted(union))
+        self.assertEqual(len(repos), 4)
+        self.assertEqual(len(visited), len(union_visited))
+
+    def test_symlinks_are_followed_once(self):
+        os.symlink(self.src, os.path.join(self.src, "team", "loop"))
+        os.symlink(os.path.join(self.base, "other"), os.path.join(self.src, "other"))
+        repos, visited = self.discover([self.src], follow_symlinks=True)
+        self.assertEqual(sorted(repos), sorted([
+            os.path.join(self.src, "a"), os.path.join(self.src, "team", "b"),
+            os.path.join(self.src, "team", "c"), os.path.join(self.base, "other", "d")]))
+        self.assertEqual(len(visited), len(set(os.path.realpath(path) for path in visited)))
+
+        repos, _ = self.discover([self.src])
+        self.assertEqual(len(repos), 3)
+
+    def test_symlinked_root_is_reported_canonically(self):
+        link = os.path.join(self.base, "link")
+        os.symlink(self.src, link)
+        repos, _ = self.discover([link, self.src])
+        self.assertEqual(len(repos), 3)
+        self.assertTrue(all(repo.startswith(self.src + os.sep) for repo in repos))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,24 @@
 import unittest
+import io
 import os
 import json
+import shutil
+import tempfile
 from unittest.mock import patch, mock_open, call, Mock
 from aidocs_pkg.main import setup, init, edit, check, AIDOCS_DIR, CONFIG_FILE, TEMPLATE_FILE, REAL_FILENAME, DEFAULT_CONFIG, DEFAULT_TEMPLATE
 
 class TestAidocs(unittest.TestCase):
 
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir)
+        for target, value in (('aidocs_pkg.api.LOCK_DIR', self.lock_dir),
+                              ('aidocs_pkg.consolidate.HASHES_DIR',
+                               os.path.join(self.lock_dir, "hashes"))):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     @patch('os.makedirs')
     @patch('os.path.exists')
     @patch('builtins.open')
@@ -45,120 +58,105 @@ class TestAidocs(unittest.TestCase):
         self.assertEqual(mock_exists.call_count, 2)
         mock_open_func.assert_not_called()
 
-    @patch('os.symlink')
-    @patch('os.remove')
-    @patch('os.path.islink')
-    @patch('os.path.lexists')
-    @patch('os.path.exists')
-    @patch('os.chdir')
-    @patch('os.getcwd', return_value='/current/dir')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('json.load')
-    def test_init(self, mock_json_load, mock_open_func, mock_getcwd, mock_chdir, mock_exists, mock_lexists, mock_islink, mock_remove, mock_symlink):
-        project_path = "/test/project"
+    def test_init(self):
+        project_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, project_path)
+        template_file = os.path.join(project_path, "template.md")
+        with open(template_file, "w") as f:
+            f.write(DEFAULT_TEMPLATE)
         real_file_path = os.path.join(project_path, REAL_FILENAME)
-        
-        # Mock config file content
-        mock_json_load.return_value = DEFAULT_CONFIG
-
-        # Mock template file content
-        mock_template_read_handle = mock_open(read_data=DEFAULT_TEMPLATE).return_value
-
-        # --- Scenario 1: aidocs.md does not exist, no existing symlinked files ---
-        mock_exists.side_effect = lambda path: {
-            TEMPLATE_FILE: True,
-            CONFIG_FILE: True,
-            real_file_path: False,
-        }.get(path, False)
-        mock_lexists.return_value = False
-        mock_islink.return_value = False
-
-        # Mock open calls for template and aidocs.md
-        mock_aidocs_md_write_handle_s1 = mock_open().return_value
-        mock_open_func.side_effect = [
-            mock_open(read_data=json.dumps(DEFAULT_CONFIG)).return_value, # For reading CONFIG_FILE (first time)
-            mock_template_read_handle, # For reading TEMPLATE_FILE
-            mock_aidocs_md_write_handle_s1, # For writing REAL_FILENAME
-            mock_open(read_data=json.dumps(DEFAULT_CONFIG)).return_value, # For reading CONFIG_FILE (second time)
-        ]
-
-        init(project_path)
-
-        # Assertions for Scenario 1
-        mock_exists.assert_any_call(real_file_path)
-        mock_open_func.assert_any_call(real_file_path, "w")
-        mock_aidocs_md_write_handle_s1.write.assert_called_once_with(DEFAULT_TEMPLATE)
-        mock_symlink.assert_any_call(REAL_FILENAME, "GEMINI.md")
-        mock_symlink.assert_any_call(REAL_FILENAME, "CLAUDE.md")
-        self.assertEqual(mock_symlink.call_count, len(DEFAULT_CONFIG["symlinks"]))
-        mock_remove.assert_not_called()
-        mock_chdir.assert_any_call(project_path)
-        mock_chdir.assert_any_call('/current/dir')
-
-        # Reset mocks for Scenario 2
-        mock_exists.reset_mock()
-        mock_lexists.reset_mock()
-        mock_islink.reset_mock()
-        mock_remove.reset_mock()
-        mock_symlink.reset_mock()
-        mock_chdir.reset_mock()
-        mock_getcwd.reset_mock()
-        mock_open_func.reset_mock()
-        mock_json_load.reset_mock()
-
-        # --- Scenario 2: aidocs.md exists, existing symlinked files with content ---
-        existing_gemini_content = "Content from GEMINI.md"
-        existing_claude_content = "Content from CLAUDE.md"
-        existing_aidocs_md_content = "Existing aidocs.md content."
-
         gemini_path = os.path.join(project_path, "GEMINI.md")
         claude_path = os.path.join(project_path, "CLAUDE.md")
 
-        mock_exists.side_effect = lambda path: {
-            TEMPLATE_FILE: True,
-            CONFIG_FILE: True,
-            real_file_path: True,
-            gemini_path: True,
-            claude_path: True,
-        }.get(path, False)
-        mock_lexists.side_effect = lambda path: {
-            gemini_path: True,
-            claude_path: True,
-        }.get(path, False)
-        mock_islink.return_value = False # Indicate they are not symlinks
-
-        mock_json_load.return_value = DEFAULT_CONFIG
-
-        mock_config_read_handle_s2 = mock_open(read_data=json.dumps(DEFAULT_CONFIG)).return_value
-        mock_gemini_read_handle_s2 = mock_open(read_data=existing_gemini_content).return_value
-        mock_claude_read_handle_s2 = mock_open(read_data=existing_claude_content).return_value
-        mock_aidocs_md_read_handle_s2 = mock_open(read_data=existing_aidocs_md_content).return_value
-        mock_aidocs_md_write_handle_s2 = mock_open().return_value
-
-        mock_open_func.side_effect = [
-            mock_config_read_handle_s2, 
-            mock_gemini_read_handle_s2, 
-            mock_claude_read_handle_s2, 
-            mock_aidocs_md_read_handle_s2, 
-            mock_aidocs_md_write_handle_s2,
-            mock_open(read_data=json.dumps(DEFAULT_CONFIG)).return_value, # For reading CONFIG_FILE (second time)
-        ]
-
-        init(project_path)
-
-        # Assertions for Scenario 2
-        mock_exists.assert_any_call(real_file_path)
-        mock_open_func.assert_any_call(real_file_path, "w")
-        expected_combined_content = existing_aidocs_md_content + \
-                                    "\n\n--- Content from GEMINI.md ---\n\n" + existing_gemini_content + \
-                                    "\n\n--- Content from CLAUDE.md ---\n\n" + existing_claude_content
-        mock_aidocs_md_write_handle_s2.write.assert_called_once_with(expected_combined_content)
-        mock_remove.assert_any_call(gemini_path)
-        mock_remove.assert_any_call(claude_path)
-        self.assertEqual(mock_remove.call_count, len(DEFAULT_CONFIG["symlinks"]))
-        self.assertEqual(mock_symlink.call_count, len(DEFAULT_CONFIG["symlinks"]))
-        mock_chdir.assert_any_call(project_path)
-        mock_chdir.assert_any_call('/current/dir')
+        # --- Scenario 1: aidocs.md does not exist, no existing files ---
+        with open(os.path.join(project_path, "requirements.txt"), "w") as f:
+            f.write("flask==3.0\n")
+        with patch('aidocs_pkg.api.TEMPLATE_FILE', template_file), \
+                patch('aidocs_pkg.stack.STACKS_DIR', os.path.join(project_path, "stacks")), \
+                patch('sys.stdout', new_callable=io.StringIO):
+            init(project_path, DEFAULT_CONFIG)
+
+        with open(real_file_path) as f:
+            content = f.read()
+        self.assertIn(f"# AI Assistant Instructions: {os.path.basename(project_path)}\n", content)
+        self.assertIn(f"- Repository: {project_path}\n- Default branch: unknown\n"
+                      "- Main language: Python\n", content)
+        self.assertIn("## Tech Stack\n\n- Python (requirements.txt): flask\n", content)
+        self.assertNotIn("{{", content)
+        for link_path in (gemini_path, claude_path):
+            self.assertEqual(os.readlink(link_path), REAL_FILENAME)
+
+        # --- Scenario 2: aidocs.md exists, existing files with content ---
+        with open(real_file_path, "w") as f:
+            f.write("Existing aidocs.md content.")
+        for link_path, content in ((gemini_path, "Content from GEMINI.md"),
+                                   (claude_path, "Content from CLAUDE.md")):
+            os.remove(link_path)
+            with open(link_path, "w") as f:
+                f.write(content)
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            init(project_path, DEFAULT_CONFIG)
+
+        with open(real_file_path) as f:
+            self.assertEqual(f.read(), "Existing aidocs.md content." +
+                             "\n\n--- Content from GEMINI.md ---\n\nContent from GEMINI.md" +
+                             "\n\n--- Content from CLAUDE.md ---\n\nContent from CLAUDE.md")
+        for link_path in (gemini_path, claude_path):
+            self.assertEqual(os.readlink(link_path), REAL_FILENAME)
+        self.assertEqual(sorted(os.listdir(project_path)),
+                         [".versions", "CLAUDE.md", "GEMINI.md",
+                          REAL_FILENAME, "requirements.txt", "stacks", "template.md"])
+
+        # --- Scenario 3: nothing left to merge, aidocs.md is not rewritten ---
+        with patch('aidocs_pkg.consolidate.write_consolidated') as mock_write, \
+                patch('sys.stdout', new_callable=io.StringIO):
+            init(project_path, DEFAULT_CONFIG)
+        mock_write.assert_not_called()
+
+    def test_init_refuses_a_locked_repository(self):
+        from aidocs_pkg.locks import lock_repo
+
+        project_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, project_path)
+        with lock_repo(project_path, self.lock_dir), \
+                patch('sys.stdout', new_callable=io.StringIO) as out:
+            with self.assertRaises(SystemExit):
+                init(project_path, {"symlinks": ["CLAUDE.md"]})
+        self.assertIn("is locked by another aidocs process", out.getvalue())
+        self.assertEqual(os.listdir(project_path), [])
+
+    def test_init_failure_keeps_files_intact(self):
+        project_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, project_path)
+        real_file_path = os.path.join(project_path, REAL_FILENAME)
+        claude_path = os.path.join(project_path, "CLAUDE.md")
+        with open(real_file_path, "w") as f:
+            f.write("Existing aidocs.md content.")
+        with open(claude_path, "w") as f:
+            f.write("x" * 100000)
+
+        real_copy = shutil.copyfileobj
+        calls = []
+
+        def failing_copy(src, dst, length=0):
+            calls.append(length)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            real_copy(src, dst, length)
+
+        with patch('shutil.copyfileobj', failing_copy), \
+                patch('sys.stdout', new_callable=io.StringIO):
+            with self.assertRaises(OSError):
+                init(project_path, {"symlinks": ["CLAUDE.md"]})
+
+        with open(real_file_path) as f:
+            self.assertEqual(f.read(), "Existing aidocs.md content.")
+        self.assertFalse(os.path.islink(claude_path))
+        self.assertEqual(os.path.getsize(claude_path), 100000)
+        self.assertEqual(sorted(os.listdir(project_path)), ["CLAUDE.md", REAL_FILENAME])
+        # Files are copied in fixed-size chunks, not read whole.
+        self.assertTrue(all(length > 0 for length in calls))
 
     @patch('os.path.exists')
     @patch('os.environ.get', return_value=None)
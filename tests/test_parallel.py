@@ -0,0 +1,42 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from aidocs_pkg.parallel import imap_unordered
+
+
+def slow_items(count, delay):
+    for item in range(count):
+        time.sleep(delay)
+        yield item
+
+
+class TestImapUnordered(unittest.TestCase):
+
+    def first_result_delay(self, executor_class=None):
+        start = time.monotonic()
+        results = imap_unordered(lambda item: item * 2, slow_items(20, 0.05), 8, executor_class)
+        first = next(results)
+        delay = time.monotonic() - start
+        self.assertEqual(sorted([first] + list(results)), [item * 2 for item in range(20)])
+        return delay
+
+    def test_first_result_does_not_wait_for_a_full_window(self):
+        # Filling the window of 16 items would take 0.8 s.
+        self.assertLess(self.first_result_delay(), 0.4)
+
+    def test_first_result_with_executor(self):
+        self.assertLess(self.first_result_delay(ThreadPoolExecutor), 0.4)
+
+    def test_results_and_errors(self):
+        self.assertEqual(sorted(imap_unordered(abs, range(-50, 0), 4)), list(range(1, 51)))
+
+        def fail(item):
+            raise ValueError(item)
+
+        with self.assertRaises(ValueError):
+            list(imap_unordered(fail, range(10), 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from aidocs_pkg.discovery import find_repos, scan_directory
+from aidocs_pkg.prune import PathMatcher, Pruner
+
+
+class TestPathMatcher(unittest.TestCase):
+
+    def test_name_and_path_patterns(self):
+        matcher = PathMatcher(["node_modules", "build/", "/top", "docs/*/out", "# comment", ""])
+        self.assertTrue(matcher.match("a/b/node_modules", "node_modules"))
+        self.assertTrue(matcher.match("build", "build"))
+        self.assertTrue(matcher.match("top", "top"))
+        self.assertIsNone(matcher.match("a/top", "top"))
+        self.assertTrue(matcher.match("docs/v1/out", "out"))
+        self.assertIsNone(matcher.match("docs/v1/v2/out", "out"))
+        self.assertIsNone(matcher.match("src", "src"))
+
+    def test_wildcards(self):
+        matcher = PathMatcher(["*.egg-info", "cache?", "[Tt]mp", "**/gen/**"])
+        self.assertTrue(matcher.match("x/pkg.egg-info", "pkg.egg-info"))
+        self.assertTrue(matcher.match("cache1", "cache1"))
+        self.assertIsNone(matcher.match("cache12", "cache12"))
+        self.assertTrue(matcher.match("Tmp", "Tmp"))
+        self.assertTrue(matcher.match("gen/a", "a"))
+        self.assertTrue(matcher.match("x/gen/a/b", "b"))
+        self.assertIsNone(matcher.match("x/gen", "gen"))
+
+    def test_last_match_wins(self):
+        matcher = PathMatcher(["build*", "!build-tools", "build-tools/old"])
+        self.assertTrue(matcher.match("build", "build"))
+        self.assertFalse(matcher.match("build-tools", "build-tools"))
+        self.assertTrue(matcher.match("build-tools/old", "old"))
+
+
+class TestPruner(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        for repo in ["a", "a/node_modules/pkg", "a/out/gen", "a/keep", "b/c/d", "vendor/e"]:
+            os.makedirs(os.path.join(self.base, repo, ".git"))
+        with open(os.path.join(self.base, "a", ".gitignore"), "w") as f:
+            f.write("out/\n*.tmp\n")
+        os.makedirs(os.path.join(self.base, "a", "x.tmp", "f", ".git"))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def find(self, **kwargs):
+        visited = []
+
+        def visit(path):
+            visited.append(path)
+            return scan_directory(path)
+
+        pruner = Pruner(self.base, visit, **kwargs)
+        repos = sorted(os.path.relpath(repo, self.base)
+                       for repo in find_repos(self.base, jobs=4, visit=pruner.visit))
+        return repos, visited
+
+    def test_no_pruning(self):
+        repos, _ = self.find()
+        self.assertEqual(len(repos), 7)
+
+    def test_exclude_patterns(self):
+        repos, visited = self.find(exclude=["node_modules", "/vendor"])
+        self.assertEqual(repos, ["a", "a/keep", "a/out/gen", "a/x.tmp/f", "b/c/d"])
+        self.assertFalse(any("node_modules" in path or "vendor" in path for path in visited))
+
+    def test_exclude_patterns_keep_repository_roots(self):
+        os.makedirs(os.path.join(self.base, "build", ".git"))
+        os.makedirs(os.path.join(self.base, "dist", "f", ".git"))
+        repos, _ = self.find(exclude=["build", "dist", "node_modules"])
+        self.assertIn("build", repos)
+        self.assertNotIn("dist/f", repos)
+        self.assertNotIn("a/node_modules/pkg", repos)
+
+    def test_gitignore(self):
+        repos, visited = self.find(gitignore=True)
+        self.assertEqual(repos, ["a", "a/keep", "a/node_modules/pkg", "b/c/d", "vendor/e"])
+        self.assertNotIn(os.path.join(self.base, "a", "out"), visited)
+
+    def test_gitignore_negation_in_nested_file(self):
+        os.makedirs(os.path.join(self.base, "a", "sub", "out", "g", ".git"))
+        with open(os.path.join(self.base, "a", "sub", ".gitignore"), "w") as f:
+            f.write("!out\n")
+        repos, _ = self.find(gitignore=True)
+        self.assertIn("a/sub/out/g", repos)
+        self.assertNotIn("a/out/gen", repos)
+
+    def test_max_depth(self):
+        repos, visited = self.find(max_depth=1)
+        self.assertEqual(repos, ["a"])
+        self.assertEqual(max(os.path.relpath(path, self.base).count(os.sep) for path in visited), 0)
+        repos, _ = self.find(max_depth=2)
+        self.assertEqual(repos, ["a", "a/keep", "vendor/e"])
+
+
+if __name__ == "__main__":
+    unittest.main()
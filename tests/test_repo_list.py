@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from aidocs_pkg.discovery import read_repo_list
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+
+class TestRepoList(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.repos = []
+        for name in ("a", "b", "c"):
+            repo = os.path.join(self.home, "src", name)
+            os.makedirs(os.path.join(repo, ".git"))
+            self.repos.append(repo)
+        with open(os.path.join(self.repos[0], "aidocs.md"), "w") as f:
+            f.write("# a\n")
+        for link_name in ("GEMINI.md", "CLAUDE.md"):
+            os.symlink("aidocs.md", os.path.join(self.repos[0], link_name))
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def aidocs(self, *args, stdin=""):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args), env=self.env,
+                              cwd=ROOT, input=stdin, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, universal_newlines=True)
+
+    def test_read_repo_list_is_lazy(self):
+        def lines():
+            yield "/src/a\n"
+            yield "\n"
+            yield "/src/b\r\n"
+            raise AssertionError("read past the consumer")
+
+        paths = read_repo_list(lines())
+        self.assertEqual([next(paths), next(paths)], ["/src/a", "/src/b"])
+
+    def test_check_listed_repos_from_stdin(self):
+        result = self.aidocs("check", "--repos-from", "-", "--format", "jsonl",
+                             stdin="\n".join(self.repos[:2]) + "\n")
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(sorted(r["path"] for r in records[:-1]), self.repos[:2])
+        self.assertEqual(records[-1]["non_compliant"], 1)
+        self.assertEqual(result.returncode, 1)
+        # Nothing was walked, so no repository index was written.
+        self.assertFalse(os.path.exists(os.path.join(self.home, ".aidocs", "index.json")))
+
+    def test_check_listed_repos_from_file(self):
+        repo_list = os.path.join(self.home, "repos.txt")
+        with open(repo_list, "w") as f:
+            f.write(self.repos[0] + "\n")
+        result = self.aidocs("check", "--repos-from", repo_list)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("Checked 1 git repositories.", result.stdout)
+
+    def test_listed_paths_that_cannot_be_read(self):
+        missing = os.path.join(self.home, "gone")
+        result = self.aidocs("check", "--repos-from", "-", "--format", "jsonl",
+                             stdin=f"{self.repos[0]}\n{missing}\n")
+        records = {r.get("path"): r for r in map(json.loads, result.stdout.splitlines())}
+        self.assertEqual(records[missing]["error"], "No such file or directory")
+        self.assertFalse(records[missing]["missing_file"])
+        self.assertEqual((records[None]["non_compliant"], records[None]["unreadable"]), (0, 1))
+        self.assertEqual(result.returncode, 1)
+
+        result = self.aidocs("check", "--repos-from", "-", "--fix", stdin=missing + "\n")
+        self.assertIn("Cannot read: No such file or directory", result.stdout)
+        self.assertFalse(os.path.exists(missing))
+        self.assertEqual(result.returncode, 1)
+
+    def test_search_paths_are_rejected(self):
+        result = self.aidocs("check", self.home, "--repos-from", "-")
+        self.assertEqual(result.returncode, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
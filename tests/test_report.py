@@ -0,0 +1,78 @@
+import io
+import json
+import unittest
+
+from aidocs_pkg.report import render
+
+RESULTS = [
+    {"path": "/src/a", "compliant": True, "missing_file": False, "missing_links": [], "invalid_links": []},
+    {"path": "/src/b", "compliant": False, "missing_file": True, "missing_links": [], "invalid_links": []},
+    {"path": "/src/c", "compliant": False, "missing_file": False, "missing_links": ["CLAUDE.md"], "invalid_links": ["GEMINI.md"]},
+]
+
+
+class TestReport(unittest.TestCase):
+
+    def test_text(self):
+        out = io.StringIO()
+        summary = render(iter(RESULTS), "text", out)
+        self.assertEqual(summary["non_compliant"], 2)
+        text = out.getvalue()
+        self.assertNotIn("/src/a", text)
+        self.assertIn("- Repository: /src/b\n  Missing: aidocs.md", text)
+        self.assertIn("  Missing symlinks: CLAUDE.md\n  Invalid symlinks: GEMINI.md", text)
+        self.assertIn("Checked 3 git repositories: 2 not compliant.", text)
+
+        out = io.StringIO()
+        unreadable = {"path": "/src/d", "compliant": False, "missing_file": False,
+                      "missing_links": [], "invalid_links": [], "error": "No such file or directory"}
+        summary = render(iter(RESULTS + [unreadable]), "text", out)
+        self.assertEqual((summary["non_compliant"], summary["unreadable"]), (2, 1))
+        self.assertIn("- Repository: /src/d\n  Cannot read: No such file or directory\n", out.getvalue())
+        self.assertIn("Checked 4 git repositories: 2 not compliant, 1 could not be read.",
+                      out.getvalue())
+
+        out = io.StringIO()
+        render(iter([]), "text", out)
+        self.assertEqual(out.getvalue(), "No git repositories found.\n")
+
+    def test_jsonl(self):
+        out = io.StringIO()
+        render(iter(RESULTS), "jsonl", out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r["type"] for r in records], ["repo", "repo", "repo", "summary"])
+        self.assertEqual(records[2]["invalid_links"], ["GEMINI.md"])
+        self.assertEqual(records[-1], {"type": "summary", "repos": 3, "compliant": 1, "non_compliant": 2,
+                                       "unreadable": 0})
+
+    def test_json(self):
+        for results in (RESULTS, []):
+            out = io.StringIO()
+            render(iter(results), "json", out)
+            document = json.loads(out.getvalue())
+            self.assertEqual(document["repos"], results)
+            self.assertEqual(document["summary"]["repos"], len(results))
+
+    def test_token_summary(self):
+        results = [dict(result, tokens=tokens, over_budget=tokens > 500)
+                   for result, tokens in zip(RESULTS, (900, 100, 300))]
+        results[1]["tokens"] = None
+        out = io.StringIO()
+        summary = render(iter(results), "text", out)
+        self.assertEqual(summary["tokens"], 1200)
+        self.assertEqual(summary["over_budget"], 1)
+        self.assertEqual(summary["largest"], [{"path": "/src/a", "tokens": 900},
+                                              {"path": "/src/c", "tokens": 300}])
+        text = out.getvalue()
+        # Compliant but over budget.
+        self.assertIn("- Repository: /src/a\n  Over token budget: aidocs.md is about 900 tokens", text)
+        self.assertIn("Largest aidocs.md files (estimated tokens):\n        900  /src/a\n", text)
+        self.assertIn("Total: 1,200 tokens; 1 over the token budget.", text)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            render(iter(RESULTS), "xml", io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import search as search_module
+from aidocs_pkg.search import SearchIndex
+from aidocs_pkg.sections import split_sections
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+DOC_A = """# Project A
+
+Intro text.
+
+## Conventions
+
+Use black for formatting.
+
+```
+# not a heading
+```
+
+## Testing
+
+Run pytest before pushing.
+"""
+
+DOC_B = """# Project B
+
+## Deployment
+
+Deploy with kubernetes and helm.
+
+--- Content from CLAUDE.md ---
+
+Formatting is done by prettier.
+"""
+
+
+class TestSplitSections(unittest.TestCase):
+
+    def test_headings_split_sections(self):
+        sections = split_sections(DOC_A)
+        self.assertEqual([(h, line) for h, line, _ in sections],
+                         [("Project A", 1), ("Conventions", 5), ("Testing", 13)])
+        self.assertIn("# not a heading", sections[1][2])
+
+    def test_merge_markers_split_sections(self):
+        headings = [h for h, _, _ in split_sections(DOC_B)]
+        self.assertEqual(headings, ["Project B", "Deployment", "Content from CLAUDE.md"])
+
+    def test_text_before_first_heading(self):
+        self.assertEqual(split_sections("preamble\n# Title\nbody\n"),
+                         [("", 1, "preamble"), ("Title", 2, "body")])
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.root = os.path.join(self.base, "src")
+        self.db = os.path.join(self.base, "aidocs", "search.db")
+        self.repos = {}
+        for name, text in (("a", DOC_A), ("b", DOC_B)):
+            repo = os.path.join(self.root, name)
+            os.makedirs(repo)
+            self.write(repo, text)
+            self.repos[name] = repo
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, repo, text):
+        with open(os.path.join(repo, "aidocs.md"), "w") as f:
+            f.write(text)
+
+    def update(self, repos=None, jobs=1):
+        with SearchIndex(self.db) as index:
+            return index.update(repos or sorted(self.repos.values()), [self.root], jobs)
+
+    def search(self, query, limit=10):
+        with SearchIndex(self.db) as index:
+            return index.search(query, limit)
+
+    def test_ranked_section_hits(self):
+        self.assertEqual(self.update(jobs=4),
+                         {"added": 2, "updated": 0, "unchanged": 0, "removed": 0})
+        hits = self.search("formatting")
+        self.assertEqual([(hit.repo, hit.heading) for hit in hits],
+                         [(self.repos["a"], "Conventions"),
+                          (self.repos["b"], "Content from CLAUDE.md")])
+        self.assertEqual(hits[0].snippet, "Use black for formatting.")
+        self.assertEqual(hits[0].path, os.path.join(self.repos["a"], "aidocs.md"))
+        self.assertEqual(hits[0].line, 5)
+
+        hits = self.search("deploy kubernetes")
+        self.assertEqual(hits[0].heading, "Deployment")
+        self.assertEqual(self.search("nothing-like-this"), [])
+
+    def test_query_terms_match_as_prefixes(self):
+        self.update()
+        self.assertEqual([hit.heading for hit in self.search("kube")], ["Deployment"])
+
+    def test_unchanged_files_are_not_read(self):
+        self.update()
+        with patch.object(search_module, "split_sections") as mock_split, \
+                patch("builtins.open") as mock_open:
+            counts = self.update()
+        mock_open.assert_not_called()
+        mock_split.assert_not_called()
+        self.assertEqual(counts["unchanged"], 2)
+
+    def test_touched_files_are_not_reindexed(self):
+        self.update()
+        path = os.path.join(self.repos["a"], "aidocs.md")
+        os.utime(path, ns=(1, 1))
+        with patch.object(search_module, "split_sections") as mock_split:
+            counts = self.update()
+        mock_split.assert_not_called()
+        self.assertEqual(counts["unchanged"], 2)
+
+    def test_changed_and_removed_files(self):
+        self.update()
+        self.write(self.repos["a"], "# Project A\n\n## Linting\n\nUse ruff.\n")
+        os.utime(os.path.join(self.repos["a"], "aidocs.md"), ns=(1, 1))
+        os.remove(os.path.join(self.repos["b"], "aidocs.md"))
+        self.assertEqual(self.update(),
+                         {"added": 0, "updated": 1, "unchanged": 0, "removed": 1})
+        self.assertEqual([hit.heading for hit in self.search("ruff")], ["Linting"])
+        self.assertEqual(self.search("black"), [])
+        self.assertEqual(self.search("kubernetes"), [])
+
+    def test_repositories_no_longer_found_are_dropped(self):
+        self.update()
+        counts = self.update([self.repos["a"]])
+        self.assertEqual(counts["removed"], 1)
+        self.assertEqual(self.search("kubernetes"), [])
+
+        # Repositories outside the updated roots are kept.
+        with SearchIndex(self.db) as index:
+            index.update([], [os.path.join(self.base, "elsewhere")])
+        self.assertEqual(len(self.search("black")), 1)
+
+
+class TestSearchCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.root = os.path.join(self.home, "src")
+        repo = os.path.join(self.root, "a")
+        os.makedirs(os.path.join(repo, ".git"))
+        with open(os.path.join(repo, "aidocs.md"), "w") as f:
+            f.write(DOC_A)
+        self.run_aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def run_aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args),
+                              env=self.env, capture_output=True, text=True)
+
+    def test_update_then_search(self):
+        result = self.run_aidocs("search", "pytest")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("aidocs search --update", result.stdout)
+
+        result = self.run_aidocs("search", "--update", self.root)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("1 added, 0 updated, 0 unchanged, 0 removed.", result.stdout)
+
+        result = self.run_aidocs("search", "pytest")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(os.path.join(self.root, "a", "aidocs.md") + ":13: Testing", result.stdout)
+        self.assertIn("Run pytest before pushing.", result.stdout)
+
+        result = self.run_aidocs("search", "black", "--format", "json")
+        hits = json.loads(result.stdout)
+        self.assertEqual([hit["heading"] for hit in hits], ["Conventions"])
+
+        result = self.run_aidocs("search", "nonexistent")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("No matches.", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
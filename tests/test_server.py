@@ -0,0 +1,96 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from aidocs_pkg.client import request
+from aidocs_pkg.constants import REAL_FILENAME
+from aidocs_pkg.watch import PollingBackend, Watcher
+
+if hasattr(socket, "AF_UNIX"):
+    from aidocs_pkg.server import ComplianceServer
+
+SYMLINKS = ["GEMINI.md", "CLAUDE.md"]
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class TestComplianceServer(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.good = os.path.join(self.base, "good")
+        self.bad = os.path.join(self.base, "bad")
+        for repo in (self.good, self.bad):
+            os.makedirs(os.path.join(repo, ".git"))
+            open(os.path.join(repo, REAL_FILENAME), "w").close()
+        for link_name in SYMLINKS:
+            os.symlink(REAL_FILENAME, os.path.join(self.good, link_name))
+        os.makedirs(os.path.join(self.good, "src", "pkg"))
+
+        self.socket_path = os.path.join(self.base, "aidocs.sock")
+        self.backend = PollingBackend(interval=60)
+        self.watcher = Watcher(self.base, SYMLINKS, lambda record: None, self.backend, jobs=1)
+        self.watcher.scan()
+        self.server = ComplianceServer(self.socket_path, self.watcher)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.base)
+
+    def test_status(self):
+        response = request(self.socket_path, {"op": "status", "path": os.path.join(self.good, "src", "pkg")})
+        self.assertTrue(response["ok"])
+        self.assertTrue(response["known"])
+        self.assertEqual(response["repo"]["path"], self.good)
+        self.assertTrue(response["repo"]["compliant"])
+
+        response = request(self.socket_path, {"op": "status", "path": self.bad})
+        self.assertEqual(response["repo"]["missing_links"], SYMLINKS)
+
+        response = request(self.socket_path, {"op": "status", "path": os.path.dirname(self.base)})
+        self.assertFalse(response["ok"])
+
+    def test_unwatched_repository_is_inspected_on_demand(self):
+        other = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(other, ".git"))
+            response = request(self.socket_path, {"op": "status", "path": other})
+            self.assertFalse(response["known"])
+            self.assertTrue(response["repo"]["missing_file"])
+        finally:
+            shutil.rmtree(other)
+
+    def test_list_and_summary(self):
+        response = request(self.socket_path, {"op": "list", "non_compliant": True})
+        self.assertEqual([repo["path"] for repo in response["repos"]], [self.bad])
+        response = request(self.socket_path, {"op": "summary"})
+        self.assertEqual(response["summary"]["repos"], 2)
+        self.assertEqual(response["summary"]["non_compliant"], 1)
+
+    def test_bad_requests(self):
+        self.assertFalse(request(self.socket_path, {"op": "nope"})["ok"])
+        self.assertFalse(request(self.socket_path, ["not", "an", "object"])["ok"])
+        self.assertFalse(request(self.socket_path, {"op": "status"})["ok"])
+
+    def test_refuses_second_server(self):
+        with self.assertRaises(OSError):
+            ComplianceServer(self.socket_path, self.watcher)
+
+    def test_stale_socket_is_replaced(self):
+        stale_path = os.path.join(self.base, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(stale_path)
+        stale.close()
+        server = ComplianceServer(stale_path, self.watcher)
+        server.server_close()
+        self.assertFalse(os.path.exists(stale_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from aidocs_pkg.discovery import find_repos, restrict_to_shard, scan_directory, shard_of
+from aidocs_pkg.report import read_results, render
+from benchmarks.fleet import generate_fleet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.fleet = os.path.join(self.base, "fleet")
+        os.makedirs(self.fleet)
+        generate_fleet(self.fleet, repos=60, depth=1, fanout=12, node_modules_every=0)
+        os.makedirs(os.path.join(self.fleet, "top", ".git"))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("group3", 4), shard_of("group3", 4))
+        self.assertTrue(all(1 <= shard_of(f"d{i}", 3) <= 3 for i in range(50)))
+
+    def test_shards_are_disjoint_and_complete(self):
+        expected = sorted(find_repos(self.fleet))
+        found = []
+        for shard in (1, 2, 3):
+            visit = restrict_to_shard(scan_directory, self.fleet, shard, 3)
+            found.extend(find_repos(self.fleet, jobs=4, visit=visit))
+        self.assertEqual(sorted(found), expected)
+
+    def test_root_repository_belongs_to_first_shard(self):
+        repo = os.path.join(self.fleet, "top")
+        self.assertEqual(list(find_repos(repo, visit=restrict_to_shard(scan_directory, repo, 1, 2))),
+                         [repo])
+        self.assertEqual(list(find_repos(repo, visit=restrict_to_shard(scan_directory, repo, 2, 2))),
+                         [])
+
+
+class TestShardedCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.fleet = os.path.join(self.base, "fleet")
+        os.makedirs(self.fleet)
+        generate_fleet(self.fleet, repos=40, depth=2, fanout=4, node_modules_every=0)
+        self.env = dict(os.environ, HOME=self.base, PYTHONPATH=ROOT)
+        self.aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def aidocs(self, *args):
+        return subprocess.run([sys.executable, "-c", RUN_MAIN] + list(args), env=self.env, cwd=ROOT,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def test_merged_shards_match_unsharded_run(self):
+        shards = 3
+        processes = []
+        for shard in range(1, shards + 1):
+            output = open(os.path.join(self.base, f"shard{shard}.jsonl"), "w")
+            processes.append((output, subprocess.Popen(
+                [sys.executable, "-c", RUN_MAIN, "check", self.fleet, "--full",
+                 "--shard", f"{shard}/{shards}", "--format", "jsonl"],
+                env=self.env, cwd=ROOT, stdout=output)))
+        for output, process in processes:
+            process.wait()
+            output.close()
+
+        merged = self.aidocs("report", "merge", "--format", "json",
+                             *(output.name for output, _ in processes))
+        single = self.aidocs("check", self.fleet, "--full", "--format", "json")
+        self.assertEqual(merged.returncode, single.returncode)
+        merged, single = json.loads(merged.stdout), json.loads(single.stdout)
+        key = lambda result: result["path"]
+        self.assertEqual(sorted(merged["repos"], key=key), sorted(single["repos"], key=key))
+        self.assertEqual(merged["summary"], single["summary"])
+
+    def test_merge_rejects_incomplete_output(self):
+        partial = os.path.join(self.base, "partial.jsonl")
+        with open(partial, "w") as f:
+            f.write(json.dumps({"type": "repo", "path": "/src/a", "compliant": True,
+                                "missing_file": False, "missing_links": [], "invalid_links": []}))
+            f.write("\n")
+        result = self.aidocs("report", "merge", partial)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("did not finish", result.stderr)
+
+    def test_bad_shard_option(self):
+        self.assertEqual(self.aidocs("check", self.fleet, "--shard", "4/3").returncode, 1)
+
+
+class TestReadResults(unittest.TestCase):
+
+    RESULTS = [
+        {"path": "/src/a", "compliant": True, "missing_file": False, "missing_links": [],
+         "invalid_links": []},
+        {"path": "/src/b", "compliant": False, "missing_file": True, "missing_links": [],
+         "invalid_links": []},
+    ]
+
+    def test_round_trip(self):
+        for fmt in ("json", "jsonl"):
+            out = io.StringIO()
+            render(iter(self.RESULTS), fmt, out)
+            out.seek(0)
+            self.assertEqual(list(read_results(out)), self.RESULTS)
+
+    def test_text_output_is_rejected(self):
+        out = io.StringIO()
+        render(iter(self.RESULTS), "text", out)
+        out.seek(0)
+        with self.assertRaises(ValueError):
+            list(read_results(out))
+
+
+if __name__ == "__main__":
+    unittest.main()
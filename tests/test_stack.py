@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import stack
+from aidocs_pkg.stack import detect_stack, format_stack, main_language, parse_manifests
+
+PYPROJECT = """
+[project]
+name = "svc"
+requires-python = ">=3.9"
+dependencies = [
+    "fastapi>=0.100",
+    "pydantic[email]",  # validation
+]
+
+[[project.scripts]]
+x = "y"
+
+[tool.poetry.dependencies]
+python = "^3.9"
+celery = "^5"
+"""
+
+CARGO = """
+[package]
+name = "cli"
+edition = "2021"
+
+[dependencies]
+serde = { version = "1", features = ["derive"] }
+clap = "4"
+"""
+
+GO_MOD = """module example.com/svc
+
+go 1.22
+
+require github.com/gin-gonic/gin v1.9.1
+
+require (
+\tgithub.com/lib/pq v1.10.9
+\tgolang.org/x/sys v0.15.0 // indirect
+)
+"""
+
+
+class TestStackDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base, "repo")
+        os.makedirs(self.repo)
+        self.cache_dir = os.path.join(self.base, "stacks")
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, name, text):
+        with open(os.path.join(self.repo, name), "w") as f:
+            f.write(text)
+
+    def parse(self, name, text):
+        self.write(name, text)
+        return parse_manifests(self.repo, [name])[0]
+
+    def test_manifests(self):
+        self.assertEqual(self.parse("pyproject.toml", PYPROJECT),
+                         {"manifest": "pyproject.toml", "language": "Python", "version": ">=3.9",
+                          "dependencies": ["fastapi", "pydantic", "celery"]})
+        self.assertEqual(self.parse("Cargo.toml", CARGO)["dependencies"], ["serde", "clap"])
+        go = self.parse("go.mod", GO_MOD)
+        self.assertEqual((go["version"], go["dependencies"]),
+                         ("1.22", ["github.com/gin-gonic/gin", "github.com/lib/pq"]))
+        package = self.parse("package.json", json.dumps({
+            "dependencies": {"react": "18"}, "devDependencies": {"typescript": "5"},
+            "engines": {"node": ">=18"}}))
+        self.assertEqual((package["language"], package["version"], package["dependencies"]),
+                         ("TypeScript", "node >=18", ["react"]))
+        self.assertEqual(self.parse("requirements.txt", "# pinned\nDjango==5.0\n-r base.txt\n"
+                                                        "requests[socks] ; python_version>'3'\n")
+                         ["dependencies"], ["Django", "requests"])
+
+    def test_toml_fallback_without_tomllib(self):
+        with patch.object(stack, "tomllib", None):
+            self.assertEqual(self.parse("pyproject.toml", PYPROJECT)["dependencies"],
+                             ["fastapi", "pydantic", "celery"])
+            self.assertEqual(self.parse("Cargo.toml", CARGO)["version"], "2021")
+
+    def test_malformed_manifests_are_skipped(self):
+        self.write("package.json", "[1, 2]")
+        self.write("pyproject.toml", "project = 'x'")
+        self.write("go.mod", "go 1.21\n")
+        self.assertEqual(main_language(detect_stack(self.repo, self.cache_dir)), "Go")
+
+    def test_cached_until_a_manifest_changes(self):
+        self.write("requirements.txt", "flask\n")
+        self.assertEqual(main_language(detect_stack(self.repo, self.cache_dir)), "Python")
+        with patch.object(stack, "parse_manifests") as parse:
+            detect_stack(self.repo, self.cache_dir)
+        parse.assert_not_called()
+
+        self.write("requirements.txt", "flask\ncelery\n")
+        self.write("Cargo.toml", CARGO)
+        detected = detect_stack(self.repo, self.cache_dir)
+        self.assertEqual([entry["manifest"] for entry in detected], ["Cargo.toml", "requirements.txt"])
+        self.assertEqual(detected[1]["dependencies"], ["flask", "celery"])
+
+    def test_format_stack(self):
+        entries = [{"manifest": "package.json", "language": "JavaScript", "version": None,
+                    "dependencies": [f"dep{i}" for i in range(12)]},
+                   {"manifest": "setup.py", "language": "Python", "version": None,
+                    "dependencies": []}]
+        self.assertEqual(format_stack(entries),
+                         "- JavaScript (package.json): " + ", ".join(f"dep{i}" for i in range(10)) +
+                         " and 2 more\n- Python (setup.py)")
+        self.assertEqual(format_stack([]), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only some commands need. None of them may be imported just to
+# print the help, and a plain check must not pull in the fix, watch or serve
+# machinery.
+COMMAND_MODULES = ("json", "subprocess", "threading", "concurrent.futures", "multiprocessing",
+                   "socket", "ctypes", "hashlib", "aidocs_pkg.compliance",
+                   "aidocs_pkg.discovery", "aidocs_pkg.index", "aidocs_pkg.report")
+FIX_AND_SERVE_MODULES = ("subprocess", "concurrent.futures", "multiprocessing", "socket",
+                         "ctypes", "aidocs_pkg.fix", "aidocs_pkg.watch", "aidocs_pkg.server")
+
+# Startup budgets, in milliseconds above a bare interpreter.
+IMPORT_BUDGET_MS = 10
+HELP_BUDGET_MS = 30
+CHECK_BUDGET_MS = 60
+
+RUN_MAIN = "import sys; from aidocs_pkg.main import main; sys.argv[0] = 'aidocs'; main()"
+LOADED_MODULES = "import atexit, sys; atexit.register(lambda: print(*sorted(sys.modules), file=sys.stderr))"
+
+
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.repo = os.path.join(self.home, "repo")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        self.env = dict(os.environ, HOME=self.home, PYTHONPATH=ROOT)
+        self.aidocs("setup")
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def python(self, *args):
+        return subprocess.run([sys.executable] + list(args), env=self.env, cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+
+    def aidocs(self, *args):
+        return self.python("-c", RUN_MAIN, *args)
+
+    def loaded_modules(self, *args):
+        result = self.python("-c", LOADED_MODULES + "; " + RUN_MAIN, *args)
+        return set(result.stderr.split())
+
+    def best_time_ms(self, *args, runs=5):
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.python(*args)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_help_imports_no_command_modules(self):
+        loaded = self.loaded_modules("help")
+        self.assertIn("aidocs_pkg.main", loaded)
+        self.assertEqual(loaded.intersection(COMMAND_MODULES), set())
+
+    def test_check_imports_no_fix_or_serve_modules(self):
+        loaded = self.loaded_modules("check", self.repo)
+        self.assertIn("aidocs_pkg.compliance", loaded)
+        self.assertEqual(loaded.intersection(FIX_AND_SERVE_MODULES), set())
+
+    def test_single_repository_locks_need_no_process_pool(self):
+        for args in (("init", self.repo), ("build", self.home)):
+            loaded = self.loaded_modules(*args)
+            self.assertIn("aidocs_pkg.locks", loaded)
+            self.assertEqual(loaded.intersection(("concurrent.futures", "multiprocessing",
+                                                  "aidocs_pkg.fix")), set())
+
+    def test_import_time_budget(self):
+        result = self.python("-X", "importtime", "-c", "import aidocs_pkg.main")
+        cumulative_us = None
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == "aidocs_pkg.main":
+                cumulative_us = int(fields[1])
+        self.assertIsNotNone(cumulative_us, result.stderr)
+        self.assertLess(cumulative_us / 1000, IMPORT_BUDGET_MS)
+
+    def test_wall_clock_budget(self):
+        bare = self.best_time_ms("-c", "pass")
+        self.assertLess(self.best_time_ms("-c", RUN_MAIN, "help") - bare, HELP_BUDGET_MS)
+        self.assertLess(self.best_time_ms("-c", RUN_MAIN, "check", self.repo) - bare,
+                        CHECK_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import builtins
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+from aidocs_pkg.main import extract_global_options
+from aidocs_pkg.stats import Stats
+
+
+class TestStats(unittest.TestCase):
+
+    def test_timed_and_report(self):
+        stats = Stats()
+        visit = stats.timed("discovery", lambda path: (False, []), counter="dirs_visited")
+        for path in ("a", "b", "c"):
+            visit(path)
+        with stats.phase("config"):
+            pass
+        self.assertEqual(stats.counters["dirs_visited"], 3)
+        self.assertGreater(stats.times["discovery"], 0)
+
+        out = io.StringIO()
+        stats.report(out)
+        self.assertRegex(out.getvalue(), r"dirs visited\s+3\n")
+
+    def test_install_counts_reads_and_output(self):
+        real_open, real_stdout = builtins.open, sys.stdout
+        stats = Stats()
+        with tempfile.NamedTemporaryFile("w", delete=False) as f:
+            f.write("x")
+        try:
+            sys.stdout = io.StringIO()
+            stats.install()
+            try:
+                with open(f.name) as handle:
+                    handle.read()
+                with open(f.name, "a") as handle:
+                    handle.write("y")
+                print("héllo")
+                output = sys.stdout._stream.getvalue()
+            finally:
+                stats.uninstall()
+            self.assertIs(builtins.open, real_open)
+            self.assertIsInstance(sys.stdout, io.StringIO)
+        finally:
+            sys.stdout = real_stdout
+            os.remove(f.name)
+        self.assertEqual(output, "héllo\n")
+        self.assertEqual(stats.counters["files_read"], 1)
+        self.assertEqual(stats.counters["bytes_written"], len("héllo\n".encode("utf-8")))
+
+    def test_extract_global_options(self):
+        self.assertEqual(extract_global_options(["--stats", "check", ".", "--jobs", "2"]),
+                         (["check", ".", "--jobs", "2"], True, None))
+        self.assertEqual(extract_global_options(["check", "--profile", "out.prof", "."]),
+                         (["check", "."], False, "out.prof"))
+        self.assertEqual(extract_global_options(["--profile=x.prof", "help"]),
+                         (["help"], False, "x.prof"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import api
+from aidocs_pkg.constants import REAL_FILENAME
+from aidocs_pkg.project import default_branch
+from aidocs_pkg.templates import Template, TemplateCache, TemplateError
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render(self):
+        template = Template("# {{project_name}}\n{{ language }} on {{ language }}, {not} {{ x-y }}\n")
+        self.assertEqual(template.names, {"project_name", "language"})
+        self.assertEqual(template.render({"project_name": "demo", "language": lambda: "Go"}),
+                         "# demo\nGo on Go, {not} {{ x-y }}\n")
+
+    def test_only_used_variables_are_computed(self):
+        def fail():
+            raise AssertionError("computed an unused variable")
+
+        self.assertEqual(Template("{{ repo_path }}").render({"repo_path": "/r", "language": fail}),
+                         "/r")
+
+    def test_unknown_placeholders_are_literal_text(self):
+        template = Template("Use {{ ticket }} in PR titles for {{ project_name }}.")
+        self.assertEqual(template.names, {"project_name"})
+        self.assertEqual(template.render({"project_name": "demo"}),
+                         "Use {{ ticket }} in PR titles for demo.")
+
+    def test_cache_compiles_once_per_version(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        path = os.path.join(base, "t.md")
+        with open(path, "w") as f:
+            f.write("{{ project_name }}")
+        cache = TemplateCache()
+        first = cache.load(path)
+        self.assertIs(cache.load(path), first)
+        with open(path, "w") as f:
+            f.write("{{ nope }}!")
+        self.assertEqual(cache.load(path).render({}), "{{ nope }}!")
+        with self.assertRaises(TemplateError):
+            cache.load(os.path.join(base, "missing.md"))
+
+
+class TestProjectVariables(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base, "repo")
+        os.makedirs(os.path.join(self.repo, ".git", "refs", "remotes", "origin"))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_default_branch(self):
+        self.assertEqual(default_branch(self.repo), "unknown")
+        self.write(os.path.join(self.repo, ".git", "HEAD"), "ref: refs/heads/feature/x\n")
+        self.assertEqual(default_branch(self.repo), "feature/x")
+        self.write(os.path.join(self.repo, ".git", "refs", "remotes", "origin", "HEAD"),
+                   "ref: refs/remotes/origin/trunk\n")
+        self.assertEqual(default_branch(self.repo), "trunk")
+
+    def test_default_branch_of_worktree(self):
+        worktree_git = os.path.join(self.repo, ".git", "worktrees", "wt")
+        os.makedirs(worktree_git)
+        self.write(os.path.join(worktree_git, "HEAD"), "ref: refs/heads/wip\n")
+        self.write(os.path.join(worktree_git, "commondir"), "../..\n")
+        worktree = os.path.join(self.base, "wt")
+        os.makedirs(worktree)
+        self.write(os.path.join(worktree, ".git"), f"gitdir: {worktree_git}\n")
+        self.assertEqual(default_branch(worktree), "wip")
+        self.write(os.path.join(self.repo, ".git", "refs", "remotes", "origin", "HEAD"),
+                   "ref: refs/remotes/origin/main\n")
+        self.assertEqual(default_branch(worktree), "main")
+
+
+class TestNamedTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.base = os.path.realpath(tempfile.mkdtemp())
+        self.repo = os.path.join(self.base, "svc")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        templates = os.path.join(self.base, "templates")
+        os.makedirs(templates)
+        with open(os.path.join(templates, "service.md"), "w") as f:
+            f.write("# {{ project_name }} service\n")
+        self.default = os.path.join(self.base, "template.md")
+        with open(self.default, "w") as f:
+            f.write("# {{ project_name }}\n")
+        for target, value in (("aidocs_pkg.api.TEMPLATE_FILE", self.default),
+                              ("aidocs_pkg.templates.TEMPLATES_DIR", templates),
+                              ("aidocs_pkg.api.LOCK_DIR", os.path.join(self.base, "locks")),
+                              ("aidocs_pkg.consolidate.HASHES_DIR",
+                               os.path.join(self.base, "hashes"))):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def read(self):
+        with open(os.path.join(self.repo, REAL_FILENAME)) as f:
+            return f.read()
+
+    def test_default_and_named_templates(self):
+        result = api.init(self.repo, {"symlinks": []})
+        self.assertEqual(result.template, self.default)
+        self.assertEqual(self.read(), "# svc\n")
+
+        os.remove(os.path.join(self.repo, REAL_FILENAME))
+        api.init(self.repo, {"symlinks": [], "template": "service"})
+        self.assertEqual(self.read(), "# svc service\n")
+
+    def test_missing_template_changes_nothing(self):
+        with self.assertRaises(TemplateError):
+            api.init(self.repo, {"symlinks": ["CLAUDE.md"]}, template="nope")
+        with self.assertRaises(TemplateError):
+            api.init(self.repo, {"symlinks": []}, template="../template")
+        self.assertEqual(os.listdir(self.repo), [".git"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aidocs_pkg import tokens as tokens_module
+from aidocs_pkg.tokens import TokenCache, estimate_tokens
+
+
+class TestEstimateTokens(unittest.TestCase):
+
+    def test_estimates(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("Run the tests"), 3)
+        # Long words, numbers in groups of three, punctuation in pairs.
+        self.assertEqual(estimate_tokens("internationalization"), 3)
+        self.assertEqual(estimate_tokens("1234567"), 3)
+        self.assertEqual(estimate_tokens("## a\n\nb"), 4)
+        self.assertEqual(estimate_tokens("日本語"), 3)
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.base, "aidocs", "tokens.json")
+        self.files = []
+        for name in ("a.md", "b.md"):
+            path = os.path.join(self.base, name)
+            with open(path, "w") as f:
+                f.write("# Notes\n\nKeep it short.\n")
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def estimate(self, cache, path):
+        return cache.estimate(path, os.stat(path))
+
+    def test_unchanged_files_are_not_read(self):
+        cache = TokenCache(self.cache_file)
+        first = self.estimate(cache, self.files[0])
+        cache.save()
+
+        cache = TokenCache(self.cache_file)
+        with patch("builtins.open") as mock_open:
+            self.assertEqual(self.estimate(cache, self.files[0]), first)
+        mock_open.assert_not_called()
+
+    def test_same_content_is_estimated_once(self):
+        cache = TokenCache(self.cache_file)
+        with patch.object(tokens_module, "estimate_tokens", return_value=7) as mock_estimate:
+            self.assertEqual(self.estimate(cache, self.files[0]), 7)
+            self.assertEqual(self.estimate(cache, self.files[1]), 7)
+            os.utime(self.files[0], ns=(1, 1))
+            self.assertEqual(self.estimate(cache, self.files[0]), 7)
+        self.assertEqual(mock_estimate.call_count, 1)
+
+    def test_changed_content_is_estimated_again(self):
+        cache = TokenCache(self.cache_file)
+        first = self.estimate(cache, self.files[0])
+        with open(self.files[0], "a") as f:
+            f.write("More rules to follow.\n")
+        self.assertGreater(self.estimate(cache, self.files[0]), first)
+        cache.save()
+        self.assertTrue(os.path.exists(self.cache_file))
+
+    def test_unreadable_file(self):
+        cache = TokenCache(self.cache_file)
+        st = os.stat(self.files[0])
+        os.remove(self.files[0])
+        self.assertIsNone(cache.estimate(self.files[0], st))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from aidocs_pkg.api import link_overrides
+from aidocs_pkg.constants import PROJECT_CONFIG_FILE, REAL_FILENAME
+from aidocs_pkg.watch import InotifyBackend, PollingBackend, Watcher
+
+SYMLINKS = ["GEMINI.md", "CLAUDE.md"]
+
+
+class WatcherTestMixin:
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.repo = os.path.join(self.base, "group", "repo")
+        os.makedirs(os.path.join(self.repo, ".git"))
+        open(os.path.join(self.repo, REAL_FILENAME), "w").close()
+        self.events = []
+        self.backend = self.make_backend()
+        os.makedirs(os.path.join(self.repo, "node_modules", "dep"))
+        os.makedirs(os.path.join(self.base, "build", "vendored", ".git"))
+        self.watcher = Watcher(self.base, SYMLINKS, self.events.append, self.backend, jobs=1,
+                               overrides=link_overrides({"symlinks": SYMLINKS}),
+                               exclude=["build"])
+        self.watcher.scan()
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.base)
+
+    def drain(self):
+        while self.watcher.process(timeout=0.2):
+            pass
+        events = [(e["event"], os.path.relpath(e["path"], self.base)) for e in self.events]
+        del self.events[:]
+        return events
+
+    def test_initial_scan_reports_violations(self):
+        self.assertEqual([(e["event"], e["missing_links"]) for e in self.events],
+                         [("violation", SYMLINKS)])
+
+    def test_only_repositories_and_their_parents_are_watched(self):
+        self.assertEqual(self.watcher.watched,
+                         {self.base, os.path.join(self.base, "group"), self.repo})
+        self.assertEqual(list(self.watcher.status), [self.repo])
+
+    def test_new_directories_in_repositories_and_excluded_trees_are_ignored(self):
+        del self.events[:]
+        os.makedirs(os.path.join(self.repo, "src", "nested", ".git"))
+        os.makedirs(os.path.join(self.base, "build", "other", ".git"))
+        self.assertEqual(self.drain(), [])
+        self.assertEqual(list(self.watcher.status), [self.repo])
+        self.assertNotIn(os.path.join(self.repo, "src"), self.watcher.watched)
+
+    def test_links_resolve_violation(self):
+        del self.events[:]
+        for link_name in SYMLINKS:
+            os.symlink(REAL_FILENAME, os.path.join(self.repo, link_name))
+        self.assertIn(("resolved", "group/repo"), self.drain())
+        self.assertTrue(self.watcher.status[self.repo]["compliant"])
+
+    def test_new_repository_is_detected(self):
+        del self.events[:]
+        new_repo = os.path.join(self.base, "group", "new")
+        os.makedirs(os.path.join(new_repo, ".git"))
+        self.assertEqual(self.drain(), [("violation", "group/new")])
+        self.assertIn(new_repo, self.watcher.status)
+
+    def test_removed_repository(self):
+        del self.events[:]
+        shutil.rmtree(self.repo)
+        self.assertIn(("removed", "group/repo"), self.drain())
+        self.assertEqual(self.watcher.status, {})
+
+    def test_repository_settings_apply(self):
+        for link_name in SYMLINKS:
+            os.symlink(REAL_FILENAME, os.path.join(self.repo, link_name))
+        self.drain()
+        with open(os.path.join(self.repo, PROJECT_CONFIG_FILE), "w") as f:
+            json.dump({"extra_symlinks": ["AGENTS.md"]}, f)
+        self.assertEqual(self.drain(), [("violation", "group/repo")])
+        self.assertEqual(self.watcher.status[self.repo]["missing_links"], ["AGENTS.md"])
+        os.symlink(REAL_FILENAME, os.path.join(self.repo, "AGENTS.md"))
+        self.assertEqual(self.drain(), [("resolved", "group/repo")])
+
+
+class TestPollingWatcher(WatcherTestMixin, unittest.TestCase):
+
+    def make_backend(self):
+        return PollingBackend(interval=0.01)
+
+    def drain(self):
+        # Changes within one mtime tick are invisible to polling; forget the
+        # recorded mtimes so the next poll reports every directory.
+        self.backend._mtimes.update((path, -1) for path in self.backend._mtimes)
+        return super().drain()
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "requires inotify")
+class TestInotifyWatcher(WatcherTestMixin, unittest.TestCase):
+
+    def make_backend(self):
+        return InotifyBackend()
+
+    def test_unrelated_files_do_not_inspect(self):
+        del self.events[:]
+        before = dict(self.watcher.status)
+        open(os.path.join(self.repo, "README.md"), "w").close()
+        self.assertEqual(self.drain(), [])
+        self.assertIs(self.watcher.status[self.repo], before[self.repo])
+
+    def test_repository_settings_rewritten_in_place(self):
+        path = os.path.join(self.repo, PROJECT_CONFIG_FILE)
+        with open(path, "w") as f:
+            json.dump({"symlinks": ["CLAUDE.md"]}, f)
+        self.drain()
+        os.symlink(REAL_FILENAME, os.path.join(self.repo, "CLAUDE.md"))
+        self.assertEqual(self.drain(), [("resolved", "group/repo")])
+        with open(path, "r+") as f:
+            f.truncate()
+            json.dump({"symlinks": ["AGENTS.md"]}, f)
+        self.assertEqual(self.drain(), [("violation", "group/repo")])
+
+
+if __name__ == "__main__":
+    unittest.main()